@@ -0,0 +1,156 @@
+# -*- coding:utf-8 -*-
+"""Latency of sourcing the sh activate script and of deactivate, in bash, zsh and dash
+
+Two envs are rendered in a temporary directory, each measurement is one shell process
+running a loop of `--switches` iterations, and the time of the same loop doing nothing is taken off:
+
+    activate    . env1/bin/activate, again in the activated shell
+    cycle       . env1/bin/activate; deactivate, from a shell which isn't activated
+    switch      . env1/bin/activate; . env2/bin/activate, per activation
+
+Every run also checks the scripts: PATH is searched in an empty directory while they run, so any
+external command fails, PATH mustn't grow across the switches, and deactivate must restore it as it was.
+The shells which aren't installed are skipped.
+
+Usage:
+  bench_activate.py [--shells=<list>] [--switches=<n>] [--repeat=<n>] [--json=<file>]
+
+Options:
+  --shells=<list>    comma separated shells [default: bash,zsh,dash]
+  --switches=<n>     iterations of each loop [default: 1000]
+  --repeat=<n>       runs of each loop, the median is reported [default: 5]
+  --json=<file>      write the results as json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import statistics
+import subprocess
+
+from docopt import docopt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jvirtualenv.__main__ import create_activate_s  # noqa: E402
+
+
+LOOP = '''
+_bench_i=0
+while [ "$_bench_i" -lt {switches} ] ; do
+    {body}
+    _bench_i=$((_bench_i + 1))
+done
+'''
+
+BODIES = [
+    ('baseline', ':'),
+    ('activate', '. "$ENV1/bin/activate"'),
+    ('cycle', '. "$ENV1/bin/activate"; deactivate'),
+    ('switch', '. "$ENV1/bin/activate"; . "$ENV2/bin/activate"'),
+]
+
+# the checks, anything printed is a failure
+CHECK = '''
+_bench_path="$PATH"
+PATH="$EMPTY"
+. "$ENV1/bin/activate"
+_bench_activated="$PATH"
+_bench_i=0
+while [ "$_bench_i" -lt 10 ] ; do
+    . "$ENV2/bin/activate"
+    . "$ENV1/bin/activate"
+    _bench_i=$((_bench_i + 1))
+done
+[ "$PATH" = "$_bench_activated" ] || echo "PATH grows across switches: $PATH"
+deactivate
+[ "$PATH" = "$EMPTY" ] || echo "PATH isn't restored by deactivate: $PATH"
+PATH="$_bench_path"
+'''
+
+
+def make_envs(work_dir):
+    """:return: (env1, env2, empty directory)"""
+    envs = []
+    for name, java_tag in (('env1', '17:0:9:64'), ('env2', '21:0:1:64')):
+        virtual_env = os.path.join(work_dir, name)
+        java_home = os.path.join(work_dir, 'jdk-' + java_tag.split(':')[0])
+        os.makedirs(os.path.join(virtual_env, 'bin'))
+        os.makedirs(os.path.join(java_home, 'bin'), exist_ok=True)
+        with open(os.path.join(virtual_env, 'bin', 'activate'), 'w') as f:
+            f.write(create_activate_s(virtual_env, java_home, java_tag, shell='sh'))
+        envs.append(virtual_env)
+
+    empty = os.path.join(work_dir, 'empty')
+    os.makedirs(empty)
+
+    return envs[0], envs[1], empty
+
+
+def run_shell(shell, script, env):
+    """:return: (ms, stdout and stderr)"""
+    start = time.perf_counter()
+    completed = subprocess.run([shell, '-c', script], env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                               universal_newlines=True)
+    return (time.perf_counter() - start) * 1000, completed.stdout
+
+
+def bench_shell(shell, env, switches, repeat):
+    _, output = run_shell(shell, CHECK, env)
+
+    medians = {}
+    for name, body in BODIES:
+        script = LOOP.format(switches=switches, body=body)
+        medians[name] = statistics.median(run_shell(shell, script, env)[0] for _ in range(repeat))
+
+    per_op = lambda ms, n: ms / n * 1000  # us
+    return {
+        'shell': shell,
+        'activate_us': per_op(medians['activate'] - medians['baseline'], switches),
+        'cycle_us': per_op(medians['cycle'] - medians['baseline'], switches),
+        'switch_us': per_op(medians['switch'] - medians['baseline'], switches * 2),
+        'check': output.strip() or 'ok',
+    }
+
+
+def main():
+    arguments = docopt(__doc__)
+    switches = int(arguments['--switches'])
+    repeat = int(arguments['--repeat'])
+
+    work_dir = tempfile.mkdtemp(prefix='jvirtualenv-bench-')
+    results = []
+    try:
+        env1, env2, empty = make_envs(work_dir)
+        env = dict(os.environ, ENV1=env1, ENV2=env2, EMPTY=empty, PS1='$ ')
+        for name in ('VIRTUAL_ENV', 'JAVA_TOOL_OPTIONS', 'JDK_JAVA_OPTIONS', '_OLD_VIRTUAL_PATH'):
+            env.pop(name, None)
+
+        print('{0:<8}{1:>14}{2:>12}{3:>12}  {4}'.format('shell', 'activate(us)', 'cycle(us)', 'switch(us)', 'check'))
+        for shell in arguments['--shells'].split(','):
+            shell_path = shutil.which(shell)
+            if shell_path is None:
+                print('{0:<8}not installed, skipped'.format(shell))
+                continue
+
+            result = bench_shell(shell_path, env, switches, repeat)
+            result['shell'] = shell
+            results.append(result)
+            print('{shell:<8}{activate_us:>14.1f}{cycle_us:>12.1f}{switch_us:>12.1f}  {0}'.format(
+                result['check'].splitlines()[0], **result))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if arguments['--json']:
+        with open(arguments['--json'], 'w') as f:
+            json.dump({'platform': sys.platform, 'switches': switches, 'results': results}, f, indent=4)
+
+    if any(result['check'] != 'ok' for result in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
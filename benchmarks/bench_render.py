@@ -0,0 +1,55 @@
+# -*- coding:utf-8 -*-
+"""Render time of the activate templates
+
+Usage:
+  bench_render.py [--number=<n>] [--json=<file>]
+
+Options:
+  --number=<n>     renders of each template [default: 20000]
+  --json=<file>    write the results as json
+"""
+
+import os
+import sys
+import json
+import timeit
+import importlib
+
+from docopt import docopt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jvirtualenv.__main__ import activate_values  # noqa: E402
+from jvirtualenv.template.engine import SHELLS, Template, get_template  # noqa: E402
+
+
+VIRTUAL_ENV = '/home/user/projects/some "quoted" $project'
+JAVA_HOME = '/opt/java/jdk-17.0.9'
+JAVA_TAG = '17:0:9:64'
+
+
+def main():
+    arguments = docopt(__doc__)
+    number = int(arguments['--number'])
+    values = activate_values(VIRTUAL_ENV, JAVA_HOME, JAVA_TAG)
+
+    results = []
+    print('{0:<12}{1:>16}{2:>16}'.format('shell', 'compile(us)', 'render(us)'))
+    for shell in SHELLS:
+        _, module_name, quote = SHELLS[shell]
+        source = importlib.import_module(module_name).template
+        template = get_template(shell)
+
+        compile_us = timeit.timeit(lambda: Template(source, quote), number=1000) / 1000 * 1e6
+        render_us = timeit.timeit(lambda: template.render(values), number=number) / number * 1e6
+
+        results.append({'shell': shell, 'compile_us': compile_us, 'render_us': render_us, 'number': number})
+        print('{0:<12}{1:>16.2f}{2:>16.2f}'.format(shell, compile_us, render_us))
+
+    if arguments['--json']:
+        with open(arguments['--json'], 'w') as f:
+            json.dump({'python': sys.version, 'platform': sys.platform, 'results': results}, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
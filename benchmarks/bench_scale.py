@@ -0,0 +1,238 @@
+# -*- coding:utf-8 -*-
+"""Scaling of discovery, list-tag, tag resolution and env creation with the number of JDK
+
+For each size a tree of synthetic JDK homes is generated in a temporary directory,
+`bin/java` and `bin/javac` are shell stubs printing the `-version` output of a real JDK to stderr,
+and all but --without-release of them have a `release` file, the others are probed by running the stub.
+Nothing is downloaded and no real JDK is needed, it runs on any POSIX box.
+
+Usage:
+  bench_scale.py [--sizes=<list>] [--repeat=<n>] [--jobs=<n>] [--without-release=<ratio>]
+                 [--lookups=<n>] [--envs=<n>] [--json=<file>]
+
+Options:
+  --sizes=<list>              comma separated numbers of JDK homes [default: 10,100,1000,5000]
+  --repeat=<n>                runs of each measurement, the median is reported [default: 3]
+  --jobs=<n>                  max number of java probes running at the same time [default: 8]
+  --without-release=<ratio>   ratio of the homes without release file [default: 0.1]
+  --lookups=<n>               find_version calls of each run [default: 1000]
+  --envs=<n>                  java virtual env created by write_activate_file of each run [default: 100]
+  --json=<file>               write the results as json
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import statistics
+import subprocess
+import contextlib
+
+from docopt import docopt
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(HERE)
+sys.path.insert(0, REPO_DIR)
+
+import jvirtualenv.__main__ as jvirtualenv_main  # noqa: E402
+from jvirtualenv.api import TAG_LIST_FILE_NAME  # noqa: E402
+from jvirtualenv.scanner import default_search_pattern  # noqa: E402
+
+
+# (feature release, vendor), 1.8 is the legacy `java version "1.8.0_<update>"` style
+RELEASES = [('1.8', 'Oracle Corporation'), ('11', 'Eclipse Adoptium'), ('17', 'Eclipse Adoptium'),
+            ('21', 'Amazon.com Inc.'), ('22', 'Oracle Corporation')]
+
+LEGACY_VERSION_OUTPUT = '''java version "{version}"
+Java(TM) SE Runtime Environment (build {version}-b{build:02d})
+Java HotSpot(TM) 64-Bit Server VM (build 25.{update}-b{build:02d}, mixed mode)'''
+
+VERSION_OUTPUT = '''openjdk version "{version}" 2023-10-17
+OpenJDK Runtime Environment (build {version}+{build})
+OpenJDK 64-Bit Server VM (build {version}+{build}, mixed mode, sharing)'''
+
+STUB = '''#!/bin/sh
+cat >&2 <<'EOF'
+{output}
+EOF
+'''
+
+FIND_VERSION_TAGS = ['17', '1.8', '11:0:2', '21:0:1:64', '22', '9']
+
+
+def jdk_version(i):
+    """:return: (home name, version, -version output, implementor)"""
+    feature, implementor = RELEASES[i % len(RELEASES)]
+    update = i // len(RELEASES)
+    build = 1 + i % 13
+
+    if feature == '1.8':
+        version = '1.8.0_{0}'.format(update)
+        output = LEGACY_VERSION_OUTPUT.format(version=version, update=update, build=build)
+        name = 'jdk{0}'.format(version)
+    else:
+        version = '{0}.0.{1}'.format(feature, update)
+        output = VERSION_OUTPUT.format(version=version, build=build)
+        name = 'jdk-{0}'.format(version)
+
+    return name, version, output, implementor
+
+
+def make_jdk_tree(root, size, without_release):
+    """`root/<vendor dir>/jdk-.../{bin/java, bin/javac, release}`, spread under a few directories like a real box"""
+    no_release_every = round(1 / without_release) if without_release else 0
+
+    for i in range(size):
+        name, version, output, implementor = jdk_version(i)
+        home = os.path.join(root, 'vendor{0}'.format(i % 7), 'java', name)
+        bin_dir = os.path.join(home, 'bin')
+        os.makedirs(bin_dir)
+
+        stub = STUB.format(output=output)
+        for executable in ('java', 'javac'):
+            path = os.path.join(bin_dir, executable)
+            with open(path, 'w') as f:
+                f.write(stub)
+            os.chmod(path, 0o755)
+
+        if not (no_release_every and i % no_release_every == 0):
+            with open(os.path.join(home, 'release'), 'w') as f:
+                f.write('IMPLEMENTOR="{0}"\nJAVA_VERSION="{1}"\nOS_ARCH="x86_64"\nOS_NAME="Linux"\n'.format(
+                    implementor, version))
+
+
+def configure(config_dir, jdk_root, jobs):
+    """the same globals as cli() sets"""
+    os.makedirs(config_dir)
+
+    search_pattern = default_search_pattern()
+    search_pattern['roots'] = [jdk_root]
+    with open(os.path.join(config_dir, 'search-pattern.json'), 'w') as f:
+        json.dump(search_pattern, f, indent=4)
+
+    jvirtualenv_main.GLOBAL_MODE = False
+    jvirtualenv_main.PROBE_JOBS = jobs
+    jvirtualenv_main.PROBE_TIMEOUT = 10
+    jvirtualenv_main.CONFIG_DIR = config_dir
+    jvirtualenv_main.TAG_LIST_CONFIG_PATH = os.path.join(config_dir, TAG_LIST_FILE_NAME)
+    jvirtualenv_main.SEARCH_PATTERN_CONFIG_PATH = os.path.join(config_dir, 'search-pattern.json')
+    jvirtualenv_main.CATALOG_INDEX_PATH = os.path.join(config_dir, 'catalog.sqlite3')
+    jvirtualenv_main.HOOK_LOOKUP_PATH = os.path.join(config_dir, 'java-homes.sh')
+
+
+def timed(func, repeat):
+    """:return: (median ms, last result)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(timings), result
+
+
+def bench_size(work_dir, size, arguments):
+    jdk_root = os.path.join(work_dir, 'jdk')
+    home_dir = os.path.join(work_dir, 'home')
+    config_dir = os.path.join(home_dir, '.jvirtualenv.d')
+    repeat = int(arguments['--repeat'])
+
+    start = time.perf_counter()
+    make_jdk_tree(jdk_root, size, float(arguments['--without-release']))
+    generate_ms = (time.perf_counter() - start) * 1000
+
+    configure(config_dir, jdk_root, int(arguments['--jobs']))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        discover_ms, version_infos = timed(jvirtualenv_main.build_version_infos, repeat)
+        rediscover_ms, _ = timed(lambda: jvirtualenv_main.build_version_infos(version_infos), repeat)
+        json_dump_ms, _ = timed(lambda: jvirtualenv_main.json_dump(version_infos), repeat)
+
+    # list-tag as the user runs it, a new process printing the whole catalog
+    env = dict(os.environ, HOME=home_dir, USERPROFILE=home_dir, PYTHONPATH=REPO_DIR)
+    list_tag_ms, _ = timed(lambda: subprocess.run([sys.executable, '-m', 'jvirtualenv', 'list-tag'], env=env,
+                                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True),
+                           repeat)
+
+    lookups = int(arguments['--lookups'])
+
+    def find_versions():
+        for i in range(lookups):
+            jvirtualenv_main.find_version(FIND_VERSION_TAGS[i % len(FIND_VERSION_TAGS)])
+
+    find_version_ms, _ = timed(find_versions, repeat)
+
+    envs = int(arguments['--envs'])
+    java_home, java_tag = version_infos[0]['home'], version_infos[0]['tag']
+
+    def write_activate_files():
+        for i in range(envs):
+            jvirtualenv_main.write_activate_file(os.path.join(work_dir, 'envs', str(i)), java_home, java_tag,
+                                                 force=True)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        write_activate_ms, _ = timed(write_activate_files, repeat)
+
+    return {
+        'size': size,
+        'found': len(version_infos),
+        'generate_ms': generate_ms,
+        'build_version_infos_ms': discover_ms,
+        'build_version_infos_incremental_ms': rediscover_ms,
+        'json_dump_ms': json_dump_ms,
+        'list_tag_ms': list_tag_ms,
+        'find_version_us': find_version_ms / lookups * 1000,
+        'write_activate_file_per_s': envs / (write_activate_ms / 1000),
+    }
+
+
+COLUMNS = [
+    ('size', 'size', '{0:>7}'),
+    ('found', 'found', '{0:>7}'),
+    ('build_version_infos_ms', 'discover(ms)', '{0:>13.1f}'),
+    ('build_version_infos_incremental_ms', 'incremental', '{0:>12.1f}'),
+    ('json_dump_ms', 'json_dump', '{0:>10.1f}'),
+    ('list_tag_ms', 'list-tag', '{0:>10.1f}'),
+    ('find_version_us', 'find(us)', '{0:>10.1f}'),
+    ('write_activate_file_per_s', 'envs/s', '{0:>9.0f}'),
+]
+
+
+def main():
+    arguments = docopt(__doc__)
+    sizes = [int(size) for size in arguments['--sizes'].split(',')]
+
+    print(''.join('{0:>{1}}'.format(title, len(fmt.format(0))) for _, title, fmt in COLUMNS))
+    results = []
+    for size in sizes:
+        work_dir = tempfile.mkdtemp(prefix='jvirtualenv-bench-')
+        try:
+            result = bench_size(work_dir, size, arguments)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        results.append(result)
+        print(''.join(fmt.format(result[key]) for key, _, fmt in COLUMNS))
+
+        if result['found'] != size:
+            print('found {0} JDK of {1}'.format(result['found'], size))
+            sys.exit(1)
+
+    if arguments['--json']:
+        with open(arguments['--json'], 'w') as f:
+            json.dump({
+                'python': sys.version,
+                'platform': sys.platform,
+                'cpus': os.cpu_count(),
+                'jobs': int(arguments['--jobs']),
+                'without_release': float(arguments['--without-release']),
+                'results': results,
+            }, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
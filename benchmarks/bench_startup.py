@@ -0,0 +1,115 @@
+# -*- coding:utf-8 -*-
+"""Cold start time of jvirtualenv subcommands
+
+Every run is a new python process with HOME pointed to a temporary directory
+holding a synthetic tag list, so no JDK discovery happens and the result
+doesn't depend on the JDK installed on the machine.
+
+Usage:
+  bench_startup.py [--repeat=<n>] [--entries=<n>] [--budget=<ms>] [--json=<file>]
+
+Options:
+  --repeat=<n>     runs of each subcommand [default: 20]
+  --entries=<n>    entries of the synthetic tag list [default: 20]
+  --budget=<ms>    exit with 1 if the median of any subcommand is larger than it
+  --json=<file>    write the results as json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import statistics
+import subprocess
+
+from docopt import docopt
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(HERE)
+
+
+def make_home(home_dir, entries):
+    config_dir = os.path.join(home_dir, '.jvirtualenv.d')
+    os.makedirs(config_dir)
+
+    version_infos = []
+    for i in range(entries):
+        major = 8 + i % 14
+        version_infos.append({
+            'tag': '{0}:0:{1}:64'.format(major, i),
+            'version': '{0}.0.{1}'.format(major, i),
+            'bit': '64',
+            'home': os.path.join(home_dir, 'jdk', 'jdk-{0}.0.{1}'.format(major, i)),
+        })
+
+    with open(os.path.join(config_dir, 'tag-list.json'), 'w') as f:
+        json.dump(version_infos, f, indent=4)
+
+
+def subcommands(home_dir):
+    project = os.path.join(home_dir, 'project')
+
+    return [
+        ('python -c pass', [sys.executable, '-c', 'pass']),
+        ('import', [sys.executable, '-c', 'import jvirtualenv.__main__']),
+        ('--version', [sys.executable, '-m', 'jvirtualenv', '--version']),
+        ('list-tag', [sys.executable, '-m', 'jvirtualenv', 'list-tag']),
+        ('-j 17 <project> -f', [sys.executable, '-m', 'jvirtualenv', '-j', '17', project, '-f']),
+    ]
+
+
+def measure(cmd, env, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, env=env, cwd=REPO_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return timings
+
+
+def main():
+    arguments = docopt(__doc__)
+    repeat = int(arguments['--repeat'])
+
+    home_dir = tempfile.mkdtemp(prefix='jvirtualenv-bench-')
+    try:
+        make_home(home_dir, int(arguments['--entries']))
+
+        env = dict(os.environ, HOME=home_dir, USERPROFILE=home_dir, PYTHONPATH=REPO_DIR)
+        env.pop('PYTHONDONTWRITEBYTECODE', None)
+        subprocess.run([sys.executable, '-m', 'compileall', '-q', os.path.join(REPO_DIR, 'jvirtualenv')], check=True)
+
+        results = []
+        print('{0:<24}{1:>10}{2:>10}{3:>10}'.format('subcommand', 'min(ms)', 'median', 'max'))
+        for name, cmd in subcommands(home_dir):
+            timings = measure(cmd, env, repeat)
+            result = {
+                'name': name,
+                'min': min(timings),
+                'median': statistics.median(timings),
+                'max': max(timings),
+                'repeat': repeat,
+            }
+            results.append(result)
+            print('{name:<24}{min:>10.1f}{median:>10.1f}{max:>10.1f}'.format(**result))
+    finally:
+        shutil.rmtree(home_dir, ignore_errors=True)
+
+    if arguments['--json']:
+        with open(arguments['--json'], 'w') as f:
+            json.dump({'python': sys.version, 'platform': sys.platform, 'results': results}, f, indent=4)
+
+    if arguments['--budget']:
+        budget = float(arguments['--budget'])
+        over = [result['name'] for result in results if result['median'] > budget]
+        if over:
+            print('over budget {0}ms: {1}'.format(budget, ', '.join(over)))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,48 +2,108 @@
 """Java Virtual Env
 virtualenv for java JDK
 
-jdk pattern:
-  POSIX:  .*/java/jdk[^/]
+jdk pattern (configurable in search-pattern.json of the config directory):
+  POSIX:  .*/jdk[^/]*, .*/java/[^/]+, .*/jvm/[^/]+ under /opt, /usr/lib/jvm, /usr/java, /usr/local and home
   Windows: Program Files, Program Files (x86), ProgramData and current directory
 
 Usage:
-  jvirtualenv list-tag [-g]
-  jvirtualenv --java=<tag> <project> [-g] [-f]
-  jvirtualenv reinit-tag [-g]
+  jvirtualenv list-tag [-g] [--jobs=<n>] [--timeout=<sec>] [--trace=<file>]
+  jvirtualenv --java=<tag> <project> [-g] [-f] [--shims] [--cds] [--train=<cmd>] [--profile=<name>] [--build-cache]
+                                     [--trace=<file>]
+  jvirtualenv cds <project> [-g] [--train=<cmd>] [--rebuild]
+  jvirtualenv tune <project> [-g] [--profile=<name>]
+  jvirtualenv reinit-tag [-g] [--jobs=<n>] [--timeout=<sec>] [--full] [--trace=<file>]
+  jvirtualenv watch [-g] [--jobs=<n>] [--timeout=<sec>] [--debounce=<sec>] [--interval=<sec>]
+  jvirtualenv create-many <manifest> [-g] [-f] [--jobs=<n>] [--shims] [--trace=<file>]
+  jvirtualenv build-cache [-g] [--jobs=<n>] [--dry-run]
+  jvirtualenv install <archive>... [-g] [--jobs=<n>] [--timeout=<sec>]
+  jvirtualenv uninstall <tag> [-g]
+  jvirtualenv gc [-g]
+  jvirtualenv serve [-g] [--socket=<path>]
+  jvirtualenv exec --java=<tag> [-g] [--jobs=<n>] [--] <command>...
+  jvirtualenv hook [-g]
 
 Options:
   list-tag         list all the optional tag (init if not exists)
-  -j --java=<tag>  point a jdk to use
-  reinit-tag       reinit the java version config
+  -j --java=<tag>  point a jdk to use, the newest one matching a tag prefix such as `17`, `1.8` (or `8`),
+                   `17:0:1:64`, or a version constraint such as `>=11,<17`, `17.0.*`, `!=17.0.1`
+  reinit-tag       reinit the java version config, only new or changed JDK are probed
+  --full           probe every JDK again even if it isn't changed
+  watch            keep the java version config up to date with the JDK installed or removed
+  --debounce=<sec>  wait for a burst of changes to be quiet before updating [default: 2]
+  --interval=<sec>  mtime polling interval when inotify isn't available [default: 5]
+  hook             print the bash/zsh hook switching JDK by the .java-version of the current directory,
+                   use it by `eval "$(jvirtualenv hook)"` in ~/.bashrc or ~/.zshrc
+  create-many      create the java virtual env of every `<project> <tag>` line of the manifest (`-` for stdin)
   -g --global      global mode, maybe need sudo
   -f --force       force to create java virtual env in a existed folder
+  --shims          also create a launcher in <project>/bin for every executable of the JDK,
+                   which runs it with JAVA_HOME set and needs no activation
+  cds              build the class data sharing archive of the java virtual env again if the JDK changed
+  --cds            also build a class data sharing archive of the JDK in <project>/cds (JDK 10+),
+                   which is used through JAVA_TOOL_OPTIONS of the activated env to cut JVM startup time
+  --train=<cmd>    archive the classes loaded by the shell command instead of the default classes (JDK 13+),
+                   such as "java -cp app.jar app.Main --help", `cds` reuses the last one if it's omitted
+  --rebuild        build the archive even if the JDK isn't changed
+  --profile=<name>  JVM options of the env fitting the memory and CPU limits of the container (cgroup)
+                   it's created in: throughput, latency or small, `none` to remove it
+  tune             read the limits of the container again and write them to the env,
+                   with the profile of it if --profile is omitted
+  --build-cache    also give the env its own Gradle user home and Maven local repository in <project>/cache,
+                   exported as GRADLE_USER_HOME and MAVEN_OPTS by the activate files
+  build-cache      keep one copy of the identical artifacts of the build caches of all the envs in the store
+                   of the config directory and hard-link it into them, remove the ones no env uses any more,
+                   and report the space they take
+  --dry-run        only report what build-cache would link and remove
+  install          extract the JDK archives (.tar.gz, .tgz, .tar.xz, .zip) into the store of the config directory,
+                   the files identical to the ones of the installed JDK are hard-linked, and add them to the tags
+  uninstall        remove the installed JDK of the tag, the newest one matched or the name of its directory
+  gc               remove the files of the store no installed JDK uses and the ones of interrupted installs
+  serve            answer resolve, project, list and env requests of jvirtualenv.client or `nc -U` on a Unix socket,
+                   from the catalog kept in memory, until it's interrupted
+  exec             run the command with JAVA_HOME, PATH... of the JDK of each comma separated tag of --java,
+                   such as `--java=8,11,17,21`, with no java virtual env, at the same time if there are many,
+                   its output is prefixed by the tag, and it exits with the status of the first failed one
+  --socket=<path>  path of the socket of serve, default to serve.sock of the config directory
+  --jobs=<n>       max number of java probes, env creations or hashed files at the same time [default: 8]
+  --timeout=<sec>  kill a java probe which runs longer than it [default: 10]
+  --trace=<file>   write the timing of every phase and java probe to the file as Chrome trace event json
+                   (open it in chrome://tracing or ui.perfetto.dev), and print a summary of it
 
 """
 
+# Only the light modules are imported here, the others are imported by the code path needing them,
+# see benchmarks/bench_startup.py
 import re
-from distutils.version import LooseVersion
 import json
 from collections import OrderedDict
 from typing import Tuple
 
-from color import color
-from docopt import docopt
-
 from jvirtualenv.support.minghu6_support import *
+from jvirtualenv import trace
+from jvirtualenv.jdkinfo import read_release, read_binary_arch, os_arch_bit, java_executable, jdk_fingerprint, \
+    is_stale
+from jvirtualenv.api import default_config_dir, class_path_for, TAG_LIST_FILE_NAME, ENV_CONFIG_NAME
+from jvirtualenv.version import JavaVersion, InvalidConstraintError, parse_version, is_constraint, parse_constraint
+from jvirtualenv.tuning import PROFILES, UnknownProfileError
 
 
-if not iswin():
-    import sh
+color = LazyModule('color.color')
+sqlite3 = LazyModule('sqlite3')
 
 
 __version__ = '0.1.0'
 
+PROBE_JOBS = 8
+PROBE_TIMEOUT = 10
+
 
 class GetVersionFailedError(Exception):
     pass
 
 
 class NotBelongToJDKError(Exception):
+    """The first arg of the exception should be the java path"""
     pass
 
 
@@ -51,6 +111,11 @@ class GetJavaVersionFailedError(GetVersionFailedError):
     pass
 
 
+class GetJavaVersionTimeoutError(GetJavaVersionFailedError):
+    """The first arg of the exception should be the timeout in seconds"""
+    pass
+
+
 class DirectoryConflictError(Exception):
     """The first arg of the exception should be conflicted directory path"""
     pass
@@ -61,6 +126,20 @@ class JavaNotFoundError(FileNotFoundError):
     pass
 
 
+class ProjectExistsError(FileExistsError):
+    """The first arg of the exception should be the project directory path"""
+    pass
+
+
+class ManifestError(ValueError):
+    pass
+
+
+class NotJavaVirtualEnvError(FileNotFoundError):
+    """The first arg of the exception should be the directory path"""
+    pass
+
+
 def _step_parent_dir(path, n=1):
     if n > 0:
         n -= 1
@@ -70,23 +149,37 @@ def _step_parent_dir(path, n=1):
     return path
 
 
-def get_java_version(java_path='java') -> Tuple[LooseVersion, int]:
+def get_java_version(java_path='java', timeout=None) -> Tuple[JavaVersion, str]:
+    from subprocess import TimeoutExpired
+
     if iswin():
-        cmd = '"{0}" -version'.format(java_path)
+        cmd, shell = '"{0}" -version'.format(java_path), True
     else:
-        cmd = '{0} -version'.format(java_path)
+        cmd, shell = [java_path, '-version'], False  # no shell in between, so a timeout kills java itself
 
-    _, err = exec_cmd(cmd)  # It's confused that java -version output-stream is stderr other than stdout
+    with trace.span(java_path + ' -version', cat='exec') as args:
+        try:
+            # It's confused that java -version output-stream is stderr other than stdout
+            _, err = exec_cmd(cmd, shell=shell, timeout=timeout)
+        except TimeoutExpired as ex:
+            args['status'] = 'timeout'
+            raise GetJavaVersionTimeoutError(timeout) from ex
+        except OSError as ex:
+            args['status'] = 'failed'
+            raise GetJavaVersionFailedError from ex
 
     try:
-        tokens_l1 = re.split(r'\s+', err[0])
+        # skip the leading lines such as `Picked up JAVA_TOOL_OPTIONS: ...`
+        version_line = next(line for line in err if re.search(r'\bversion\s+"', line))  # raise StopIteration
+        tokens_l1 = re.split(r'\s+', version_line)
         ind_pv = tokens_l1.index('version')  # raise ValueError if value isn't exists
         version_s = tokens_l1[ind_pv + 1][1:-1]  # raise IndexError
 
-        version = LooseVersion(version_s)
-        version.version = [getone(version.version, i, 0) for i in range(3)]
+        version = parse_version(version_s)
 
-        if match := re.search(r'\b\d+(?=-Bit)\b', err[2]):
+        if arch := read_binary_arch(java_path):
+            bit = arch[0]
+        elif match := re.search(r'\b\d+(?=-Bit)\b', '\n'.join(err)):
             bit = match.group(0)
         else:
             bit = '32'
@@ -97,6 +190,31 @@ def get_java_version(java_path='java') -> Tuple[LooseVersion, int]:
     return version, bit
 
 
+def get_java_version_from_release(java_path) -> Tuple[JavaVersion, str, str, str]:
+    """
+    Read `$JAVA_HOME/release` and the header of `bin/java`, no JVM is started.
+
+    :return: version, bit, implementor, arch
+    raise GetJavaVersionFailedError if the metadata is missing
+    """
+    release = read_release(_step_parent_dir(java_path, 2))
+    if not release or not release.get('JAVA_VERSION'):
+        raise GetJavaVersionFailedError('no JAVA_VERSION in release file')
+
+    os_arch = release.get('OS_ARCH')
+    if arch := read_binary_arch(java_path):
+        bit, os_arch = arch
+    elif not (bit := os_arch_bit(os_arch)):
+        raise GetJavaVersionFailedError('unknown arch {0!r}'.format(os_arch))
+
+    try:
+        version = parse_version(release['JAVA_VERSION'])
+    except ValueError as ex:
+        raise GetJavaVersionFailedError from ex
+
+    return version, bit, release.get('IMPLEMENTOR'), os_arch
+
+
 def isstdjdk(java_path):
     # sibling guarantee: [javac]
     def there_is_javac(java_path):
@@ -113,86 +231,200 @@ def isstdjdk(java_path):
     return all(map(lambda f: f(java_path), [there_is_javac, parent_is_bin]))
 
 
-def _build_version_info(java_path):
+def _build_version_info(java_path, timeout=None):
+    """raise GetJavaVersionFailedError if java_path looks like a JDK but can't be probed"""
     if not isstdjdk(java_path):
-        raise NotBelongToJDKError
+        raise NotBelongToJDKError(java_path)
+
+    java_home = _step_parent_dir(java_path, 2)
+    fingerprint = jdk_fingerprint(java_home)  # before probing, so a change during it is seen next time
 
     try:
-        version, bit = get_java_version(java_path)
-    except GetJavaVersionFailedError as ex:
-        raise NotBelongToJDKError from ex
+        version, bit, implementor, arch = get_java_version_from_release(java_path)
+    except GetJavaVersionFailedError:  # fall back to start the JVM
+        version, bit = get_java_version(java_path, timeout)
+        implementor, arch = None, getone(read_binary_arch(java_path), 1)
 
     version_info = OrderedDict()
 
-    version_info['tag'] = '{0}:{1}:{2}:{3}'.format(*version.version[:3], bit)
-    version_info['version'] = version
+    version_info['tag'] = '{0}:{1}:{2}:{3}'.format(*version.tag_fields, bit)
+    version_info['version'] = version.text
+    version_info['version_key'] = version.key
     version_info['bit'] = bit
-    version_info['home'] = _step_parent_dir(java_path, 2)
+    version_info['home'] = java_home
+    version_info['implementor'] = implementor
+    version_info['arch'] = arch
+    version_info['fingerprint'] = fingerprint
 
     return version_info
 
 
-def build_version_infos():
+def _probe(java_path, timeout, known):
+    """:return: (version_info, failure reason), both are None if java_path isn't a JDK"""
+    with trace.span(java_path, cat='probe') as args:
+        known_info = known.get(_step_parent_dir(java_path, 2))
+        if known_info is not None and known_info.get('fingerprint') is not None \
+                and known_info['fingerprint'] == jdk_fingerprint(known_info['home']):
+            args['status'] = 'reused'
+            return known_info, None
+
+        try:
+            version_info = _build_version_info(java_path, timeout)
+        except NotBelongToJDKError:
+            args['status'] = 'not-jdk'
+            return None, None
+        except GetJavaVersionTimeoutError as ex:
+            args['status'] = 'timeout'
+            return None, 'timeout after {0}s'.format(ex.args[0])
+        except GetJavaVersionFailedError as ex:
+            args['status'] = 'failed'
+            return None, 'failed: {0!r}'.format(ex.__cause__ or ex)
+
+        args['tag'] = version_info['tag']
+        return version_info, None
+
+
+def probe_version_infos(java_paths, jobs=None, timeout=None, known_infos=()):
+    """
+    Run the java probes concurrently, at most `jobs` at the same time,
+    each one is killed after `timeout` seconds.
+    java_paths may be a generator, each one is probed as soon as it's yielded.
+    The entry of known_infos is reused if its fingerprint isn't changed,
+    it's checked again even if discovery didn't find it, and dropped if its home is gone.
+
+    :return: (version_infos, failures), both in the order of java_paths,
+             failures is a list of (java_path, reason)
+    """
+    from itertools import chain
+    from concurrent.futures import ThreadPoolExecutor
+
+    known = OrderedDict((version_info['home'], version_info) for version_info in known_infos)
     version_infos = []
+    failures = []
 
-    if iswin():
-        possible_dir_name = [
-            'Program Files (x86)',
-            'Program Files',
-            'ProgramData',
-        ]
-        possible_dir = []
-        for driver in get_drivers():
-            for each_dir in possible_dir_name:
-                possible_dir.append(os.path.join(driver, os.sep, each_dir))
-
-        possible_dir.append(os.path.abspath(os.curdir))
-
-        for each_possible_dir in possible_dir:
-            for java_path in find_wrapper(each_possible_dir, 'java'):
-                try:
-                    version_info = _build_version_info(java_path)
-                except NotBelongToJDKError:
-                    pass
-                else:
-                    color.print_info('')
-                    version_infos.append(version_info)
+    with ThreadPoolExecutor(max_workers=jobs or None) as executor:
+        futures = OrderedDict()  # drop duplicates but keep the order
+        for java_path in chain(java_paths, (java_executable(home) for home in known)):
+            if java_path not in futures:
+                futures[java_path] = executor.submit(_probe, java_path, timeout, known)
 
-    else:
-        try:
-            JAVA_PATTERN = '^.*/jdk[^/]*/bin/java$'
-            java_path_coll = sh.locate('-A', '-r', JAVA_PATTERN)
-        except sh.ErrorReturnCode_1:  # `locate` returns empty
-            if env_java_path := sh.which('java'):  # add java path from env
-                java_path_coll = [env_java_path]
-            else:
-                raise JavaNotFoundError from sh.ErrorReturnCode_1
-        finally:
-            for item in java_path_coll:
-                java_path = item.__str__().strip()
+        for java_path, future in futures.items():
+            version_info, reason = future.result()
+            if version_info is not None:
+                version_infos.append(version_info)
+            elif reason is not None:
+                failures.append((java_path, reason))
 
-                try:
-                    version_info = _build_version_info(java_path)
-                    print(version_info)
-                except NotBelongToJDKError:
-                    pass
-                else:
-                    color.print_info('')
-                    version_infos.append(version_info)
+    return version_infos, failures
+
+
+def report_probe_failures(failures):
+    for java_path, reason in failures:
+        color.print_warn('probe {0} {1}'.format(java_path, reason))
+
+
+def find_java_candidates(search_pattern, installed=()):
+    """yield the java paths as soon as the scanner finds them, and then the ones installed by jvirtualenv"""
+    import shutil
+    from itertools import chain
+    from jvirtualenv.scanner import iter_java_paths
 
+    found = 0
+    with trace.span('discover') as args:
+        for java_path in chain(iter_java_paths(search_pattern), installed):
+            found += 1
+            yield java_path
+        args['found'] = found
+
+    if not found:
+        if env_java_path := shutil.which('java'):  # add java path from env
+            yield os.path.realpath(env_java_path)
+        else:
+            raise JavaNotFoundError
+
+
+def build_version_infos(known_infos=()):
+    """the java probes run while the scan is going on, the result is in the order of the scan all the same"""
+    from jvirtualenv.scanner import load_search_pattern, search_roots, scan_order_key
+
+    search_pattern = load_search_pattern(SEARCH_PATTERN_CONFIG_PATH)
+
+    with trace.span('probe') as args:
+        version_infos, failures = probe_version_infos(find_java_candidates(search_pattern, installed_java_paths()),
+                                                      PROBE_JOBS, PROBE_TIMEOUT, known_infos)
+        args.update(jdk=len(version_infos), failed=len(failures))
+
+    key = scan_order_key(search_roots(search_pattern))
+    version_infos.sort(key=lambda version_info: key(version_info['home']))
+    failures.sort(key=lambda failure: key(failure[0]))
+    report_probe_failures(failures)
 
     return version_infos
 
 
-def json_dump(version_infos):
-    json.dump(version_infos,
-              open(TAG_LIST_CONFIG_PATH, 'w'),
-              default=lambda o: o.__str__(),
-              indent=4)
+def jdk_store_dir():
+    from jvirtualenv.jdkstore import STORE_DIR_NAME
+
+    return os.path.join(CONFIG_DIR, STORE_DIR_NAME)
+
+
+def installed_java_paths():
+    from jvirtualenv.jdkstore import installed_homes
+
+    return [java_executable(home) for home in installed_homes(jdk_store_dir())]
+
+
+def json_dumps(version_infos):
+    return json.dumps(version_infos, default=lambda o: o.__str__(), indent=4)
+
+
+def json_dump(version_infos, unchanged_skipped=False):
+    """
+    written to a temporary file and renamed, so readers never see a partial catalog, call it with config_lock()
+
+    :param unchanged_skipped: nothing is written if the file has the same catalog already,
+                              or its new mtime invalidates the api cache and the index for nothing
+    :return: if it's written
+    """
+    content = json_dumps(version_infos)
+    if unchanged_skipped:
+        try:
+            with open(TAG_LIST_CONFIG_PATH, 'r') as f:
+                if f.read() == content:
+                    return False
+        except OSError:
+            pass
+
+    with trace.span('write ' + TAG_LIST_FILE_NAME):
+        atomic_write(TAG_LIST_CONFIG_PATH, content)
+
+    with trace.span('rebuild index') as args:
+        from jvirtualenv.catalog import source_signature
+
+        try:
+            with open_catalog_index() as index:
+                index.rebuild(version_infos, source_signature(TAG_LIST_CONFIG_PATH))
+        except (sqlite3.Error, OSError) as ex:  # it's synced by the next reader then
+            args['status'] = 'skipped: {0!r}'.format(ex)
+
+    from jvirtualenv.hook import write_lookup
+
+    with trace.span('write hook lookup'):
+        write_lookup(HOOK_LOOKUP_PATH, version_infos)
+
+    return True
 
 
 def json_load():
-    return json.load(open(TAG_LIST_CONFIG_PATH, 'r'), object_pairs_hook=OrderedDict)
+    with open(TAG_LIST_CONFIG_PATH, 'r') as f:
+        return json.load(f, object_pairs_hook=OrderedDict)
+
+
+def config_lock():
+    """the single writer lock of the catalog, readers don't need it"""
+    ensure_dir_exists(CONFIG_DIR)
+
+    return FileLock(os.path.join(CONFIG_DIR, '.tag-list.lock'))
 
 
 def ensure_dir_exists(path):
@@ -200,7 +432,7 @@ def ensure_dir_exists(path):
         if os.path.exists(path):
             raise DirectoryConflictError(path)
         else:
-            os.makedirs(path)
+            os.makedirs(path, exist_ok=True)  # it may be created by another thread at the same time
 
 
 def has_config_file():
@@ -211,20 +443,134 @@ def handle_directory_conflict(ex):
     color.print_err('directory %s conflict' % ex.args[0])
 
 
-def init_config():
-    ensure_dir_exists(CONFIG_DIR)
-    version_infos = build_version_infos()
+def load_known_infos():
+    """the entries of the old config, empty if it's missing or broken"""
+    if not has_config_file():
+        return []
+
+    try:
+        return json_load()
+    except ValueError:
+        return []
+
+
+def _init_config(full=False):
+    version_infos = build_version_infos([] if full else load_known_infos())
     json_dump(version_infos)
 
 
+def init_config(full=False):
+    with config_lock():
+        _init_config(full)
+
+
 def get_config():
     if not has_config_file():
-        init_config()
-        color.print_ok('init config in %s' % TAG_LIST_CONFIG_PATH)
+        with config_lock():
+            if not has_config_file():  # or it has been done by the one we waited for
+                _init_config()
+                color.print_ok('init config in %s' % TAG_LIST_CONFIG_PATH)
 
     return json_load()
 
 
+def _is_under(path, dir_paths):
+    return any(path == dir_path or path.startswith(dir_path.rstrip(os.sep) + os.sep) for dir_path in dir_paths)
+
+
+def update_config(changed_paths):
+    """
+    Probe again only the JDK under changed_paths, the other entries are kept as is
+
+    :return: (added homes, removed homes)
+    """
+    from jvirtualenv.scanner import load_search_pattern, scan_java_paths
+
+    with config_lock():
+        old_infos = load_known_infos()
+        stale_infos = [version_info for version_info in old_infos if _is_under(version_info['home'], changed_paths)]
+
+        java_paths = scan_java_paths(load_search_pattern(SEARCH_PATTERN_CONFIG_PATH), roots=changed_paths)
+        fresh_infos, failures = probe_version_infos(java_paths, PROBE_JOBS, PROBE_TIMEOUT, stale_infos)
+        report_probe_failures(failures)
+
+        fresh = OrderedDict((version_info['home'], version_info) for version_info in fresh_infos)
+        version_infos = []
+        for version_info in old_infos:
+            if version_info['home'] in fresh:
+                version_infos.append(fresh.pop(version_info['home']))  # keep the place of it
+            elif not _is_under(version_info['home'], changed_paths):
+                version_infos.append(version_info)
+        version_infos.extend(fresh.values())
+
+        json_dump(version_infos, unchanged_skipped=True)
+
+    old_homes = {version_info['home'] for version_info in old_infos}
+    new_homes = {version_info['home'] for version_info in version_infos}
+
+    return sorted(new_homes - old_homes), sorted(old_homes - new_homes)
+
+
+def watched_dirs():
+    """the search roots, the JDK homes with their bin and the directories between them"""
+    from jvirtualenv.scanner import load_search_pattern, search_roots
+
+    roots = search_roots(load_search_pattern(SEARCH_PATTERN_CONFIG_PATH))
+    dirs = set(roots)
+
+    for version_info in load_known_infos():
+        home = version_info['home']
+        dirs.update([home, os.path.join(home, 'bin')])
+
+        parent = os.path.dirname(home)
+        while parent not in dirs and os.path.dirname(parent) != parent and _is_under(parent, roots):
+            dirs.add(parent)
+            parent = os.path.dirname(parent)
+
+    return sorted(dirs)
+
+
+def _changed_path(dir_path, name, homes):
+    """changes inside a JDK home are changes of the home itself"""
+    for home in homes:
+        if dir_path in (home, os.path.join(home, 'bin')):
+            return home
+
+    return os.path.join(dir_path, name) if name else dir_path
+
+
+def handle_watch_events(events):
+    if events is None:  # some of them are lost
+        init_config()
+        color.print_ok('reinit config in %s' % TAG_LIST_CONFIG_PATH)
+        return
+
+    homes = [version_info['home'] for version_info in load_known_infos()]
+    changed_paths = sorted({_changed_path(dir_path, name, homes) for dir_path, name in events})
+
+    added, removed = update_config(changed_paths)
+    for home in added:
+        color.print_ok('add {0}'.format(home))
+    for home in removed:
+        color.print_warn('remove {0}'.format(home))
+    if not added and not removed:
+        color.print_info('update {0}'.format(', '.join(changed_paths)))
+
+
+def watch_config(debounce, interval):
+    from jvirtualenv import watcher
+
+    ensure_dir_exists(CONFIG_DIR)
+    if not has_config_file():
+        init_config()
+
+    color.print_ok('watching JDK for {0}'.format(TAG_LIST_CONFIG_PATH))
+    try:
+        watcher.watch(watched_dirs, handle_watch_events, debounce, interval)
+    except KeyboardInterrupt:
+        color.print_info('stop watching')
+
+
 def pretty_print_config(version_infos):
     color.print_info('-'*80)
     for version_info in version_infos:
@@ -233,6 +579,11 @@ def pretty_print_config(version_infos):
         color.print_info('version: {}'.format(version_info['version']))
         color.print_info('bit: {}'.format(version_info['bit']))
         color.print_info('home: {}'.format(version_info['home']))
+        for key in ('implementor', 'arch'):
+            if version_info.get(key):
+                color.print_info('{}: {}'.format(key, version_info[key]))
+        if is_stale(version_info):
+            color.print_warn('stale: the JDK changed since it was probed, run `jvirtualenv reinit-tag`')
         color.print_info()
         color.print_info('-'*80)
 
@@ -240,122 +591,792 @@ def pretty_print_config(version_infos):
         color.print_warn('empty')
 
 
+def open_catalog_index():
+    from jvirtualenv.catalog import CatalogIndex
+
+    return CatalogIndex(CATALOG_INDEX_PATH)
+
+
+def _match_fresh(tags):
+    """:return: ({tag: the newest version info matched which isn't stale or None}, {home: stale version info})"""
+    from jvirtualenv.catalog import fresh_match
+
+    results = OrderedDict()
+    stale = OrderedDict()
+    with trace.span('resolve', tags=len(tags)) as args:
+        try:
+            with open_catalog_index() as index:
+                index.sync(TAG_LIST_CONFIG_PATH, json_load)
+                for tag in tags:
+                    results[tag], stale_infos = fresh_match(index.best_match, tag)
+                    stale.update((stale_info['home'], stale_info) for stale_info in stale_infos)
+        except (sqlite3.Error, OSError) as ex:  # such as the global config directory is read-only
+            from jvirtualenv.catalog import best_match
+
+            args['fallback'] = repr(ex)
+            version_infos = get_config()
+            for tag in tags:
+                results[tag], stale_infos = fresh_match(partial(best_match, version_infos), tag)
+                stale.update((stale_info['home'], stale_info) for stale_info in stale_infos)
+        args['stale'] = len(stale)
+
+    return results, stale
+
+
+def find_versions(tags):
+    """
+    Resolve all the tags with one load of the catalog,
+    the JDK changed since they were probed are skipped, and probed again if the catalog is writable,
+    then the tags are resolved again with their new entries
+
+    :return: {tag: the newest version info matched or None}
+    """
+    from jvirtualenv.jdkinfo import forget_fingerprints
+
+    tags = list(OrderedDict.fromkeys(tags))
+
+    if not has_config_file():
+        get_config()
+
+    results, stale = _match_fresh(tags)
+    if not stale:
+        return results
+
+    try:
+        with trace.span('reprobe stale', jdk=len(stale)):
+            update_config(list(stale))
+    except OSError as ex:  # can't take the lock of the global config directory without sudo
+        for home in stale:
+            color.print_warn('skip {0}, it changed since `reinit-tag`: {1}'.format(home, ex))
+        return results
+
+    for home in stale:
+        color.print_warn('probe {0} again, it changed since `reinit-tag`'.format(home))
+    forget_fingerprints(stale)
+
+    return _match_fresh(tags)[0]
+
+
 def find_version(tag: str):
-    for version_info in get_config():
-        if version_info['tag'].startswith(tag):
-            return version_info
+    """the newest version whose tag matches"""
+    return find_versions([tag])[tag]
 
 
-def create_activate_s(virtual_env, java_home, java_tag):
-    if iswin():
-        from jvirtualenv.template.activate_template_bat import template
+def activate_values(virtual_env, java_home, java_tag, java_tool_options=(), jdk_java_options=(), build_cache=False):
+    """the values of the template placeholders, shared by every shell"""
+    from jvirtualenv import buildcache
 
-        global_class_path = os.environ.get('CLASSPATH', '')
-        if java_tag.startswith('1'):
-            class_path = '.;%JAVA_HOME%\\lib\\dt.jar;%JAVA_HOME%\\lib\\tools.jar'
-        else:
-            class_path = '.;%JAVA_HOME%\\lib\\jrt-fs.jar'
-        class_path = ';'.join([class_path, global_class_path])
-
-        funcs = [
-            partial(re.sub, '"__VIRTUAL_ENV__"', '"%s"' % virtual_env.encode('unicode_escape').decode()),
-            partial(re.sub, '"__JAVA_HOME__"', '"%s"' % java_home.encode('unicode_escape').decode()),
-            partial(re.sub, '"__JAVA_TAG__"', '"%s"' % java_tag),
-            partial(re.sub, '"__CLASSPATH__"', '"%s"' % class_path.encode('unicode_escape').decode())
-        ]
+    class_path = [class_path_for(java_home, java_tag)]
+    if global_class_path := os.environ.get('CLASSPATH'):
+        class_path.append(global_class_path)
+
+    return {
+        'VIRTUAL_ENV': virtual_env,
+        'ENV_NAME': os.path.basename(virtual_env),
+        'JAVA_HOME': java_home,
+        'JAVA_TAG': java_tag,
+        'CLASSPATH': os.pathsep.join(class_path),
+        'JAVA_TOOL_OPTIONS': ' '.join(java_tool_options),
+        'JDK_JAVA_OPTIONS': ' '.join(jdk_java_options),
+        'GRADLE_USER_HOME': buildcache.gradle_user_home(virtual_env) if build_cache else '',
+        'MAVEN_OPTS': ' '.join(buildcache.maven_options(virtual_env)) if build_cache else '',
+    }
+
+
+def create_activate_s(virtual_env, java_home, java_tag, shell=None):
+    """render the activate script of shell, default to bat on Windows and sh (bash, zsh, POSIX sh) on others"""
+    from jvirtualenv.template.engine import get_template
+
+    if shell is None:
+        shell = 'cmd' if iswin() else 'sh'
+
+    return get_template(shell).render(activate_values(virtual_env, java_home, java_tag))
+
+
+def _jdk_executables(java_home):
+    bin_dir = os.path.join(java_home, 'bin')
+
+    try:
+        entries = list(os.scandir(bin_dir))
+    except OSError:
+        return []
+
+    if iswin():
+        return sorted(entry.name for entry in entries if entry.name.lower().endswith('.exe') and entry.is_file())
     else:
-        from jvirtualenv.template.activate_template import template
+        return sorted(entry.name for entry in entries if entry.is_file() and os.access(entry.path, os.X_OK))
+
+
+def _is_shim(path):
+    from jvirtualenv.template.engine import SHIM_MARKER
+
+    try:
+        with open(path, 'r', errors='ignore') as f:
+            return SHIM_MARKER in f.read(256)
+    except OSError:
+        return False
+
+
+def write_shims(activate_dir, java_home, java_tool_options=(), jdk_java_options=()):
+    """
+    Write a launcher for every executable of the JDK, which execs it with JAVA_HOME set,
+    the launchers of another JDK written before are removed.
+
+    :return: list of the shim paths
+    """
+    from jvirtualenv.template.engine import get_shim_template, shim_file_name
+
+    kind = 'cmd' if iswin() else 'sh'
+    template = get_shim_template(kind)
+
+    paths = []
+    for name in _jdk_executables(java_home):
+        shim_path = os.path.join(activate_dir, shim_file_name(kind, name))
+        values = {
+            'JAVA_HOME': java_home,
+            'EXECUTABLE': os.path.join(java_home, 'bin', name),
+            'JAVA_TOOL_OPTIONS': ' '.join(java_tool_options),
+            'JDK_JAVA_OPTIONS': ' '.join(jdk_java_options),
+        }
+        atomic_write(shim_path, template.render(values), mode=0o755)
+        paths.append(shim_path)
+
+    remove_shims(activate_dir, keep=paths)
+
+    return paths
+
+
+def remove_shims(activate_dir, keep=()):
+    """remove the launchers written by write_shims, but the ones of keep"""
+    for entry in os.scandir(activate_dir):
+        if entry.path not in keep and entry.is_file() and _is_shim(entry.path):
+            os.unlink(entry.path)
 
-        global_class_path = os.environ.get('CLASSPATH', '')
-        if java_tag.startswith('1'):
-            class_path = '.:$JAVA_HOME/lib/dt.jar:$JAVA_HOME/lib/tools.jar'
-        else:
-            class_path = '.:$JAVA_HOME/lib/jrt-fs.jar'
-        class_path = ':'.join([class_path, global_class_path])
 
-        funcs = [
-            partial(re.sub, '"__VIRTUAL_ENV__"', '"%s"' % virtual_env),
-            partial(re.sub, '"__JAVA_HOME__"', '"%s"' % java_home),
-            partial(re.sub, '"__JAVA_TAG__"', '"%s"' % java_tag),
-            partial(re.sub, '"__CLASSPATH__"', '"%s"' % class_path)
-        ]
+# set by the activation only if the env has a value of them, see activate_values
+ENV_ONLY_VARIABLES = ('JAVA_TOOL_OPTIONS', 'JDK_JAVA_OPTIONS', 'GRADLE_USER_HOME', 'MAVEN_OPTS')
+DEACTIVATE_BAT_NAME = 'deactivate.bat'
 
-    return chain_apply(funcs, template)
 
+def read_env_config(virtual_env):
+    """
+    The settings the java virtual env was created with, see create_env
 
-def write_activate_file(virtual_env, java_home, java_tag, force=False):
+    raise NotJavaVirtualEnvError
+    """
+    try:
+        with open(os.path.join(virtual_env, ENV_CONFIG_NAME), 'r') as f:
+            return json.load(f, object_pairs_hook=OrderedDict)
+    except (OSError, ValueError) as ex:
+        raise NotJavaVirtualEnvError(virtual_env) from ex
+
+
+def env_java_options(virtual_env, java_home, profile=None, version_info=None):
+    """
+    The JVM options of the java virtual env, the class data sharing archive in it and the tuning profile
+
+    :param version_info: the JDK probed already, it's probed for the profile if it's None
+    :return: (options of JAVA_TOOL_OPTIONS, options of JDK_JAVA_OPTIONS)
+    raise UnknownProfileError, NotBelongToJDKError, GetJavaVersionFailedError
+    """
+    from jvirtualenv import cds
+
+    java_tool_options = cds.java_tool_options(virtual_env, java_home)
+    jdk_java_options = []
+
+    if profile:
+        from jvirtualenv import tuning
+
+        if version_info is None:
+            version_info = _build_version_info(java_executable(java_home), PROBE_TIMEOUT)
+        tool_options, jdk_java_options = tuning.profile_options(
+            parse_version(version_info['version']), version_info['bit'], profile, tuning.read_limits())
+        java_tool_options += tool_options
+
+    return java_tool_options, jdk_java_options
+
+
+def create_env(virtual_env, java_home, java_tag, force=False, shims=False, profile=None, build_cache=False,
+               version_info=None):
+    """
+    Write the activate files of every shell of the platform, and the shims of the JDK executables if shims,
+    each one is written atomically, and the settings of the env to jvirtualenv.json, so it can be written again
+
+    :param version_info: the JDK probed already, see env_java_options
+    :return: list of the written file paths, the main activate file is the first one
+    raise ProjectExistsError, DirectoryConflictError, UnknownProfileError,
+          NotBelongToJDKError, GetJavaVersionFailedError (a profile with a JDK gone)
+    """
     virtual_env = os.path.abspath(virtual_env)
 
+    with trace.span(virtual_env, cat='env', tag=java_tag):
+        return _create_env(virtual_env, java_home, java_tag, force, shims, profile, build_cache, version_info)
+
+
+def _create_env(virtual_env, java_home, java_tag, force, shims, profile, build_cache, version_info):
+    from jvirtualenv.template.engine import get_template, activate_file_name, POSIX_SHELLS, WINDOWS_SHELLS
+
     if os.path.lexists(virtual_env) and not force:
-        color.print_warn('project diretory %s exists already\n'
-                         'you can use -f argument to continue.' % virtual_env)
-        return
+        raise ProjectExistsError(virtual_env)
+
+    java_tool_options, jdk_java_options = env_java_options(virtual_env, java_home, profile, version_info)
 
     ensure_dir_exists(virtual_env)
 
     activate_dir = os.path.join(virtual_env, 'bin')
     ensure_dir_exists(os.path.join(activate_dir))
 
+    if build_cache:
+        from jvirtualenv import buildcache
+
+        buildcache.register(os.path.join(CONFIG_DIR, buildcache.STORE_DIR_NAME), virtual_env)
+
+    values = activate_values(virtual_env, java_home, java_tag, java_tool_options, jdk_java_options, build_cache)
+    paths = []
+    for shell in (WINDOWS_SHELLS if iswin() else POSIX_SHELLS):
+        activate_path = os.path.join(activate_dir, activate_file_name(shell))
+        atomic_write(activate_path, get_template(shell).render(values))
+        paths.append(activate_path)
+
     if iswin():
-        activate_path = os.path.join(activate_dir, 'activate.bat')
-        deactivate_path = os.path.join(activate_dir, 'deactivate.bat')
+        from jvirtualenv.template.deactivate_template_bat import template
 
-        with open(activate_path, 'w') as fw_activate, open(deactivate_path, 'w') as fw_deactivate:
-            fw_activate.write(create_activate_s(virtual_env, java_home, java_tag))
+        deactivate_path = os.path.join(activate_dir, DEACTIVATE_BAT_NAME)
+        atomic_write(deactivate_path, template)
+        paths.append(deactivate_path)
 
-            from jvirtualenv.template.deactivate_template_bat import template
-            fw_deactivate.write(template)
+    if shims:
+        paths.extend(write_shims(activate_dir, java_home, java_tool_options, jdk_java_options))
+    else:  # the ones of the env created before with --shims would run its old JDK
+        remove_shims(activate_dir)
 
-        color.print_info('create active file {0}'.format(activate_path))
-        color.print_info('run "{0}" to activate it'.format(activate_path))
-        color.print_info('run "{0}" to deactivate it'.format(deactivate_path))
+    atomic_write(os.path.join(virtual_env, ENV_CONFIG_NAME), json.dumps(OrderedDict([
+        ('java_home', java_home),
+        ('java_tag', java_tag),
+        ('shims', shims),
+        ('profile', profile),
+        ('build_cache', build_cache),
+        # the variables only the env sets, so what the activation did can be taken off, see jvirtualenv.matrix
+        ('environment', OrderedDict((name, values[name]) for name in ENV_ONLY_VARIABLES)),
+    ]), indent=4))
+
+    return paths
+
+
+def build_cds(virtual_env, train=None, rebuild=False):
+    """
+    Build the class data sharing archive of the env if the JDK changed since the last time,
+    train is the one of the last time if it's None, and write the activate files with it
+
+    :return: archive path, None if it's fresh
+    raise NotJavaVirtualEnvError, CDSUnsupportedError, CDSBuildError
+    """
+    from jvirtualenv import cds
+    from jvirtualenv.api import environment_of
+
+    virtual_env = os.path.abspath(virtual_env)
+    config = read_env_config(virtual_env)
+    java_home, java_tag = config['java_home'], config['java_tag']
+
+    if train is None:
+        train = (cds.read_meta(virtual_env) or {}).get('train')
 
+    if not rebuild and cds.is_fresh(virtual_env, java_home, train):
+        return None
+
+    try:
+        version_info = _build_version_info(java_executable(java_home), PROBE_TIMEOUT)
+    except (NotBelongToJDKError, GetJavaVersionFailedError) as ex:
+        raise cds.CDSBuildError('{0} is not a JDK any more, create the env again'.format(java_home)) from ex
+    version = parse_version(version_info['version'])
+
+    with trace.span('build cds', version=version.text, train=train):
+        path = cds.build_archive(virtual_env, java_home, version, environment_of(java_home, java_tag), train)
+
+    create_env(virtual_env, java_home, java_tag, force=True, shims=config.get('shims', False),
+               profile=config.get('profile'), build_cache=config.get('build_cache', False), version_info=version_info)
+
+    return path
+
+
+def report_build_cds(virtual_env, train=None, rebuild=False):
+    from jvirtualenv import cds
+
+    try:
+        path = build_cds(virtual_env, train, rebuild)
+    except cds.CDSUnsupportedError as ex:
+        color.print_warn('skip class data sharing, it needs JDK {0}+ but it is {1}'.format(
+            cds.MIN_DYNAMIC_FEATURE if train else cds.MIN_STATIC_FEATURE, ex.args[0]))
+    except cds.CDSBuildError as ex:
+        color.print_err('build class data sharing archive failed: {0}'.format(ex.args[0]))
+    except NotJavaVirtualEnvError as ex:
+        color.print_err('{0} is not a java virtual env created by this version, create it again with -f'.format(
+            ex.args[0]))
     else:
-        activate_path = os.path.join(activate_dir, 'activate')
+        if path is None:
+            color.print_info('class data sharing archive is up to date')
+        else:
+            color.print_ok('build class data sharing archive {0}'.format(path))
+
+
+def tune_env(virtual_env, profile=None):
+    """
+    Write the JVM options of the profile fitting the current limits of the container into the env,
+    profile is the one of the env if it's None, `none` removes it
+
+    :return: (profile, JAVA_TOOL_OPTIONS of the env, JDK_JAVA_OPTIONS of the env)
+    raise NotJavaVirtualEnvError, UnknownProfileError, NotBelongToJDKError, GetJavaVersionFailedError
+    """
+    virtual_env = os.path.abspath(virtual_env)
+    config = read_env_config(virtual_env)
+    java_home, java_tag = config['java_home'], config['java_tag']
+
+    if profile is None:
+        profile = config.get('profile')
+    elif profile == 'none':
+        profile = None
+
+    create_env(virtual_env, java_home, java_tag, force=True, shims=config.get('shims', False), profile=profile,
+               build_cache=config.get('build_cache', False))
+    environment = read_env_config(virtual_env)['environment']  # written by create_env, the JDK isn't probed again
+
+    return profile, environment['JAVA_TOOL_OPTIONS'], environment['JDK_JAVA_OPTIONS']
+
+
+def report_tune_env(virtual_env, profile=None):
+    try:
+        profile, java_tool_options, jdk_java_options = tune_env(virtual_env, profile)
+    except NotJavaVirtualEnvError as ex:
+        color.print_err('{0} is not a java virtual env created by this version, create it again with -f'.format(
+            ex.args[0]))
+    except (NotBelongToJDKError, GetJavaVersionFailedError):
+        color.print_err('the JDK of {0} is not a JDK any more, create the env again'.format(virtual_env))
+    else:
+        if profile is None:
+            color.print_info('remove the tuning profile of {0}'.format(virtual_env))
+        else:
+            color.print_ok('tune {0} with profile {1}'.format(virtual_env, profile))
+            color.print_info('JAVA_TOOL_OPTIONS: {0}'.format(java_tool_options))
+            color.print_info('JDK_JAVA_OPTIONS: {0}'.format(jdk_java_options))
+
+
+def register_installed(homes):
+    """
+    Add the installed JDK to the catalog without scanning, the catalog is made by a full scan if there isn't
+
+    :return: version infos of the homes
+    raise NotBelongToJDKError, GetJavaVersionFailedError
+    """
+    with config_lock():
+        if not has_config_file():
+            _init_config()
+            version_infos = json_load()
+        else:
+            version_infos = [version_info for version_info in load_known_infos() if version_info['home'] not in homes]
+            version_infos.extend(_build_version_info(java_executable(home), PROBE_TIMEOUT) for home in homes)
+            json_dump(version_infos)
+
+    return [version_info for version_info in version_infos if version_info['home'] in homes]
+
+
+def unregister_installed(home):
+    with config_lock():
+        json_dump([version_info for version_info in load_known_infos() if version_info['home'] != home])
+
+
+def install_jdks(archives):
+    """:return: failed or not"""
+    from tarfile import TarError
+    from zipfile import BadZipFile
+    from jvirtualenv import jdkstore
+
+    failed = False
+    for archive in archives:
+        with trace.span('install ' + archive, cat='install') as args:
+            try:
+                home, stats = jdkstore.install(archive, jdk_store_dir(), PROBE_JOBS)
+            except jdkstore.UnsupportedArchiveError as ex:
+                color.print_err('{0} is not a .tar.gz, .tgz, .tar.xz or .zip archive'.format(ex.args[0]))
+            except jdkstore.UnsafeArchiveError as ex:
+                color.print_err('{0}: refuse to extract {1}, it is out of the archive directory'.format(
+                    archive, ex.args[0]))
+            except jdkstore.NotJDKArchiveError as ex:
+                color.print_err('no JDK in {0}'.format(ex.args[0]))
+            except jdkstore.JDKExistsError as ex:
+                color.print_warn('{0} is installed already in {1}'.format(archive, ex.args[0]))
+            except (OSError, EOFError, TarError, BadZipFile) as ex:
+                color.print_err('extract {0} failed: {1!r}'.format(archive, ex))
+            else:
+                try:
+                    version_info, = register_installed([home])
+                except (NotBelongToJDKError, GetJavaVersionFailedError) as ex:
+                    jdkstore.uninstall(home, jdk_store_dir())
+                    color.print_err('{0} is not a JDK of this box, it is removed: {1!r}'.format(
+                        archive, ex.__cause__ or ex))
+                else:
+                    args['tag'] = version_info['tag']
+                    color.print_ok('install {0} {1}'.format(version_info['tag'], home))
+                    color.print_info('{0} files of {1}, {2} of them ({3}) linked to the installed JDK'.format(
+                        stats.files, format_size(stats.bytes), stats.linked, format_size(stats.linked_bytes)))
+                    continue
+
+            args['status'] = 'error'
+            failed = True
+
+    return failed
+
+
+def uninstall_jdk(tag):
+    """:return: failed or not"""
+    from jvirtualenv import jdkstore
+    from jvirtualenv.catalog import best_match
+
+    store_dir = jdk_store_dir()
+    installed_infos = [version_info for version_info in get_config()
+                       if jdkstore.is_installed(version_info['home'], store_dir)]
+    version_info = next((version_info for version_info in installed_infos
+                         if os.path.relpath(version_info['home'], store_dir).split(os.sep)[0] == tag), None) \
+        or best_match(installed_infos, tag)
+    if version_info is None:
+        color.print_err('no installed JDK matches {0}'.format(tag))
+        return True
+
+    try:
+        top = jdkstore.uninstall(version_info['home'], store_dir)
+    except jdkstore.NotInstalledError as ex:
+        unregister_installed(version_info['home'])  # a stale entry, its directory was removed by hand
+        color.print_err('{0} is not in the store any more, remove it from the catalog'.format(ex.args[0]))
+        return True
+    unregister_installed(version_info['home'])  # it's renamed away already, no env resolves it from now on
+    removed, reclaimed_bytes, _ = jdkstore.gc(store_dir)
+    color.print_ok('uninstall {0} {1}, {2} reclaimed'.format(version_info['tag'], top, format_size(reclaimed_bytes)))
+
+    return False
+
+
+def report_gc():
+    from jvirtualenv import jdkstore
+
+    removed, reclaimed_bytes, removed_dirs = jdkstore.gc(jdk_store_dir())
+    color.print_ok('remove {0} files of the store and {1} left directories, {2} reclaimed'.format(
+        removed, removed_dirs, format_size(reclaimed_bytes)))
+
+
+def format_size(n):
+    """
+    >>> format_size(1536), format_size(3 << 30)
+    ('1.5 KiB', '3.0 GiB')
+    """
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if n < 1024 or unit == 'GiB':
+            return '{0} {1}'.format(n, unit) if unit == 'B' else '{0:.1f} {1}'.format(n, unit)
+        n /= 1024
+
+
+def report_dedup_build_cache(dry_run=False):
+    from jvirtualenv import buildcache
+
+    report = buildcache.dedup(os.path.join(CONFIG_DIR, buildcache.STORE_DIR_NAME), PROBE_JOBS, dry_run)
+    would = 'would be ' if dry_run else ''
+
+    color.print_info('{0} artifacts in the build caches of {1} envs'.format(report.files, report.envs))
+    color.print_info('{0} artifacts {1}linked to the store, {2} on another file system are skipped'.format(
+        report.linked, would, report.skipped))
+    color.print_info('{0} files {1}removed from the store, {2} {1}reclaimed'.format(
+        report.removed, would, format_size(report.reclaimed_bytes)))
+    color.print_ok('the store keeps {0} files of {1}, shared by {2} of the build caches, {3} saved'.format(
+        report.store_files, format_size(report.store_bytes), format_size(report.shared_bytes),
+        format_size(report.shared_bytes - report.store_bytes)))
+
+
+def write_activate_file(virtual_env, java_home, java_tag, force=False, shims=False, cds=False, train=None,
+                        profile=None, build_cache=False):
+    try:
+        paths = create_env(virtual_env, java_home, java_tag, force, shims, profile, build_cache)
+    except ProjectExistsError as ex:
+        color.print_warn('project diretory %s exists already\n'
+                         'you can use -f argument to continue.' % ex.args[0])
+        return
+    except (NotBelongToJDKError, GetJavaVersionFailedError):
+        color.print_err('{0} is not a JDK any more, run `jvirtualenv reinit-tag`'.format(java_home))
+        return
 
-        with open(activate_path, 'w') as fw:
-            fw.write(create_activate_s(virtual_env, java_home, java_tag))
+    activate_path = paths[0]
+    color.print_info('create active file {0}'.format(activate_path))
 
-        color.print_info('create active file {0}'.format(activate_path))
+    if iswin():
+        deactivate_path = os.path.join(os.path.dirname(activate_path), DEACTIVATE_BAT_NAME)
+        color.print_info('run "{0}" to activate it'.format(activate_path))
+        color.print_info('run "{0}" to deactivate it'.format(deactivate_path))
+    else:
         color.print_info('run `source {0}` to activate it'.format(path_to(os.curdir, activate_path)))
+        color.print_info('(`source {0}.fish` for fish, `. {0}.ps1` for pwsh)'.format(path_to(os.curdir, activate_path)))
+
+    if shims:
+        color.print_info('or run {0} directly without activation'.format(
+            path_to(os.curdir, os.path.join(os.path.dirname(activate_path), 'java'))))
+
+    if profile:
+        environment = read_env_config(os.path.abspath(virtual_env))['environment']  # the JDK isn't probed again
+        color.print_info('tuning profile {0}: {1}'.format(profile, ' '.join(filter(None, [
+            environment['JAVA_TOOL_OPTIONS'], environment['JDK_JAVA_OPTIONS']]))))
+
+    if cds or train:
+        report_build_cds(virtual_env, train, rebuild=True)
+
+
+def read_manifest(manifest):
+    """
+    Lines of `<project> <tag>`, the project path may contain spaces,
+    blank lines and lines starting with `#` are skipped.
+
+    :return: (list of (project, tag), list of (line, reason))
+    """
+    entries = []
+    failures = []
+
+    f = sys.stdin if manifest == '-' else open(manifest, 'r')
+    try:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            fields = line.rsplit(None, 1)
+            if len(fields) != 2:
+                failures.append(('line {0}: {1}'.format(lineno, line), 'expect `<project> <tag>`'))
+                continue
+
+            try:
+                if is_constraint(fields[1]):
+                    parse_constraint(fields[1])
+            except InvalidConstraintError:
+                failures.append((fields[0], 'invalid version constraint {0}'.format(fields[1])))
+            else:
+                entries.append((fields[0], fields[1]))
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+    return entries, failures
+
+
+def _create_env_or_failure(entry, version_infos, force, shims):
+    project, tag = entry
+    version_info = version_infos[tag]
+    if version_info is None:
+        return 'no matched tag {0}'.format(tag)
+
+    try:
+        create_env(project, version_info['home'], version_info['tag'], force, shims)
+    except ProjectExistsError:
+        return 'exists already, use -f to continue'
+    except DirectoryConflictError as ex:
+        return 'directory {0} conflict'.format(ex.args[0])
+    except OSError as ex:
+        return repr(ex)
+
 
+def create_many(manifest, force=False, jobs=None, shims=False):
+    """:return: list of (project, reason) failed"""
+    from concurrent.futures import ThreadPoolExecutor
 
+    try:
+        entries, failures = read_manifest(manifest)
+    except OSError as ex:  # such as it doesn't exist
+        color.print_err('can not read manifest {0}: {1}'.format(manifest, ex.strerror or ex))
+        return [(manifest, ex.strerror or str(ex))]
+
+    version_infos = find_versions(tag for _, tag in entries)
+
+    with trace.span('create envs', envs=len(entries)), ThreadPoolExecutor(max_workers=jobs or None) as executor:
+        reasons = executor.map(partial(_create_env_or_failure,
+                                       version_infos=version_infos, force=force, shims=shims), entries)
+
+        created = 0
+        for (project, _), reason in zip(entries, reasons):
+            if reason is None:
+                created += 1
+            else:
+                failures.append((project, reason))
+
+    color.print_ok('created {0} of {1} java virtual env'.format(created, created + len(failures)))
+    for project, reason in failures:
+        color.print_err('{0}: {1}'.format(project, reason))
+
+    return failures
+
+
+def print_trace_summary(trace_path):
+    phase_rows, slowest_rows = trace.summary()
+
+    color.print_info('-'*80)
+    color.print_info('{0:<8} {1:<40} {2:>6} {3:>10} {4:>10}'.format('cat', 'name', 'count', 'total ms', 'max ms'))
+    for cat, name, count, total, longest in phase_rows:
+        color.print_info('{0:<8} {1:<40} {2:>6} {3:>10.1f} {4:>10.1f}'.format(cat, name, count, total, longest))
+
+    if slowest_rows:
+        color.print_info('-'*80)
+        color.print_info('slowest:')
+        for name, ms, status in slowest_rows:
+            print_line = color.print_info if status in ('ok', 'reused') else color.print_warn
+            print_line('{0:>10.1f} ms  {1:<10} {2}'.format(ms, status, name))
+
+    color.print_info('-'*80)
+    color.print_ok('write trace to {0}'.format(trace_path))
+
+
+def serve_catalog(socket_path=None):
+    """:return: False if it can't serve"""
+    from jvirtualenv import server
+
+    get_config()  # init the catalog before the first request
+    try:
+        resolver = server.make_server(CONFIG_DIR, socket_path)
+    except server.ServerRunningError as ex:
+        color.print_err('a server is already running on {0}'.format(ex.args[0]))
+        return False
+    except server.UnixSocketUnsupportedError as ex:
+        color.print_err(str(ex))
+        return False
+
+    color.print_ok('serve on {0}'.format(resolver.server_address))
+    try:
+        server.serve(resolver)
+    except KeyboardInterrupt:
+        pass
+
+    return True
+
+
+def exec_matrix(tags_text, command, jobs=None):
+    """:return: exit status, it doesn't return if there is only one tag"""
+    from jvirtualenv import matrix
+
+    tags = list(OrderedDict.fromkeys(matrix.split_tags(tags_text)))
+    version_infos = find_versions(tags)
+
+    unmatched = [tag for tag in tags if version_infos[tag] is None]
+    if not tags or unmatched:
+        color.print_err('No matched tag {0}'.format(', '.join(unmatched or [tags_text])))
+        return 1
+
+    entries = [(tag, matrix.jdk_environ(version_infos[tag]['home'], version_infos[tag]['tag'])) for tag in tags]
+    if len(entries) == 1:
+        try:
+            matrix.exec_command(command, entries[0][1])
+        except OSError as ex:
+            color.print_err('{0}: {1}'.format(command[0], ex.strerror))
+            return 127
+
+    results = matrix.run_matrix(entries, command, jobs)
+
+    color.print_info('-'*80)
+    for result in results:
+        print_line = color.print_ok if result.returncode == 0 else color.print_err
+        print_line('{0:<16} {1:<16} exit {2:<4} {3:>8.1f}s'.format(
+            result.label, version_infos[result.label]['tag'], result.returncode, result.seconds))
+
+    return matrix.aggregate_status(results)
+
+
+def handle_invalid_constraint(ex):
+    color.print_err('invalid version constraint %s, such as `>=11,<17` or `17.0.*`' % ex.args[0])
+
+
+def handle_unknown_profile(ex):
+    color.print_err('unknown tuning profile %s, it should be one of %s' % (ex.args[0], ', '.join(PROFILES)))
+
+
+@handle_excpetion(handle_unknown_profile, UnknownProfileError)
+@handle_excpetion(handle_invalid_constraint, InvalidConstraintError)
 @handle_excpetion(handle_directory_conflict, DirectoryConflictError)
 def cli():
     global GLOBAL_MODE
     global CONFIG_DIR
     global TAG_LIST_CONFIG_PATH
     global SEARCH_PATTERN_CONFIG_PATH
+    global CATALOG_INDEX_PATH
+    global HOOK_LOOKUP_PATH
+    global PROBE_JOBS
+    global PROBE_TIMEOUT
+
+    from docopt import docopt
 
     arguments = docopt(__doc__, version=__version__)
 
     GLOBAL_MODE = bool(arguments['--global'])
+    PROBE_JOBS = int(arguments['--jobs'])
+    PROBE_TIMEOUT = float(arguments['--timeout'])
 
-    if GLOBAL_MODE:
-        if iswin():
-            CONFIG_DIR = os.path.join(os.path.dirname(get_home_dir()), 'All Users', '.jvirtualenv.d')
-        else:
-            CONFIG_DIR = '/etc/jvirtualenv.d'
+    CONFIG_DIR = default_config_dir(GLOBAL_MODE)
 
+    TAG_LIST_CONFIG_PATH = os.path.join(CONFIG_DIR, TAG_LIST_FILE_NAME)
+    SEARCH_PATTERN_CONFIG_PATH = os.path.join(CONFIG_DIR, 'search-pattern.json')
+    CATALOG_INDEX_PATH = os.path.join(CONFIG_DIR, 'catalog.sqlite3')
+    HOOK_LOOKUP_PATH = os.path.join(CONFIG_DIR, 'java-homes.sh')
+
+    if trace_path := arguments['--trace']:
+        trace.start()
+        try:
+            run(arguments)
+        finally:
+            trace.dump(trace_path)
+            print_trace_summary(trace_path)
     else:
-        CONFIG_DIR = os.path.join(get_home_dir(), '.jvirtualenv.d')
+        run(arguments)
 
-    TAG_LIST_CONFIG_PATH = os.path.join(CONFIG_DIR, 'tag-list.json')
-    SEARCH_PATTERN_CONFIG_PATH = os.path.join(CONFIG_DIR, 'search-pattern.json')
 
+def run(arguments):
     if arguments['list-tag']:
         pretty_print_config(get_config())
 
     elif arguments['reinit-tag']:
-        if not iswin():
-            with sh.contrib.sudo:
-                color.print_normal("updatedb...")
-                sh.updatedb()
-
-        init_config()
+        init_config(bool(arguments['--full']))
         color.print_ok('reinit config in %s' % TAG_LIST_CONFIG_PATH)
         pretty_print_config(get_config())
 
+    elif arguments['create-many']:
+        if create_many(arguments['<manifest>'], bool(arguments['--force']), PROBE_JOBS, bool(arguments['--shims'])):
+            sys.exit(1)
+
+    elif arguments['hook']:
+        from jvirtualenv.hook import write_lookup, create_hook_s
+
+        if not os.path.exists(HOOK_LOOKUP_PATH):
+            write_lookup(HOOK_LOOKUP_PATH, get_config())
+        print(create_hook_s(HOOK_LOOKUP_PATH))
+
+    elif arguments['cds']:
+        report_build_cds(arguments['<project>'], arguments['--train'], bool(arguments['--rebuild']))
+
+    elif arguments['install']:
+        if install_jdks(arguments['<archive>']):
+            sys.exit(1)
+
+    elif arguments['uninstall']:
+        if uninstall_jdk(arguments['<tag>']):
+            sys.exit(1)
+
+    elif arguments['gc']:
+        report_gc()
+
+    elif arguments['serve']:
+        if not serve_catalog(arguments['--socket']):
+            sys.exit(1)
+
+    elif arguments['exec']:
+        sys.exit(exec_matrix(arguments['--java'], arguments['<command>'], PROBE_JOBS))
+
+    elif arguments['build-cache']:
+        report_dedup_build_cache(bool(arguments['--dry-run']))
+
+    elif arguments['tune']:
+        report_tune_env(arguments['<project>'], arguments['--profile'])
+
+    elif arguments['watch']:
+        watch_config(float(arguments['--debounce']), float(arguments['--interval']))
+
     elif arguments['--java']:
         version_info = find_version(arguments['--java'])
         if version_info is None:
@@ -363,7 +1384,9 @@ def cli():
             return
 
         project_path = arguments['<project>']
-        write_activate_file(project_path, version_info['home'], version_info['tag'], bool(arguments['--force']))
+        write_activate_file(project_path, version_info['home'], version_info['tag'], bool(arguments['--force']),
+                            bool(arguments['--shims']), bool(arguments['--cds']), arguments['--train'],
+                            arguments['--profile'], bool(arguments['--build-cache']))
 
 
 if __name__ == '__main__':
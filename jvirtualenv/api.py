@@ -0,0 +1,174 @@
+# -*- coding:utf-8 -*-
+"""In-process API to resolve JDK from the catalog built by `jvirtualenv reinit-tag`
+
+    >>> from jvirtualenv import api
+    >>> api.resolve('17')['home']                                  # doctest: +SKIP
+    '/opt/java/jdk-17.0.9'
+    >>> subprocess.run(cmd, env=api.environment_for('17'))       # doctest: +SKIP
+
+Every function takes an explicit config_dir, default to the one of the user (`~/.jvirtualenv.d`).
+The parsed catalog is kept in memory and parsed again only when tag-list.json changes,
+so they are cheap enough to be called for every build step. Nothing heavy is imported,
+and no JDK discovery is run, use the CLI for that.
+"""
+
+import os
+import json
+from collections import OrderedDict
+
+from jvirtualenv.support.minghu6_support import get_home_dir, iswin
+
+
+TAG_LIST_FILE_NAME = 'tag-list.json'
+ENV_CONFIG_NAME = 'jvirtualenv.json'  # the settings of a java virtual env
+JAVA_VERSION_FILE_NAME = '.java-version'
+
+# config_dir: (signature of tag-list.json, version infos, {tag: resolved version info})
+_CACHE = {}
+
+
+class NoMatchedTagError(LookupError):
+    """The first arg of the exception should be the tag"""
+    pass
+
+
+def default_config_dir(global_mode=False):
+    if global_mode:
+        if iswin():
+            return os.path.join(os.path.dirname(get_home_dir()), 'All Users', '.jvirtualenv.d')
+        else:
+            return '/etc/jvirtualenv.d'
+    else:
+        return os.path.join(get_home_dir(), '.jvirtualenv.d')
+
+
+def _signature(path):
+    st = os.stat(path)  # raise FileNotFoundError
+    return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _load(config_dir):
+    config_dir = config_dir or default_config_dir()
+    tag_list_path = os.path.join(config_dir, TAG_LIST_FILE_NAME)
+
+    try:
+        signature = _signature(tag_list_path)
+    except FileNotFoundError as ex:
+        raise FileNotFoundError('no catalog in {0}, run `jvirtualenv reinit-tag` first'.format(config_dir)) from ex
+
+    cached = _CACHE.get(config_dir)
+    if cached is None or cached[0] != signature:
+        with open(tag_list_path, 'r') as f:
+            version_infos = json.load(f, object_pairs_hook=OrderedDict)
+        cached = _CACHE[config_dir] = (signature, version_infos, {})
+
+    return cached
+
+
+def list_jdks(config_dir=None):
+    """:return: list of version info, such as {'tag': ..., 'version': ..., 'bit': ..., 'home': ...}"""
+    return list(_load(config_dir)[1])
+
+
+def resolve(tag, config_dir=None):
+    """
+    :param tag: a tag prefix such as `17` and `1.8`, or a version constraint such as `>=11,<17` and `17.0.*`
+    :return: version info of the newest JDK matching the tag, None if there isn't,
+             the JDK changed since `reinit-tag` are skipped, see jvirtualenv.jdkinfo.is_stale
+    raise InvalidConstraintError
+    """
+    _, version_infos, resolved = _load(config_dir)
+
+    if tag not in resolved or _is_stale(resolved[tag]):
+        from functools import partial
+        from jvirtualenv.catalog import best_match, fresh_match
+
+        resolved[tag] = fresh_match(partial(best_match, version_infos), tag)[0]
+
+    return resolved[tag]
+
+
+def _is_stale(version_info):
+    from jvirtualenv.jdkinfo import is_stale
+
+    return version_info is not None and is_stale(version_info)
+
+
+def _lookup(version_infos, version):
+    """the newest JDK of which `jvirtualenv hook` would take the .java-version content as a name"""
+    from jvirtualenv.hook import lookup_keys
+    from jvirtualenv.catalog import newest_first
+
+    return next((version_info for version_info in newest_first(version_infos)
+                 if version in lookup_keys(version_info) and not _is_stale(version_info)), None)
+
+
+def resolve_project(directory, config_dir=None):
+    """
+    The JDK of the project directory, the one of the java virtual env it's in,
+    or the one named by the nearest .java-version, matched the same way as `jvirtualenv hook`
+
+    :return: version info, None if there isn't
+    raise InvalidConstraintError
+    """
+    _, version_infos, resolved = _load(config_dir)
+
+    directory = os.path.abspath(directory)
+    while True:
+        env_config_path = os.path.join(directory, ENV_CONFIG_NAME)
+        if os.path.isfile(env_config_path):
+            with open(env_config_path, 'r') as f:
+                env_config = json.load(f)
+            return next((version_info for version_info in version_infos
+                         if version_info['home'] == env_config['java_home']),
+                        OrderedDict([('tag', env_config['java_tag']), ('home', env_config['java_home'])]))
+
+        version_file_path = os.path.join(directory, JAVA_VERSION_FILE_NAME)
+        if os.path.isfile(version_file_path):
+            with open(version_file_path, 'r') as f:
+                version = f.readline().strip()
+            key = JAVA_VERSION_FILE_NAME + ':' + version
+            if key not in resolved or _is_stale(resolved[key]):
+                resolved[key] = _lookup(version_infos, version) or (resolve(version, config_dir) if version else None)
+            return resolved[key]
+
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def class_path_for(java_home, java_tag):
+    if java_tag.split(':')[0] == '1':  # 1.x, not 11 or 17
+        jars = ['dt.jar', 'tools.jar']
+    else:
+        jars = ['jrt-fs.jar']
+
+    return os.pathsep.join([os.curdir] + [os.path.join(java_home, 'lib', jar) for jar in jars])
+
+
+def environment_for(tag, config_dir=None, base_env=None):
+    """
+    The environment variables the same as `source bin/activate` of a java virtual env of the tag
+
+    :param base_env: default to os.environ, it isn't changed
+    :return: new dict
+    raise NoMatchedTagError
+    """
+    version_info = resolve(tag, config_dir)
+    if version_info is None:
+        raise NoMatchedTagError(tag)
+
+    return environment_of(version_info['home'], version_info['tag'], base_env)
+
+
+def environment_of(java_home, java_tag, base_env=None):
+    """the same as environment_for but of the JDK given, :return: new dict"""
+    env = dict(os.environ if base_env is None else base_env)
+
+    env['JAVA_HOME'] = java_home
+    env['JAVA_TAG'] = java_tag
+    env['PATH'] = os.pathsep.join(filter(None, [os.path.join(java_home, 'bin'), env.get('PATH')]))
+    env.setdefault('CLASSPATH', class_path_for(java_home, java_tag))  # inherit from old CLASSPATH
+
+    return env
@@ -0,0 +1,206 @@
+# -*- coding:utf-8 -*-
+"""Build tool caches of a java virtual env and the store sharing their identical files
+
+An env created with --build-cache gets its own Gradle user home and Maven local repository in <env>/cache/,
+exported by the activate scripts as GRADLE_USER_HOME and `-Dmaven.repo.local` of MAVEN_OPTS,
+so the projects on different JDK don't thrash the caches of each other.
+
+Most of the downloaded artifacts are the same in every env, `jvirtualenv build-cache` keeps one copy of them
+in the content-addressed store of the config directory (build-cache/objects/<sha256[:2]>/<sha256>)
+and replaces the ones of the envs by hard links of it. Only the artifacts (jar, pom, ...) are linked,
+Maven and Gradle never write them in place but rename a new file over them, which breaks the link instead of
+changing the other envs. A file of the store without any other link isn't used by any env and is removed.
+"""
+
+import os
+import json
+import stat
+import errno
+import hashlib
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from jvirtualenv.support.minghu6_support import atomic_write, link_over, FileLock
+
+
+CACHE_DIR_NAME = 'cache'
+STORE_DIR_NAME = 'build-cache'
+ENVS_NAME = 'envs.json'
+ENVS_LOCK_NAME = '.envs.lock'
+
+ARTIFACT_SUFFIXES = ('.jar', '.pom', '.aar', '.war', '.module', '.klib', '.zip')
+
+Report = namedtuple('Report', [
+    'envs',  # envs with build caches
+    'files',  # artifacts in them
+    'linked',  # artifacts replaced by a link of the store in this run
+    'skipped',  # artifacts on another file system than the store
+    'shared_bytes',  # size of the artifacts which are links of the store
+    'store_files',
+    'store_bytes',
+    'removed',  # files of the store used by no env any more
+    'reclaimed_bytes',
+])
+
+_register_lock = threading.Lock()  # FileLock isn't reentrant, the threads of a process take this one first
+
+
+def gradle_user_home(virtual_env):
+    return os.path.join(virtual_env, CACHE_DIR_NAME, 'gradle')
+
+
+def maven_repository(virtual_env):
+    return os.path.join(virtual_env, CACHE_DIR_NAME, 'm2', 'repository')
+
+
+def maven_options(virtual_env):
+    """the options of MAVEN_OPTS, mvn splits it by white space, so the env path shouldn't have any"""
+    return ['-Dmaven.repo.local=' + maven_repository(virtual_env)]
+
+
+def cache_dirs(virtual_env):
+    return [gradle_user_home(virtual_env), maven_repository(virtual_env)]
+
+
+def _objects_dir(store_dir):
+    return os.path.join(store_dir, 'objects')
+
+
+def read_envs(store_dir):
+    """:return: list of env paths registered to the store"""
+    try:
+        with open(os.path.join(store_dir, ENVS_NAME), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def _envs_lock(store_dir):
+    """the lock of the envs of the store between processes, take it with _register_lock"""
+    os.makedirs(store_dir, exist_ok=True)
+
+    return FileLock(os.path.join(store_dir, ENVS_LOCK_NAME))
+
+
+def register(store_dir, virtual_env):
+    """create the build caches of the env and add it to the envs of the store"""
+    for path in cache_dirs(virtual_env):
+        os.makedirs(path, exist_ok=True)
+
+    with _register_lock, _envs_lock(store_dir):
+        envs = read_envs(store_dir)
+        if virtual_env not in envs:
+            atomic_write(os.path.join(store_dir, ENVS_NAME), json.dumps(envs + [virtual_env], indent=4))
+
+
+def _iter_artifacts(directory):
+    """:return: iter of (path, stat)"""
+    for dirpath, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if filename.endswith(ARTIFACT_SUFFIXES):
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.lstat(path)
+                except OSError:
+                    continue
+                if st.st_size and stat.S_ISREG(st.st_mode):
+                    yield path, st
+
+
+def _iter_objects(objects_dir):
+    """:return: iter of (path, stat) of the files of the store"""
+    for dirpath, _, filenames in os.walk(objects_dir):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                yield path, os.lstat(path)
+            except OSError:
+                continue
+
+
+def _digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+
+    return h.hexdigest()
+
+
+def dedup(store_dir, jobs=8, dry_run=False):
+    """
+    Link the identical artifacts of the envs registered to the store to one file of the store,
+    and remove the files of the store no env uses, the envs removed are dropped from the store
+
+    :return: Report
+    """
+    objects_dir = _objects_dir(store_dir)
+    envs = [virtual_env for virtual_env in read_envs(store_dir) if os.path.isdir(virtual_env)]
+    env_count = len(envs)
+
+    stored = {}  # (st_dev, st_ino): digest, the files already in the store are never hashed again
+    for path, st in _iter_objects(objects_dir):
+        stored[(st.st_dev, st.st_ino)] = os.path.basename(path)
+    digests = set(stored.values())
+
+    files = linked = skipped = shared_bytes = 0
+    new_files = new_bytes = 0  # the files a dry run would add to the store
+    pending = []
+    for virtual_env in envs:
+        for directory in cache_dirs(virtual_env):
+            for path, st in _iter_artifacts(directory):
+                files += 1
+                if (st.st_dev, st.st_ino) in stored:
+                    shared_bytes += st.st_size
+                else:
+                    pending.append((path, st))
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # linked in the order of the scan on this thread, so two new copies of a file never race for the store
+        for (path, st), digest in zip(pending, executor.map(lambda item: _digest(item[0]), pending)):
+            object_path = os.path.join(objects_dir, digest[:2], digest)
+            try:
+                if digest in digests:
+                    if not dry_run:
+                        link_over(object_path, path)
+                    linked += 1
+                elif dry_run:
+                    new_files += 1
+                    new_bytes += st.st_size
+                else:
+                    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                    try:
+                        os.link(path, object_path)
+                    except FileExistsError:  # added by another run at the same time
+                        link_over(object_path, path)
+                        linked += 1
+            except OSError as ex:
+                if ex.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                    raise
+                skipped += 1
+                continue
+
+            digests.add(digest)
+            shared_bytes += st.st_size
+
+    store_files, store_bytes = new_files, new_bytes
+    removed = reclaimed_bytes = 0
+    for path, st in _iter_objects(objects_dir):
+        if st.st_nlink > 1:
+            store_files += 1
+            store_bytes += st.st_size
+            continue
+
+        if not dry_run:
+            os.unlink(path)
+        removed += 1
+        reclaimed_bytes += st.st_size
+
+    if not dry_run and os.path.isdir(store_dir):
+        with _register_lock, _envs_lock(store_dir):
+            envs = [virtual_env for virtual_env in read_envs(store_dir) if os.path.isdir(virtual_env)]
+            atomic_write(os.path.join(store_dir, ENVS_NAME), json.dumps(envs, indent=4))
+
+    return Report(env_count, files, linked, skipped, shared_bytes, store_files, store_bytes, removed, reclaimed_bytes)
+
@@ -0,0 +1,235 @@
+# -*- coding:utf-8 -*-
+"""Indexed copy of tag-list.json in SQLite
+
+tag-list.json is still the config users read and edit, the index is rebuilt from it
+whenever its size or mtime changes, and then a tag is resolved by an index lookup
+instead of parsing the whole json file and scanning it.
+
+A query is either a tag prefix (`17`, `1.8`, `17:0:1:64`) or a version constraint (`>=11,<17`, `17.0.*`),
+see jvirtualenv.version, the newest one is chosen by the precomputed version key.
+"""
+
+import os
+import re
+import json
+from collections import OrderedDict
+
+from jvirtualenv.version import version_key, is_constraint, parse_constraint, matches_constraint, constraint_sql
+
+
+SCHEMA_VERSION = 2  # version_key is the integer key of jvirtualenv.version since 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jdk (
+    home TEXT PRIMARY KEY,
+    tag TEXT NOT NULL,
+    major INTEGER,
+    minor INTEGER,
+    patch INTEGER,
+    bit TEXT,
+    arch TEXT,
+    version TEXT,
+    version_key INTEGER,
+    info TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jdk_major ON jdk (major, minor, patch);
+CREATE INDEX IF NOT EXISTS jdk_version ON jdk (version_key);
+CREATE INDEX IF NOT EXISTS jdk_arch ON jdk (arch, bit);
+CREATE INDEX IF NOT EXISTS jdk_tag ON jdk (tag);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def parse_tag_query(query):
+    """
+    `17`, `1.8`, `11:0:2` or `17:0:1:64` into major, minor, patch and bit,
+    a major before 9 alone is the one of 1.x, such as `8` of 1.8, the same as a .java-version of the hook
+
+    :return: list of int or str, None if the query isn't made of numbers
+
+    >>> parse_tag_query('1.8')
+    [1, 8]
+    >>> parse_tag_query('8')
+    [1, 8]
+    >>> parse_tag_query('17:0:1:64')
+    [17, 0, 1, '64']
+    >>> parse_tag_query('openjdk') is None
+    True
+    """
+    fields = re.split(r'[.:]', query.strip())
+    if not fields or len(fields) > 4 or not all(field.isdigit() for field in fields):
+        return None
+
+    if len(fields) == 1 and 1 < int(fields[0]) < 9:
+        return [1, int(fields[0])]
+
+    return [int(field) for field in fields[:3]] + fields[3:]
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _tag_fields(tag):
+    return (tag.split(':') + [None] * 4)[:4]
+
+
+def _matches(version_info, query, fields):
+    if fields is None:
+        return version_info['tag'].startswith(query)
+
+    tag_fields = _tag_fields(version_info['tag'])
+    tag_fields = [_int_or_none(field) for field in tag_fields[:3]] + tag_fields[3:]
+
+    return tag_fields[:len(fields)] == fields
+
+
+def newest_first(version_infos):
+    """version_infos sorted in the order best_match prefers"""
+    return sorted(version_infos, key=version_key, reverse=True)
+
+
+def best_match(version_infos, query, exclude=()):
+    """
+    The same as CatalogIndex.best_match but scan version_infos, for the index can't be opened
+
+    raise InvalidConstraintError
+    """
+    if exclude:
+        version_infos = [version_info for version_info in version_infos if version_info['home'] not in exclude]
+
+    if is_constraint(query):
+        constraint = parse_constraint(query)
+        matched = [version_info for version_info in version_infos
+                   if matches_constraint(constraint, version_key(version_info))]
+    else:
+        fields = parse_tag_query(query)
+        matched = [version_info for version_info in version_infos if _matches(version_info, query, fields)]
+
+    return max(matched, key=version_key) if matched else None
+
+
+def fresh_match(match, query):
+    """
+    The newest match which isn't stale (see jvirtualenv.jdkinfo.is_stale), only the candidates are checked
+
+    :param match: best_match of a catalog, called with (query, exclude)
+    :return: (version info or None, list of the stale version infos skipped)
+    raise InvalidConstraintError
+    """
+    from jvirtualenv.jdkinfo import is_stale
+
+    stale_infos = []
+    while True:
+        version_info = match(query, exclude={stale_info['home'] for stale_info in stale_infos})
+        if version_info is None or not is_stale(version_info):
+            return version_info, stale_infos
+        stale_infos.append(version_info)
+
+
+def source_signature(source_path):
+    st = os.stat(source_path)
+    return '{0}:{1}:{2}'.format(st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class CatalogIndex(object):
+    def __init__(self, db_path):
+        import sqlite3
+
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        if self._conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:  # it's rebuilt by sync()
+            with self._conn:
+                self._conn.execute('DROP TABLE IF EXISTS jdk')
+                self._conn.execute('DROP TABLE IF EXISTS meta')
+            self._conn.execute('PRAGMA user_version = {0}'.format(SCHEMA_VERSION))
+        self._conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    def _get_meta(self, key):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key, )).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(self, source_path):
+        try:
+            return self._get_meta('source') == source_signature(source_path)
+        except OSError:
+            return False
+
+    def rebuild(self, version_infos, signature):
+        """:param signature: source_signature of the file version_infos were read from, taken before reading it"""
+        rows = []
+        for version_info in version_infos:
+            fields = _tag_fields(version_info['tag'])
+            rows.append((
+                version_info['home'],
+                version_info['tag'],
+                _int_or_none(fields[0]),
+                _int_or_none(fields[1]),
+                _int_or_none(fields[2]),
+                str(version_info.get('bit')),
+                version_info.get('arch'),
+                str(version_info.get('version')),
+                version_key(version_info),
+                json.dumps(version_info, default=lambda o: o.__str__()),
+            ))
+
+        with self._conn:
+            self._conn.execute('DELETE FROM jdk')
+            self._conn.executemany('INSERT OR REPLACE INTO jdk VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            self._conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                               ('source', signature))
+
+    def sync(self, source_path, load):
+        """
+        rebuild the index from load() if source_path changed since the last time,
+        a change during load() leaves it stale, so it's rebuilt again by the next sync
+        """
+        if not self.is_fresh(source_path):
+            signature = source_signature(source_path)
+            self.rebuild(load(), signature)
+
+    def best_match(self, query, exclude=()):
+        """
+        The newest version matching the query, a tag prefix or a version constraint
+
+        :param exclude: homes not to match
+        :return: version info or None
+        raise InvalidConstraintError
+        """
+        fields = parse_tag_query(query)
+
+        if is_constraint(query):
+            where, params = constraint_sql(parse_constraint(query))
+            sql = 'SELECT info FROM jdk WHERE ' + where
+        elif fields is None:  # not a numeric query, match the tag prefix as before
+            escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            sql = "SELECT info FROM jdk WHERE tag LIKE ? ESCAPE '\\'"
+            params = [escaped + '%']
+        else:
+            columns = ['major', 'minor', 'patch', 'bit'][:len(fields)]
+            sql = 'SELECT info FROM jdk WHERE ' + ' AND '.join('%s = ?' % column for column in columns)
+            params = fields
+
+        if exclude:
+            sql += ' AND home NOT IN ({0})'.format(', '.join('?' * len(exclude)))
+            params = list(params) + list(exclude)
+        sql += ' ORDER BY version_key DESC LIMIT 1'
+        row = self._conn.execute(sql, params).fetchone()
+
+        return json.loads(row[0], object_pairs_hook=OrderedDict) if row else None
@@ -0,0 +1,145 @@
+# -*- coding:utf-8 -*-
+"""Class data sharing (AppCDS) archive of a java virtual env
+
+The archive is kept in <env>/cds/ and mapped by every JVM of the activated env through
+`-XX:SharedArchiveFile` of JAVA_TOOL_OPTIONS, so the classes in it aren't parsed and verified again.
+Without a training command it holds the default classes of the JDK (static dump, JDK 10+),
+with one it holds the classes the command loaded (dynamic archive at exit, JDK 13+).
+The JDK fingerprint is recorded next to it, the archive is rebuilt only when the JDK changed.
+"""
+
+import os
+import json
+import tempfile
+import subprocess
+from collections import OrderedDict
+
+from jvirtualenv.support.minghu6_support import atomic_write
+from jvirtualenv.jdkinfo import java_executable, jdk_fingerprint
+
+
+CDS_DIR_NAME = 'cds'
+ARCHIVE_NAME = 'app.jsa'
+META_NAME = 'archive.json'
+
+MIN_STATIC_FEATURE = 10  # -Xshare:dump with -XX:SharedArchiveFile, AppCDS is open since JDK 10
+MIN_DYNAMIC_FEATURE = 13  # -XX:ArchiveClassesAtExit
+
+
+class CDSUnsupportedError(Exception):
+    """The first arg of the exception should be the java version"""
+    pass
+
+
+class CDSBuildError(Exception):
+    pass
+
+
+def archive_path(virtual_env):
+    return os.path.join(virtual_env, CDS_DIR_NAME, ARCHIVE_NAME)
+
+
+def _meta_path(virtual_env):
+    return os.path.join(virtual_env, CDS_DIR_NAME, META_NAME)
+
+
+def option(name, path):
+    """JAVA_TOOL_OPTIONS is split by white space, a path with spaces is quoted"""
+    return name + ('"{0}"'.format(path) if any(c.isspace() for c in path) else path)
+
+
+def check_supported(version, train=None):
+    """
+    :param version: JavaVersion
+    raise CDSUnsupportedError
+    """
+    if version.numbers[0] < (MIN_DYNAMIC_FEATURE if train else MIN_STATIC_FEATURE):
+        raise CDSUnsupportedError(version.text)
+
+
+def read_meta(virtual_env):
+    """:return: the record of the last build, None if there isn't"""
+    try:
+        with open(_meta_path(virtual_env), 'r') as f:
+            return json.load(f, object_pairs_hook=OrderedDict)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_of_jdk(meta, virtual_env, java_home):
+    """whether the archive of the record is there and dumped by the JDK of the home as it is now"""
+    return meta is not None and os.path.isfile(archive_path(virtual_env)) \
+        and meta.get('java_home') == java_home \
+        and meta.get('fingerprint') == json.loads(json.dumps(jdk_fingerprint(java_home)))
+
+
+def is_fresh(virtual_env, java_home, train=None):
+    meta = read_meta(virtual_env)
+
+    return _is_of_jdk(meta, virtual_env, java_home) and meta.get('train') == train
+
+
+def _run(cmd, env, shell):
+    try:
+        returncode = subprocess.run(cmd, env=env, shell=shell).returncode
+    except OSError as ex:
+        raise CDSBuildError(repr(ex)) from ex
+
+    if returncode != 0:
+        raise CDSBuildError('`{0}` exited with {1}'.format(cmd if shell else ' '.join(cmd), returncode))
+
+
+def build_archive(virtual_env, java_home, version, env, train=None):
+    """
+    Dump the archive to a temporary file and rename it, the old archive is used until then
+
+    :param version: JavaVersion of the JDK
+    :param env: the environment variables of the env, the training command runs with them
+    :param train: shell command running java, such as `java -cp app.jar app.Main --help`
+    :return: archive path
+    raise CDSUnsupportedError, CDSBuildError
+    """
+    check_supported(version, train)
+
+    path = archive_path(virtual_env)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.%s.' % ARCHIVE_NAME, suffix='.tmp', dir=os.path.dirname(path))
+    os.close(fd)  # a unique name of the concurrent builds, the JVM dumps over it
+    fingerprint = jdk_fingerprint(java_home)  # before building, so a change during it is seen next time
+
+    try:
+        if train:
+            env = dict(env)
+            env['JAVA_TOOL_OPTIONS'] = ' '.join(filter(None, [
+                option('-XX:ArchiveClassesAtExit=', tmp_path), env.get('JAVA_TOOL_OPTIONS')]))
+            _run(train, env, shell=True)
+        else:
+            _run([java_executable(java_home), '-Xshare:dump', '-XX:SharedArchiveFile=' + tmp_path], env, shell=False)
+
+        if not os.path.isfile(tmp_path) or not os.path.getsize(tmp_path):
+            raise CDSBuildError('no archive is dumped, does the training command run java of {0}?'.format(java_home))
+
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+    atomic_write(_meta_path(virtual_env), json.dumps(OrderedDict([
+        ('java_home', java_home),
+        ('version', version.text),
+        ('train', train),
+        ('fingerprint', fingerprint),
+    ]), indent=4))
+
+    return path
+
+
+def java_tool_options(virtual_env, java_home):
+    """
+    the options of JAVA_TOOL_OPTIONS mapping the archive, empty if there is no archive of the JDK,
+    or the JDK was upgraded in place since it's dumped, `jvirtualenv cds` builds it again then
+    """
+    if not _is_of_jdk(read_meta(virtual_env), virtual_env, java_home):
+        return []
+
+    return [option('-XX:SharedArchiveFile=', archive_path(virtual_env)), '-Xshare:auto']
@@ -0,0 +1,88 @@
+# -*- coding:utf-8 -*-
+"""Thin client of `jvirtualenv serve`, with the same functions as jvirtualenv.api
+
+    >>> from jvirtualenv import client
+    >>> client.resolve('17')['home']                             # doctest: +SKIP
+    '/opt/java/jdk-17.0.9'
+
+Each call is one request line on the socket of the config directory, it falls back to
+jvirtualenv.api, which reads the files itself, when the server isn't running or doesn't answer in TIMEOUT.
+"""
+
+import os
+import json
+import socket
+
+from jvirtualenv import api
+from jvirtualenv.version import InvalidConstraintError
+from jvirtualenv.server import socket_path
+
+
+TIMEOUT = 1.0  # seconds
+
+
+class ServerError(Exception):
+    pass
+
+
+def query(line, config_dir=None, timeout=TIMEOUT):
+    """
+    :return: the parsed value of the response
+    raise OSError if the server can't be reached, InvalidConstraintError, NoMatchedTagError, ServerError
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise OSError('Unix socket is not supported on this platform')
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path(config_dir or api.default_config_dir()))
+        sock.sendall(line.encode('utf-8') + b'\n')
+        with sock.makefile('rb') as f:
+            response = f.readline().decode('utf-8')
+
+    if not response.endswith('\n'):
+        raise OSError('the server closed the connection')
+
+    status, _, payload = response.rstrip('\n').partition(' ')
+    if status == 'ok':
+        return json.loads(payload)
+
+    kind, _, message = payload.partition(' ')
+    if kind == 'constraint':
+        raise InvalidConstraintError(message)
+    elif kind == 'notag':
+        raise api.NoMatchedTagError(message)
+    else:
+        raise ServerError(kind, message)
+
+
+def resolve(tag, config_dir=None):
+    """the same as api.resolve, raise InvalidConstraintError"""
+    try:
+        return query('resolve ' + tag, config_dir)
+    except (OSError, ServerError):
+        return api.resolve(tag, config_dir)
+
+
+def resolve_project(directory, config_dir=None):
+    """the same as api.resolve_project, raise InvalidConstraintError"""
+    try:
+        return query('project ' + os.path.abspath(directory), config_dir)
+    except (OSError, ServerError):
+        return api.resolve_project(directory, config_dir)
+
+
+def list_jdks(config_dir=None):
+    try:
+        return query('list', config_dir)
+    except (OSError, ServerError):
+        return api.list_jdks(config_dir)
+
+
+def environment_for(tag, config_dir=None, base_env=None):
+    """the same as api.environment_for, raise NoMatchedTagError"""
+    version_info = resolve(tag, config_dir)
+    if version_info is None:
+        raise api.NoMatchedTagError(tag)
+
+    return api.environment_of(version_info['home'], version_info['tag'], base_env)
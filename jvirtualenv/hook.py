@@ -0,0 +1,74 @@
+# -*- coding:utf-8 -*-
+"""Directory based JDK switching for bash and zsh
+
+The catalog is compiled into a shell function mapping every tag prefix and version to the newest JDK home,
+so the prompt hook resolves `.java-version` with shell builtins only and never starts Python.
+"""
+
+import os
+import hashlib
+from collections import OrderedDict
+
+from jvirtualenv.catalog import newest_first
+from jvirtualenv.template.engine import quote_posix
+from jvirtualenv.support.minghu6_support import atomic_write
+
+
+def lookup_keys(version_info):
+    """
+    The names a `.java-version` may use for the JDK
+
+    >>> lookup_keys({'tag': '1:8:0:64', 'version': '1.8.0_144'})
+    ['1', '1:8', '1.8', '1:8:0', '1.8.0', '1:8:0:64', '1.8.0_144', '8']
+    """
+    fields = version_info['tag'].split(':')
+    keys = []
+    for n in range(1, min(len(fields), 3) + 1):
+        keys.extend([':'.join(fields[:n]), '.'.join(fields[:n])])
+    keys.append(version_info['tag'])
+    keys.append(str(version_info.get('version')))
+    if fields[0] == '1' and len(fields) > 1:  # 1.8 is known as 8 too
+        keys.append(fields[1])
+
+    return list(OrderedDict.fromkeys(keys))
+
+
+def build_lookup(version_infos):
+    """
+    :return: source of `_jvirtualenv_lookup <version>`, which sets REPLY to the home
+             and _JVIRTUALENV_TAG to the tag, the first line is the id of the content
+    """
+    seen = set()
+    lines = []
+    for version_info in newest_first(version_infos):
+        keys = [key for key in lookup_keys(version_info) if key not in seen]
+        seen.update(keys)
+        if keys:
+            lines.append("        {0}) REPLY={1}; _JVIRTUALENV_TAG={2} ;;".format(
+                '|'.join(quote_posix(key) for key in keys),
+                quote_posix(version_info['home']),
+                quote_posix(version_info['tag'])))
+
+    body = '\n'.join([
+        "# generated by jvirtualenv from tag-list.json, don't edit it",
+        '_jvirtualenv_lookup() {',
+        '    case "$1" in',
+    ] + lines + [
+        "        *) REPLY=''; _JVIRTUALENV_TAG=''; return 1 ;;",
+        '    esac',
+        '}',
+        '',
+    ])
+
+    return '# {0}\n{1}'.format(hashlib.md5(body.encode()).hexdigest(), body)
+
+
+def write_lookup(path, version_infos):
+    atomic_write(path, build_lookup(version_infos))
+
+
+def create_hook_s(lookup_path):
+    from jvirtualenv.template.engine import Template
+    from jvirtualenv.template.hook_template import template
+
+    return Template(template, quote_posix).render({'LOOKUP_PATH': lookup_path})
@@ -0,0 +1,185 @@
+# -*- coding:utf-8 -*-
+"""Read JDK metadata from disk without starting a JVM"""
+
+import os
+import struct
+from collections import OrderedDict
+
+from jvirtualenv.support.minghu6_support import iswin
+
+
+ELF_MACHINES = {
+    2: 'sparc',
+    3: 'x86',
+    8: 'mips',
+    20: 'ppc',
+    21: 'ppc64',
+    22: 's390',
+    40: 'arm',
+    43: 'sparcv9',
+    62: 'x86_64',
+    183: 'aarch64',
+    243: 'riscv',
+}
+
+PE_MACHINES = {
+    0x014c: ('32', 'x86'),
+    0x01c4: ('32', 'arm'),
+    0x8664: ('64', 'x86_64'),
+    0xaa64: ('64', 'aarch64'),
+}
+
+OS_ARCH_BITS = {
+    'x86': '32',
+    'i386': '32',
+    'i586': '32',
+    'i686': '32',
+    'arm': '32',
+    'aarch32': '32',
+    'ppc': '32',
+    'sparc': '32',
+    'x86_64': '64',
+    'amd64': '64',
+    'aarch64': '64',
+    'arm64': '64',
+    'ppc64': '64',
+    'ppc64le': '64',
+    's390x': '64',
+    'sparcv9': '64',
+    'riscv64': '64',
+}
+
+# java home: its fingerprint now, stat once per process, see is_stale
+_CURRENT_FINGERPRINTS = {}
+
+
+def read_release(java_home):
+    """
+    Parse `$JAVA_HOME/release`, lines like `JAVA_VERSION="17.0.1"`
+
+    :return: OrderedDict or None if there isn't a release file
+    """
+    try:
+        with open(os.path.join(java_home, 'release'), 'r', errors='ignore') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+
+    release = OrderedDict()
+    for line in lines:
+        key, sep, value = line.partition('=')
+        if sep and key.strip():
+            release[key.strip()] = value.strip().strip('"')
+
+    return release
+
+
+def _read_elf_arch(header):
+    ei_class, ei_data = header[4], header[5]
+    if ei_class not in (1, 2) or ei_data not in (1, 2):
+        return None
+
+    e_machine, = struct.unpack('<H' if ei_data == 1 else '>H', header[18:20])
+    bit = '32' if ei_class == 1 else '64'
+
+    return bit, ELF_MACHINES.get(e_machine, str(e_machine))
+
+
+def _read_pe_arch(f, header):
+    pe_offset, = struct.unpack('<I', header[0x3c:0x40])
+    f.seek(pe_offset)
+    pe_header = f.read(6)
+    if pe_header[:4] != b'PE\x00\x00':
+        return None
+
+    machine, = struct.unpack('<H', pe_header[4:6])
+
+    return PE_MACHINES.get(machine)
+
+
+def read_binary_arch(path):
+    """
+    Read word size and machine from the ELF or PE header of an executable
+
+    :return: (bit, machine) such as ('64', 'x86_64') or None if it isn't a known binary
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(64)
+
+            if len(header) >= 20 and header[:4] == b'\x7fELF':
+                return _read_elf_arch(header)
+            elif len(header) >= 64 and header[:2] == b'MZ':
+                return _read_pe_arch(f, header)
+    except (OSError, struct.error):
+        pass
+
+    return None
+
+
+def os_arch_bit(os_arch):
+    """
+    >>> os_arch_bit('amd64')
+    '64'
+    >>> os_arch_bit('unknown') is None
+    True
+    """
+    return OS_ARCH_BITS.get((os_arch or '').lower())
+
+
+def java_executable(java_home):
+    return os.path.join(java_home, 'bin', 'java.exe' if iswin() else 'java')
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def jdk_fingerprint(java_home):
+    """
+    inode, size and mtime of `bin/java` and the `release` file,
+    any change of them means the JDK was replaced or upgraded in place.
+
+    :return: OrderedDict which can be dumped to json directly, None if there isn't `bin/java`
+    """
+    java_key = _stat_key(java_executable(java_home))
+    if java_key is None:
+        return None
+
+    fingerprint = OrderedDict()
+    fingerprint['java'] = java_key
+    fingerprint['release'] = _stat_key(os.path.join(java_home, 'release'))
+
+    return fingerprint
+
+
+def is_stale(version_info):
+    """
+    Whether the JDK of the catalog entry was removed, replaced or upgraded in place since it was probed,
+    by the stat of `bin/java` and the `release` file only, which is done once per home in a process.
+    An entry of an old catalog without fingerprint is stale only if its `bin/java` is gone.
+    """
+    home = version_info['home']
+    try:
+        current = _CURRENT_FINGERPRINTS[home]
+    except KeyError:
+        current = _CURRENT_FINGERPRINTS[home] = jdk_fingerprint(home)
+
+    if 'fingerprint' not in version_info:
+        return current is None
+
+    return current is None or current != version_info['fingerprint']
+
+
+def forget_fingerprints(homes=None):
+    """stat the homes again on the next is_stale, all of them if homes is None"""
+    if homes is None:
+        _CURRENT_FINGERPRINTS.clear()
+    else:
+        for home in homes:
+            _CURRENT_FINGERPRINTS.pop(home, None)
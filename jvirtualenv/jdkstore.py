@@ -0,0 +1,483 @@
+# -*- coding:utf-8 -*-
+"""Managed store of the JDK installed from local archives
+
+`jvirtualenv install <archive>` extracts a JDK archive (.tar.gz, .tgz, .tar.xz or .zip) into
+<config dir>/jdks/<top directory of the archive>. The files are written by `jobs` threads while the
+archive is read, every regular file is keyed by the sha256 and the mode of its content in jdks/.objects,
+and a file already there is hard-linked instead of written again, so the patch releases of a JDK,
+which are nearly identical, share their disk space and page cache. The files users edit in place,
+the ones of conf/ and the security settings such as cacerts rewritten by keytool, are copied instead,
+so an edit of one JDK never changes the others.
+
+An installed JDK is added to the catalog directly, and it's found by the rescans as well.
+A file of .objects without any other link isn't used by any JDK and is removed by gc, so are the
+extractions and removals interrupted halfway.
+"""
+
+import os
+import stat
+import time
+import shutil
+import hashlib
+import tarfile
+import zipfile
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from jvirtualenv.support.minghu6_support import iswin, link_over
+
+
+STORE_DIR_NAME = 'jdks'
+OBJECTS_DIR_NAME = '.objects'
+TMP_PREFIX = '.tmp-'
+TRASH_PREFIX = '.trash-'
+
+TAR_SUFFIXES = ('.tar.gz', '.tgz', '.tar.xz', '.txz', '.tar.bz2', '.tar')
+ZIP_SUFFIXES = ('.zip', )
+
+# the files edited in place, never linked: a directory of the member name, or its file name
+PRIVATE_DIR_NAMES = ('conf', 'security')
+PRIVATE_FILE_SUFFIXES = ('.properties', '.cfg', 'cacerts')
+
+STREAM_SIZE = 16 << 20  # a larger file of a tar is written by the reader itself instead of held in memory
+
+Stats = namedtuple('Stats', 'files bytes linked linked_bytes')
+
+
+class UnsupportedArchiveError(ValueError):
+    """The first arg of the exception should be the archive path"""
+    pass
+
+
+class UnsafeArchiveError(ValueError):
+    """The first arg of the exception should be the member name, which is outside of the extracted directory"""
+    pass
+
+
+class NotJDKArchiveError(ValueError):
+    """The first arg of the exception should be the archive path"""
+    pass
+
+
+class JDKExistsError(FileExistsError):
+    """The first arg of the exception should be the JDK home"""
+    pass
+
+
+class NotInstalledError(ValueError):
+    """The first arg of the exception should be the JDK home"""
+    pass
+
+
+def objects_dir(store_dir):
+    return os.path.join(store_dir, OBJECTS_DIR_NAME)
+
+
+def installed_dirs(store_dir):
+    """the top directories of the installed JDK"""
+    try:
+        names = sorted(os.listdir(store_dir))
+    except FileNotFoundError:
+        return []
+
+    return [os.path.join(store_dir, name) for name in names
+            if not name.startswith('.') and os.path.isdir(os.path.join(store_dir, name))]
+
+
+def find_home(directory, max_depth=3):
+    """
+    The JDK home in the directory, such as `jdk-17.0.9+9/` or `jdk-17.0.9+9/Contents/Home/` of macOS
+
+    :return: JDK home, None if there isn't
+    """
+    java_name = 'java.exe' if iswin() else 'java'
+    for dirpath, dirnames, _ in os.walk(directory):
+        if os.path.isfile(os.path.join(dirpath, 'bin', java_name)):
+            return dirpath
+        if os.path.relpath(dirpath, directory).count(os.sep) + 1 >= max_depth:
+            dirnames[:] = []
+        dirnames.sort()
+
+    return None
+
+
+def installed_homes(store_dir):
+    return [home for home in map(find_home, installed_dirs(store_dir)) if home is not None]
+
+
+def is_installed(home, store_dir):
+    store_dir = os.path.abspath(store_dir).rstrip(os.sep) + os.sep
+    return os.path.abspath(home).startswith(store_dir)
+
+
+def _archive_name(archive):
+    """
+    >>> _archive_name('/tmp/OpenJDK17U-jdk_x64_linux_hotspot_17.0.9_9.tar.gz')
+    'OpenJDK17U-jdk_x64_linux_hotspot_17.0.9_9'
+    """
+    name = os.path.basename(archive)
+    for suffix in TAR_SUFFIXES + ZIP_SUFFIXES:
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)]
+
+    raise UnsupportedArchiveError(archive)
+
+
+def _target(root, name):
+    """
+    raise UnsafeArchiveError if the member name is absolute or goes up out of root
+
+    >>> _target('/store/.tmp-1', 'jdk-17/bin/java')
+    '/store/.tmp-1/jdk-17/bin/java'
+    >>> _target('/store/.tmp-1', 'jdk-17/lib/../bin/./java')
+    '/store/.tmp-1/jdk-17/bin/java'
+    >>> _target('/store/.tmp-1', 'jdk-17/../../etc/passwd')  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    UnsafeArchiveError: jdk-17/../../etc/passwd
+
+    a sibling sharing the prefix of root is out of it as well
+
+    >>> _target('/store/.tmp-1', '../.tmp-1-other/java')  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    UnsafeArchiveError: ../.tmp-1-other/java
+    >>> _target('/store/.tmp-1', '/etc/passwd')  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    UnsafeArchiveError: /etc/passwd
+    >>> _target('/store/.tmp-1', 'jdk-17\\\\..\\\\..\\\\evil.dll')  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    UnsafeArchiveError: jdk-17\\..\\..\\evil.dll
+    """
+    path = os.path.normpath(os.path.join(root, name.replace('\\', '/').lstrip('/')))
+    if os.path.isabs(name) or not (path + os.sep).startswith(root + os.sep):
+        raise UnsafeArchiveError(name)
+
+    return path
+
+
+def _is_private(name):
+    """
+    Whether the member is a setting users may edit in place, which isn't shared by the store
+
+    >>> _is_private('jdk-17.0.9+9/conf/security/java.security')
+    True
+    >>> _is_private('jdk8u392-b08/jre/lib/security/cacerts')
+    True
+    >>> _is_private('jdk8u392-b08/jre/lib/logging.properties')
+    True
+    >>> _is_private('jdk-17.0.9+9/lib/modules')
+    False
+    """
+    parts = name.replace('\\', '/').split('/')
+    return any(part in PRIVATE_DIR_NAMES for part in parts[:-1]) or parts[-1].endswith(PRIVATE_FILE_SUFFIXES)
+
+
+class _Writer(object):
+    """write the files of an archive in the extracted directory by the threads, linking the ones of the store"""
+
+    def __init__(self, store_dir, jobs):
+        self.objects_dir = objects_dir(store_dir)
+        self._executor = ThreadPoolExecutor(max_workers=jobs)
+        self._slots = threading.BoundedSemaphore(jobs * 2)  # the contents in memory at the same time
+        self._futures = []
+        self._lock = threading.Lock()
+        self.files = self.bytes = self.linked = self.linked_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._executor.shutdown(wait=True)
+
+    def _object_path(self, digest, mode):
+        key = '{0}-{1:o}'.format(digest, mode)
+        return os.path.join(self.objects_dir, key[:2], key)
+
+    def _count(self, size, linked):
+        with self._lock:
+            self.files += 1
+            self.bytes += size
+            if linked:
+                self.linked += 1
+                self.linked_bytes += size
+
+    def _store(self, path, digest, mode, size):
+        """link the new file into the store, or replace it by the link of the same one there"""
+        object_path = self._object_path(digest, mode)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        try:
+            os.link(path, object_path)
+            self._count(size, False)
+        except FileExistsError:  # written by another thread or install at the same time
+            link_over(object_path, path)
+            self._count(size, True)
+
+    def _write(self, path, data, mode, mtime, shared):
+        try:
+            digest = hashlib.sha256(data).hexdigest()
+            if shared:
+                try:
+                    os.link(self._object_path(digest, mode), path)
+                    self._count(len(data), True)
+                    return
+                except FileNotFoundError:
+                    pass
+
+            with open(path, 'wb') as f:
+                f.write(data)
+            os.chmod(path, mode)
+            os.utime(path, (mtime, mtime))
+            if shared:
+                self._store(path, digest, mode, len(data))
+            else:
+                self._count(len(data), False)
+        finally:
+            self._slots.release()
+
+    def submit(self, path, data, mode, mtime, shared=True):
+        """:param shared: False for a file which is copied instead of linked with the store"""
+        self._slots.acquire()
+        self._futures.append(self._executor.submit(self._write, path, data, mode, mtime, shared))
+
+    def write_stream(self, path, f, mode, mtime):
+        """write a large file on the calling thread, hashing it on the way, it's always shared"""
+        h = hashlib.sha256()
+        size = 0
+        with open(path, 'wb') as out:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        os.chmod(path, mode)
+        os.utime(path, (mtime, mtime))
+        self._store(path, h.hexdigest(), mode, size)
+
+    def wait(self):
+        """raise the first error of the threads"""
+        for future in self._futures:
+            future.result()
+        self._futures = []
+
+    def stats(self):
+        return Stats(self.files, self.bytes, self.linked, self.linked_bytes)
+
+
+def _extract_tar(archive, root, writer):
+    links = []
+    with tarfile.open(archive, 'r|*') as tar:  # a stream, members are read in order
+        for member in tar:
+            path = _target(root, member.name)
+            mode = member.mode & 0o777
+            if member.isdir():
+                os.makedirs(path, exist_ok=True)
+            elif member.isfile():
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                f = tar.extractfile(member)
+                shared = not _is_private(member.name)
+                if shared and member.size > STREAM_SIZE:
+                    writer.write_stream(path, f, mode, member.mtime)
+                else:
+                    writer.submit(path, f.read(), mode, member.mtime, shared)
+            elif member.issym() or member.islnk():
+                links.append((path, member.linkname, member.issym()))
+
+    return links
+
+
+def _extract_zip(archive, root, writer):
+    links = []
+    with zipfile.ZipFile(archive) as zf:
+        for info in zf.infolist():
+            path = _target(root, info.filename)
+            mode = (info.external_attr >> 16) & 0o777 or (0o755 if info.is_dir() else 0o644)
+            if info.is_dir():
+                os.makedirs(path, exist_ok=True)
+            elif stat.S_ISLNK(info.external_attr >> 16):
+                links.append((path, zf.read(info).decode('utf-8'), True))
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                writer.submit(path, zf.read(info), mode, time.mktime(info.date_time + (0, 0, -1)),
+                              not _is_private(info.filename))
+
+    return links
+
+
+def _real_target(root, path, name):
+    """the path with the links on the way followed, raise UnsafeArchiveError if it's out of root"""
+    real_path = os.path.realpath(path)
+    if not (real_path + os.sep).startswith(os.path.realpath(root) + os.sep):
+        raise UnsafeArchiveError(name)
+
+    return real_path
+
+
+def _make_links(root, links):
+    """
+    the links are made after the files, a hard link needs its target, raise UnsafeArchiveError
+
+    Every link is checked with the links made before it followed, so a chain of them can't get out of root
+
+    >>> import tempfile
+    >>> root = tempfile.mkdtemp()
+    >>> _make_links(root, [(os.path.join(root, 'jdk/bin/jre'), '../jre', True)])
+    >>> os.readlink(os.path.join(root, 'jdk/bin/jre'))
+    '../jre'
+    >>> _make_links(root, [(os.path.join(root, 'jdk/etc'), '../../etc', True)])  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    UnsafeArchiveError: jdk/../../etc
+    >>> _make_links(root, [(os.path.join(root, 'jdk/etc'), '/etc', True)])  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    UnsafeArchiveError: /etc
+    >>> _make_links(root, [(os.path.join(root, 'jdk/passwd'), '../etc/passwd', False)])
+    ... # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    UnsafeArchiveError: ../etc/passwd
+
+    a/b/c is made in root through the link a/b, so its .. is out of root
+
+    >>> _make_links(root, [(os.path.join(root, 'a/b'), '..', True),
+    ...                    (os.path.join(root, 'a/b/c'), '..', True)])  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    UnsafeArchiveError: ./..
+    >>> _make_links(root, [(os.path.join(root, 'x'), '.', True),
+    ...                    (os.path.join(root, 'y'), 'x/x/..', True)])  # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    UnsafeArchiveError: x/x/..
+    >>> shutil.rmtree(root)
+    """
+    for path, linkname, symbolic in links:
+        parent = _real_target(root, os.path.dirname(path), linkname)  # a link made before may be on the way
+        os.makedirs(parent, exist_ok=True)
+        path = os.path.join(parent, os.path.basename(path))
+        if symbolic:
+            _target(root, os.path.join(os.path.relpath(parent, os.path.realpath(root)), linkname))
+            os.symlink(linkname, path)
+            _real_target(root, path, linkname)  # the name is lexically in root, but a link in it may not be
+        else:
+            os.link(_real_target(root, _target(root, linkname), linkname), path)
+
+
+def extract(archive, store_dir, jobs=8):
+    """
+    Extract the archive into a temporary directory of the store
+
+    :return: (the directory, Stats)
+    raise UnsupportedArchiveError, UnsafeArchiveError
+    """
+    _archive_name(archive)  # raise UnsupportedArchiveError before anything is written
+    store_dir = os.path.abspath(store_dir)
+    os.makedirs(store_dir, exist_ok=True)
+    root = tempfile.mkdtemp(prefix='{0}{1}-'.format(TMP_PREFIX, os.getpid()), dir=store_dir)
+
+    try:
+        with _Writer(store_dir, jobs) as writer:
+            try:
+                if archive.lower().endswith(ZIP_SUFFIXES):
+                    links = _extract_zip(archive, root, writer)
+                else:
+                    links = _extract_tar(archive, root, writer)
+            finally:
+                writer.wait()
+        _make_links(root, links)
+    except BaseException:
+        shutil.rmtree(root, ignore_errors=True)
+        raise
+
+    return root, writer.stats()
+
+
+def install(archive, store_dir, jobs=8):
+    """
+    Extract the archive and move it to store_dir/<the top directory of the archive>
+
+    :return: (JDK home, Stats)
+    raise UnsupportedArchiveError, UnsafeArchiveError, NotJDKArchiveError, JDKExistsError
+    """
+    root, stats = extract(archive, store_dir, jobs)
+
+    try:
+        home = find_home(root)
+        if home is None:
+            raise NotJDKArchiveError(archive)
+
+        names = os.listdir(root)
+        if len(names) == 1 and os.path.isdir(os.path.join(root, names[0])):  # jdk-17.0.9+9/...
+            top, target = os.path.join(root, names[0]), os.path.join(store_dir, names[0])
+        else:
+            top, target = root, os.path.join(store_dir, _archive_name(archive))
+
+        if os.path.lexists(target):
+            raise JDKExistsError(target)
+        os.rename(top, target)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return os.path.normpath(os.path.join(target, os.path.relpath(home, top))), stats
+
+
+def uninstall(home, store_dir):
+    """
+    Remove the installed JDK of the home, it's renamed away first, so it's gone at once even if the removal stops
+
+    raise NotInstalledError
+    """
+    top = next((path for path in installed_dirs(store_dir)
+                if os.path.abspath(home) == path or is_installed(home, path)), None)
+    if top is None:
+        raise NotInstalledError(home)
+
+    trash = tempfile.mkdtemp(prefix='{0}{1}-'.format(TRASH_PREFIX, os.getpid()), dir=store_dir)
+    os.rename(top, os.path.join(trash, os.path.basename(top)))
+    shutil.rmtree(trash, ignore_errors=True)
+
+    return top
+
+
+LEFT_AFTER = 24 * 3600  # seconds, a directory of a process this old is left over on Windows
+
+
+def _is_left(path, pid):
+    """the process of the directory is gone, it's told by the age of it on Windows"""
+    if iswin():
+        return time.time() - os.stat(path).st_mtime > LEFT_AFTER
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+
+    return False
+
+
+def gc(store_dir):
+    """
+    Remove the files of the store no installed JDK links and the directories left by
+    the extractions and removals of the processes gone
+
+    :return: (removed files, reclaimed bytes, removed directories)
+    """
+    removed_dirs = 0
+    for name in os.listdir(store_dir) if os.path.isdir(store_dir) else []:
+        if name.startswith((TMP_PREFIX, TRASH_PREFIX)):
+            path, pid = os.path.join(store_dir, name), name.split('-')[1]
+            if not pid.isdigit() or _is_left(path, int(pid)):
+                shutil.rmtree(path, ignore_errors=True)
+                removed_dirs += 1
+
+    removed = reclaimed_bytes = 0
+    for dirpath, _, filenames in os.walk(objects_dir(store_dir)):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                st = os.lstat(path)
+                if st.st_nlink == 1:
+                    os.unlink(path)
+                    removed += 1
+                    reclaimed_bytes += st.st_size
+            except OSError:
+                continue
+
+    return removed, reclaimed_bytes, removed_dirs
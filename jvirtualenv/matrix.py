@@ -0,0 +1,163 @@
+# -*- coding:utf-8 -*-
+"""Run a command on several JDK without creating or sourcing any java virtual env, `jvirtualenv exec`
+
+The environment of each JDK is built in-process, the same as the one of a shell which sourced
+bin/activate of an env of the JDK: what the env activated in the current shell set is taken off first,
+then JAVA_HOME, JAVA_TAG, CLASSPATH and PATH are set.
+
+One JDK replaces the process by the command. Several ones run at the same time, at most `jobs` of them,
+with no stdin, and every line of their output is prefixed by the tag of its JDK:
+
+    $ jvirtualenv exec --java=8,11,17,21 -- ./gradlew test
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from jvirtualenv.api import environment_of, class_path_for, ENV_CONFIG_NAME
+from jvirtualenv.version import is_constraint
+
+
+Result = namedtuple('Result', 'label returncode seconds')
+
+
+def split_tags(text):
+    """
+    split the comma separated tags, the parts of a version constraint stay together
+
+    >>> split_tags('8,11,>=17,<21,21')
+    ['8', '11', '>=17,<21', '21']
+    """
+    tags = []
+    for part in filter(None, (part.strip() for part in text.split(','))):
+        if tags and part[0] in '<>=!~' and is_constraint(tags[-1]):
+            tags[-1] += ',' + part
+        else:
+            tags.append(part)
+
+    return tags
+
+
+def _read_environment(virtual_env):
+    """
+    :return: the values of the variables only the env sets, empty if the env was created by an old version,
+             None if it isn't a java virtual env, such as a Python venv
+    """
+    try:
+        with open(os.path.join(virtual_env, ENV_CONFIG_NAME), 'r') as f:
+            env_config = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        return {}
+
+    return (env_config.get('environment') if isinstance(env_config, dict) else None) or {}
+
+
+def deactivated_environ(environ):
+    """
+    environ taking off what bin/activate of the java virtual env in VIRTUAL_ENV did,
+    the old values saved by it are shell variables of the activated shell, which aren't exported,
+    so the ones put by the env are found and dropped instead.
+    Another kind of env in VIRTUAL_ENV, such as a Python venv, is left as it is.
+
+    :return: new dict
+    """
+    env = dict(environ)
+
+    virtual_env = env.get('VIRTUAL_ENV')
+    if not virtual_env:
+        return env
+
+    environment = _read_environment(virtual_env)
+    if environment is None:
+        return env
+
+    env.pop('VIRTUAL_ENV')
+
+    java_home = env.pop('JAVA_HOME', None)
+    java_tag = env.pop('JAVA_TAG', None)
+
+    env_bins = {os.path.join(virtual_env, 'bin')}
+    if java_home:
+        env_bins.add(os.path.join(java_home, 'bin'))
+    if 'PATH' in env:
+        env['PATH'] = os.pathsep.join(path for path in env['PATH'].split(os.pathsep) if path not in env_bins)
+
+    if java_home and java_tag and env.get('CLASSPATH') == class_path_for(java_home, java_tag):
+        env.pop('CLASSPATH')  # the default one of the env, it's set only if CLASSPATH is unset
+
+    for name, value in environment.items():
+        if not value or name not in env:
+            continue
+        if env[name] == value:
+            env.pop(name)
+        elif env[name].startswith(value + ' '):
+            env[name] = env[name][len(value) + 1:]
+
+    return env
+
+
+def jdk_environ(java_home, java_tag, environ=None):
+    """:return: new dict, the environment of the shell activating an env of the JDK, default to os.environ"""
+    return environment_of(java_home, java_tag, deactivated_environ(os.environ if environ is None else environ))
+
+
+def exec_command(command, env):
+    """replace the process by the command, it never returns"""
+    if sys.platform.startswith('win'):  # no real exec, run it and exit with its status
+        sys.exit(subprocess.call(command, env=env))
+
+    os.execvpe(command[0], command, env)
+
+
+def _exit_status(returncode):
+    """the killed ones get 128 + signal number, the same as the shell"""
+    return 128 - returncode if returncode < 0 else returncode
+
+
+def _run_prefixed(label, command, env, prefix, output_lock):
+    start = time.perf_counter()
+    try:
+        process = subprocess.Popen(command, env=env, stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    except OSError as ex:
+        with output_lock:
+            sys.stdout.buffer.write(prefix + '{0}\n'.format(ex).encode())
+            sys.stdout.flush()
+        return Result(label, 127, time.perf_counter() - start)
+
+    with process:
+        for line in process.stdout:
+            with output_lock:
+                sys.stdout.buffer.write(prefix + (line if line.endswith(b'\n') else line + b'\n'))
+                sys.stdout.flush()
+
+    return Result(label, _exit_status(process.returncode), time.perf_counter() - start)
+
+
+def run_matrix(entries, command, jobs=None):
+    """
+    :param entries: list of (label, env)
+    :return: list of Result, in the order of entries
+    """
+    width = max(len(label) for label, _ in entries)
+    output_lock = threading.Lock()
+
+    with ThreadPoolExecutor(max_workers=jobs or None) as executor:
+        futures = [executor.submit(_run_prefixed, label, command, env,
+                                   '[{0}] '.format(label.ljust(width)).encode(), output_lock)
+                   for label, env in entries]
+
+        return [future.result() for future in futures]
+
+
+def aggregate_status(results):
+    """:return: the exit status of the first failed one in order, 0 if all of them succeed"""
+    return next((result.returncode for result in results if result.returncode), 0)
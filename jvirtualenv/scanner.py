@@ -0,0 +1,253 @@
+# -*- coding:utf-8 -*-
+"""Find java executables by walking the filesystem, no `locate` database and no root needed
+
+search-pattern.json:
+    roots: directories to walk, `~` is expanded
+    patterns: regex matched against the path of java (with `/` as separator)
+    max_depth: how deep under each root a JDK home can be
+    prune: directory names which are never entered
+    scan_network_mounts: walk into nfs/cifs/sshfs... mounts or not
+"""
+
+import os
+import re
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from jvirtualenv.support.minghu6_support import iswin, get_drivers, atomic_write
+from jvirtualenv import trace
+
+
+NETWORK_FS_TYPES = {
+    'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'sshfs', 'fuse.sshfs', 'afs', 'ncpfs', '9p',
+    'ceph', 'fuse.ceph', 'glusterfs', 'fuse.glusterfs', 'lustre', 'davfs', 'fuse.s3fs', 'gpfs',
+}
+
+PSEUDO_FS_TYPES = {
+    'proc', 'sysfs', 'devtmpfs', 'devpts', 'cgroup', 'cgroup2', 'debugfs', 'tracefs', 'securityfs',
+    'pstore', 'bpf', 'configfs', 'fusectl', 'mqueue', 'hugetlbfs', 'autofs', 'binfmt_misc', 'efivarfs',
+}
+
+
+def default_search_pattern():
+    search_pattern = OrderedDict()
+
+    if iswin():
+        roots = []
+        for driver in get_drivers():
+            for each_dir in ('Program Files (x86)', 'Program Files', 'ProgramData'):
+                roots.append(os.path.join(driver, os.sep, each_dir))
+        roots.append(os.curdir)
+
+        search_pattern['roots'] = roots
+        search_pattern['patterns'] = [r'^.*/bin/java\.exe$']
+    else:
+        search_pattern['roots'] = [
+            '/opt',
+            '/usr/lib/jvm',
+            '/usr/lib64/jvm',
+            '/usr/java',
+            '/usr/local',
+            '/Library/Java/JavaVirtualMachines',
+            '~',
+        ]
+        search_pattern['patterns'] = [
+            r'^.*/jdk[^/]*/bin/java$',
+            r'^.*/java/[^/]+/bin/java$',
+            r'^.*/jvm/[^/]+/bin/java$',
+            r'^.*/Contents/Home/bin/java$',
+        ]
+
+    search_pattern['max_depth'] = 6
+    search_pattern['prune'] = [
+        'proc', 'sys', 'dev', 'run', 'node_modules', '.git', '.hg', '.svn', '__pycache__',
+        '.cache', '.m2', '.gradle', '.npm', '.cargo', '.rustup', 'site-packages',
+    ]
+    search_pattern['scan_network_mounts'] = False
+
+    return search_pattern
+
+
+def load_search_pattern(path):
+    """the default search pattern updated by the config file, it's created if missing"""
+    search_pattern = default_search_pattern()
+
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            search_pattern.update(json.load(f, object_pairs_hook=OrderedDict))
+    else:
+        atomic_write(path, json.dumps(search_pattern, indent=4))
+
+    return search_pattern
+
+
+def _unescape_mount_path(path):
+    return re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), path)
+
+
+def skipped_mounts(scan_network_mounts=False):
+    """mount points of pseudo and (optional) network filesystems, empty if /proc/self/mounts isn't there"""
+    skip_types = set(PSEUDO_FS_TYPES)
+    if not scan_network_mounts:
+        skip_types |= NETWORK_FS_TYPES
+
+    mounts = set()
+    try:
+        with open('/proc/self/mounts', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 3 and fields[2] in skip_types:
+                    mounts.add(_unescape_mount_path(fields[1]))
+    except OSError:
+        pass
+
+    return mounts
+
+
+def _is_jdk_home(path):
+    bin_path = os.path.join(path, 'bin')
+    return any(os.path.isfile(os.path.join(bin_path, name)) for name in ('javac', 'javac.exe'))
+
+
+def _scan_root(root, regexes, max_depth, prune, skip_mounts):
+    """yield the java paths under root, in the order of the names"""
+    java_names = ('java.exe', ) if iswin() else ('java', )
+    stack = [(root, 0)]
+
+    while stack:
+        path, depth = stack.pop()
+
+        try:
+            with os.scandir(path) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            try:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+            except OSError:
+                continue
+
+            if entry.name == 'bin':
+                for java_name in java_names:
+                    java_path = os.path.join(entry.path, java_name)
+                    if os.path.isfile(java_path) and \
+                            any(regex.match(java_path.replace(os.sep, '/')) for regex in regexes):
+                        yield java_path
+
+            elif depth < max_depth and entry.name not in prune and entry.path not in skip_mounts:
+                subdirs.append(entry.path)
+
+        if _is_jdk_home(path):  # nothing more inside a JDK, such as jdk8's jre
+            continue
+
+        stack.extend((subdir, depth + 1) for subdir in reversed(subdirs))
+
+
+def _scan_root_to_queue(index, root, args, queue, stop):
+    with trace.span(root, cat='scan') as span_args:
+        found = 0
+        try:
+            for java_path in _scan_root(root, *args):
+                if stop.is_set():
+                    span_args['status'] = 'stopped'
+                    break
+
+                queue.put((index, java_path))
+                found += 1
+        finally:
+            span_args['found'] = found
+            queue.put(None)  # the end of the root
+
+
+def search_roots(search_pattern):
+    """the existing roots with `~` expanded"""
+    roots = [os.path.abspath(os.path.expanduser(root)) for root in search_pattern['roots']]
+    return [root for root in OrderedDict.fromkeys(roots) if os.path.isdir(root)]
+
+
+def _existing_roots(search_pattern, roots):
+    if roots is None:
+        return search_roots(search_pattern)
+    else:
+        return [root for root in OrderedDict.fromkeys(roots) if os.path.isdir(root)]
+
+
+def _iter_found(search_pattern, jobs, roots):
+    """yield (index of the root, java path) as soon as one is found, the roots are walked concurrently"""
+    from queue import Queue
+    from threading import Event
+
+    regexes = [re.compile(pattern, re.I if iswin() else 0) for pattern in search_pattern['patterns']]
+    args = (regexes, int(search_pattern['max_depth']), set(search_pattern['prune']),
+            skipped_mounts(search_pattern['scan_network_mounts']))
+
+    if not roots:
+        return
+
+    queue = Queue()
+    stop = Event()
+
+    with ThreadPoolExecutor(max_workers=jobs or len(roots)) as executor:
+        futures = [executor.submit(_scan_root_to_queue, index, root, args, queue, stop)
+                   for index, root in enumerate(roots)]
+
+        try:
+            ended = 0
+            while ended < len(roots):
+                item = queue.get()
+                if item is None:
+                    ended += 1
+                else:
+                    yield item
+        finally:
+            stop.set()  # the consumer may stop early
+
+    for future in futures:
+        future.result()  # raise the error of the walk
+
+
+def iter_java_paths(search_pattern, jobs=None, roots=None):
+    """
+    Walk every root concurrently and yield each java path as soon as it's found,
+    the order across the roots isn't stable, sort them with scan_order_key.
+    roots of search_pattern are used if roots is None
+    """
+    seen = set()
+    for _, java_path in _iter_found(search_pattern, jobs, _existing_roots(search_pattern, roots)):
+        if java_path not in seen:
+            seen.add(java_path)
+            yield java_path
+
+
+def scan_java_paths(search_pattern, jobs=None, roots=None):
+    """
+    Walk every root concurrently, roots of search_pattern are used if roots is None
+
+    :return: java paths, in the order of roots and then of the names
+    """
+    roots = _existing_roots(search_pattern, roots)
+
+    found = [[] for _ in roots]
+    for index, java_path in _iter_found(search_pattern, jobs, roots):
+        found[index].append(java_path)
+
+    return list(OrderedDict.fromkeys(java_path for each_found in found for java_path in each_found))
+
+
+def scan_order_key(roots):
+    """
+    :return: sort key of paths, in the order of roots and then of the names, the same as scan_java_paths,
+             paths under none of the roots are the last ones
+    """
+    prefixes = [root.rstrip(os.sep) + os.sep for root in roots]
+
+    def key(path):
+        index = next((i for i, prefix in enumerate(prefixes) if path.startswith(prefix)), len(prefixes))
+        return index, path.split(os.sep)
+
+    return key
@@ -0,0 +1,142 @@
+# -*- coding:utf-8 -*-
+"""Resident resolver of the catalog on a Unix socket, `jvirtualenv serve`
+
+A request is one line, and so is its response, a connection may send as many as it likes:
+
+    resolve <tag>       ok <version info json, null if nothing matches>
+    project <dir>       ok <version info json or null>, the JDK of the env the dir is in, or of its .java-version
+    list                ok <json list of version info>
+    env <tag>           ok <json of the variables activating the tag, PATH is the directory to put in front>
+    ping                ok <pid of the server>
+
+An error is `err <kind> <message>`, kind is constraint (invalid version constraint), notag,
+nocatalog or request. The catalog is kept in memory by jvirtualenv.api, one stat of tag-list.json
+per request tells whether it changed, and it's parsed again then. The JDK resolved are checked by stat
+on every request too, the ones changed since `reinit-tag` are skipped.
+
+    $ printf 'resolve 17\\n' | nc -U ~/.jvirtualenv.d/serve.sock
+"""
+
+import os
+import json
+import signal
+import socket
+import socketserver
+
+from jvirtualenv import api
+from jvirtualenv.version import InvalidConstraintError
+from jvirtualenv.jdkinfo import forget_fingerprints
+
+
+SOCKET_NAME = 'serve.sock'
+
+
+class ServerRunningError(Exception):
+    """The first arg of the exception should be the socket path"""
+    pass
+
+
+class UnixSocketUnsupportedError(OSError):
+    pass
+
+
+def socket_path(config_dir):
+    return os.path.join(config_dir, SOCKET_NAME)
+
+
+def _ok(value):
+    return 'ok ' + json.dumps(value, default=lambda o: o.__str__())
+
+
+def handle_line(line, config_dir):
+    """:return: the response line without the line break"""
+    command, _, argument = line.strip().partition(' ')
+    argument = argument.strip()
+    forget_fingerprints()  # the stat of the JDK are cached per process, but the server lives long
+
+    try:
+        if command == 'resolve' and argument:
+            return _ok(api.resolve(argument, config_dir))
+        elif command == 'project' and argument:
+            return _ok(api.resolve_project(argument, config_dir))
+        elif command == 'list':
+            return _ok(api.list_jdks(config_dir))
+        elif command == 'env' and argument:
+            return _ok(api.environment_for(argument, config_dir, base_env={}))
+        elif command == 'ping':
+            return _ok(os.getpid())
+        else:
+            return 'err request unknown request {0!r}'.format(line.strip())
+    except InvalidConstraintError as ex:
+        return 'err constraint {0}'.format(ex.args[0])
+    except api.NoMatchedTagError as ex:
+        return 'err notag {0}'.format(ex.args[0])
+    except FileNotFoundError as ex:
+        return 'err nocatalog {0}'.format(ex)
+    except (OSError, ValueError, KeyError) as ex:
+        return 'err request {0!r}'.format(ex)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            response = handle_line(line.decode('utf-8', 'replace'), self.server.config_dir)
+            self.wfile.write(response.encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+def is_running(path):
+    if not hasattr(socket, 'AF_UNIX'):
+        return False
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+
+    return True
+
+
+def make_server(config_dir, path=None):
+    """
+    Bind the socket, a stale one left by a server gone is removed
+
+    raise ServerRunningError, UnixSocketUnsupportedError
+    """
+    if not hasattr(socketserver, 'ThreadingUnixStreamServer'):
+        raise UnixSocketUnsupportedError('Unix socket is not supported on this platform')
+
+    path = path or socket_path(config_dir)
+    if is_running(path):
+        raise ServerRunningError(path)
+    if os.path.lexists(path):
+        os.unlink(path)
+
+    class Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+    old_umask = os.umask(0o177)  # the socket is of the user only
+    try:
+        server = Server(path, _Handler)
+    finally:
+        os.umask(old_umask)
+    server.config_dir = config_dir
+
+    return server
+
+
+def serve(server):
+    """serve until it's interrupted or terminated, and then remove the socket"""
+    def terminate(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, terminate)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(server.server_address)
+        except OSError:
+            pass
@@ -1,18 +1,37 @@
 # -*- coding:utf-8 -*-
 """Supported by minghu6 package"""
 
-from threading import Thread
-from subprocess import Popen, PIPE
 import codecs
 import locale
-import platform
-import ctypes
-from functools import partial
-import inspect
+import importlib
+from functools import partial, lru_cache
 import os
+import errno
+import signal
 import sys
 
 
+class LazyModule(object):
+    """
+    Import the module at the first time one of its attributes is used,
+    so the import is paid only by the code path needing it.
+
+    >>> json = LazyModule('json')
+    >>> json.dumps([1])
+    '[1]'
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+
+        return getattr(self._module, attr)
+
+
 # minghu6.algs.decorator.handle_exception
 def handle_excpetion(exception_handler, exception_classes):
     """
@@ -43,7 +62,7 @@ def handle_excpetion(exception_handler, exception_classes):
     def wrapper(func):
         nonlocal exception_classes
 
-        if inspect.isclass(exception_classes):
+        if isinstance(exception_classes, type):
             exception_classes = [exception_classes]
 
         exception_chain = list(exception_classes)
@@ -71,18 +90,43 @@ def get_locale_codec():
     return codecs.lookup(locale.getpreferredencoding()).name
 
 
+def _kill_group(p):
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(p.pid, signal.SIGKILL)
+            return
+        except OSError:  # it's gone already
+            pass
+    p.kill()
+
+
 # minghu6.etc.cmd.exec_cmd
-def exec_cmd(cmd, shell=True):
+def exec_cmd(cmd, shell=True, timeout=None):
     """
     only can be used in shell
     :param cmd:" " or []
     :param shell: default True
+    :param timeout: seconds to wait, on expiry the process and its children are killed and TimeoutExpired is raised
     :return: [str1,str2,...]
     """
+    from subprocess import Popen, PIPE, TimeoutExpired
 
-    p = Popen(cmd, stdout=PIPE, stderr=PIPE, shell=shell)
+    # in its own process group, so a wrapper script is killed with the java it started
+    p = Popen(cmd, stdout=PIPE, stderr=PIPE, shell=shell, start_new_session=not iswin())
 
-    stdout_data, stderr_data = p.communicate()
+    try:
+        stdout_data, stderr_data = p.communicate(timeout=timeout)
+    except TimeoutExpired:
+        _kill_group(p)
+        try:
+            p.communicate(timeout=1)
+        except TimeoutExpired:  # such as a process stuck on a stale NFS mount holding the pipes, don't wait for it
+            for pipe in (p.stdout, p.stderr):
+                try:
+                    pipe.close()
+                except OSError:
+                    pass
+        raise
 
     codec = get_locale_codec()
 
@@ -163,98 +207,125 @@ def path_to(from_path: str, to_path: str):
     return target_path
 
 
-def get_home_dir():
-    return os.path.expanduser('~')
+def atomic_write(path, content, mode=0o644):
+    """
+    Write to a temporary file in the same directory and rename it to path,
+    so the others see either the old file or the whole new one.
+    """
+    import tempfile
 
+    dir_path, name = os.path.split(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.%s.' % name, suffix='.tmp', dir=dir_path)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def link_over(source, path):
+    """replace path by a hard link of source atomically, the others see either the old file or the link"""
+    import tempfile
+
+    dir_path, name = os.path.split(os.path.abspath(path))
+    for _ in range(tempfile.TMP_MAX):  # a unique name, a run crashed or going on at the same time has its own
+        tmp_path = tempfile.mktemp(prefix='.%s.' % name, suffix='.link.tmp', dir=dir_path)
+        try:
+            os.link(source, tmp_path)
+            break
+        except FileExistsError:
+            continue
+    else:
+        raise FileExistsError(errno.EEXIST, 'No usable temporary file name found', path)
 
-def iswin():
-    return platform.platform().upper().startswith('WIN')
+    try:
+        os.replace(tmp_path, path)
+    finally:
+        # rename does nothing if path is a link of source already, the temporary link is left then
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
 
 
-def get_drivers():
-    if not iswin():
-        raise OSError('only support in Windows')
+class FileLock(object):
+    """
+    Exclusive lock between processes on a lock file, blocks until it's got.
+    Not reentrant, don't take it again in the same process while holding it.
+    """
 
-    lp_buffer = ctypes.create_string_buffer(78)
-    ctypes.windll.kernel32.GetLogicalDriveStringsA(ctypes.sizeof(lp_buffer), lp_buffer)
-    drivers = lp_buffer.raw.split(b'\x00')
+    def __init__(self, path):
+        self.path = path
+        self._f = None
 
-    return [each_driver.decode()[:2] for each_driver in drivers if each_driver and os.path.isdir(each_driver)]
+    def __enter__(self):
+        self._f = open(self.path, 'a+')
 
+        try:
+            if iswin():
+                import msvcrt
+                import time
 
-try:
-    from Queue import Queue, Empty
-except ImportError:
-    from queue import Queue, Empty  # python 3.x
+                while True:
+                    try:
+                        msvcrt.locking(self._f.fileno(), msvcrt.LK_LOCK, 1)  # it gives up after 10s
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+            else:
+                import fcntl
 
+                fcntl.flock(self._f.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            self._f.close()
+            raise
 
-class CommandRunner(object):
-    """Inspired by https://stackoverflow.com/questions/375427/non-blocking-read-on-a-subprocess-pipe-in-python"""
-    ON_POSIX = 'posix' in sys.builtin_module_names
+        return self
 
-    @classmethod
-    def _enqueue_output(cls, process, out, queue):
-        for line in iter(out.readline, b''):
-            queue.put(line)
+    def __exit__(self, *exc_info):
+        try:
+            if iswin():
+                import msvcrt
 
-        process.terminate()
-        process.poll()
+                self._f.seek(0)
+                msvcrt.locking(self._f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
 
-    @classmethod
-    def run(cls, cmd):
+                fcntl.flock(self._f.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._f.close()
+            self._f = None
 
-        p = Popen('{cmd} && exit'.format(cmd=cmd), stdout=PIPE, stderr=PIPE, bufsize=1,
-                  close_fds=CommandRunner.ON_POSIX, shell=True)
-        q = Queue()
-        t_stdout = Thread(target=CommandRunner._enqueue_output, name='{cmd} fetch stdout'.format(cmd=cmd),
-                          args=(p, p.stdout, q), daemon=True)
-        t_stderr = Thread(target=CommandRunner._enqueue_output, name='{cmd} fetch stderr'.format(cmd=cmd),
-                          args=(p, p.stderr, q), daemon=True)
 
-        t_stdout.start()
-        t_stderr.start()
+def get_home_dir():
+    return os.path.expanduser('~')
 
-        # read line without blocking
-        codec = get_locale_codec()
-        while p.returncode is None:
-            try:
-                line = q.get(timeout=.1)
-                line = line.strip().decode(codec, errors='ignore')
-            except Empty:
-                pass
-            else:  # got line
-                yield line
 
+@lru_cache(maxsize=None)
+def iswin():
+    return sys.platform.startswith('win')
 
-def isiterable(obj, but_str_bytes=True):
-    """
-    :param obj:
-    :param but_str_bytes: most of time, we don't need str and bytes
-    :return:
-    """
-    from collections import Iterable
-    if but_str_bytes and isinstance(obj, (str, bytes, bytearray)):
-        return False
-    else:
-        return isinstance(obj, Iterable)
 
+def get_drivers():
+    if not iswin():
+        raise OSError('only support in Windows')
 
-def find_wrapper(start_dir, pattern):
-    if not isiterable(pattern):
-        pattern = [pattern]
+    import ctypes
 
-    command_runner = CommandRunner()
-    if iswin():
-        cmd = 'where /R "{start_dir}" {pattern}'.format(start_dir=start_dir, pattern=' '.join(pattern))
-    else:
-        cmd = 'find {start_dir} {pattern}'.format(
-            start_dir=start_dir,
-            pattern=' '.join(['-name "%s"' % each_pattern for each_pattern in pattern])
-        )
-
-    for line in command_runner.run(cmd):
-        if os.path.exists(line):
-            yield line
+    lp_buffer = ctypes.create_string_buffer(78)
+    ctypes.windll.kernel32.GetLogicalDriveStringsA(ctypes.sizeof(lp_buffer), lp_buffer)
+    drivers = lp_buffer.raw.split(b'\x00')
+
+    return [each_driver.decode()[:2] for each_driver in drivers if each_driver and os.path.isdir(each_driver)]
 
 
 def getone(l, i, default = None):
@@ -1,7 +1,8 @@
 # -*- coding:utf-8 -*-
 template = """
-# This file must be used with "source bin/activate" *from bash*
-# you cannot run it directly
+# This file must be used with "source bin/activate" *from bash or zsh*
+# or ". bin/activate" *from POSIX sh*, you cannot run it directly
+# Only builtins of the shell are used, it never forks
 
 deactivate () {
 
@@ -17,24 +18,64 @@ deactivate () {
         JAVA_HOME="$_OLD_VIRTUAL_JAVA_HOME"
         export JAVA_HOME
         unset _OLD_VIRTUAL_JAVA_HOME
+    elif ! [ -z "${_VIRTUAL_JAVA_HOME_UNSET+_}" ] ; then
+        unset JAVA_HOME
     fi
-
-    JAVA_TAG="$_OLD_VIRTUAL_JAVA_TAG"
-    export JAVA_TAG
-    unset _OLD_VIRTUAL_JAVA_TAG
+    unset _VIRTUAL_JAVA_HOME_UNSET
+
+    if ! [ -z "${_OLD_VIRTUAL_JAVA_TAG+_}" ] ; then
+        JAVA_TAG="$_OLD_VIRTUAL_JAVA_TAG"
+        export JAVA_TAG
+        unset _OLD_VIRTUAL_JAVA_TAG
+    elif ! [ -z "${_VIRTUAL_JAVA_TAG_UNSET+_}" ] ; then
+        unset JAVA_TAG
+    fi
+    unset _VIRTUAL_JAVA_TAG_UNSET
 
     if ! [ -z "${_OLD_VIRTUAL_CLASSPATH+_}" ] ; then
         CLASSPATH="$_OLD_VIRTUAL_CLASSPATH"
         export CLASSPATH
         unset _OLD_VIRTUAL_CLASSPATH
+    elif ! [ -z "${_VIRTUAL_CLASSPATH_UNSET+_}" ] ; then
+        unset CLASSPATH
     fi
-
-    # This should detect bash and zsh, which have a hash command that must
-    # be called to get it to forget past commands.  Without forgetting
-    # past commands the $PATH changes we made may not be respected
-    if [ -n "${BASH-}" ] || [ -n "${ZSH_VERSION-}" ] ; then
-        hash -r 2>/dev/null
+    unset _VIRTUAL_CLASSPATH_UNSET
+
+    if ! [ -z "${_OLD_VIRTUAL_JAVA_TOOL_OPTIONS+_}" ] ; then
+        JAVA_TOOL_OPTIONS="$_OLD_VIRTUAL_JAVA_TOOL_OPTIONS"
+        export JAVA_TOOL_OPTIONS
+        unset _OLD_VIRTUAL_JAVA_TOOL_OPTIONS
+    elif ! [ -z "${_VIRTUAL_JAVA_TOOL_OPTIONS_UNSET+_}" ] ; then
+        unset JAVA_TOOL_OPTIONS
+    fi
+    unset _VIRTUAL_JAVA_TOOL_OPTIONS_UNSET
+
+    if ! [ -z "${_OLD_VIRTUAL_JDK_JAVA_OPTIONS+_}" ] ; then
+        JDK_JAVA_OPTIONS="$_OLD_VIRTUAL_JDK_JAVA_OPTIONS"
+        export JDK_JAVA_OPTIONS
+        unset _OLD_VIRTUAL_JDK_JAVA_OPTIONS
+    elif ! [ -z "${_VIRTUAL_JDK_JAVA_OPTIONS_UNSET+_}" ] ; then
+        unset JDK_JAVA_OPTIONS
+    fi
+    unset _VIRTUAL_JDK_JAVA_OPTIONS_UNSET
+
+    if ! [ -z "${_OLD_VIRTUAL_GRADLE_USER_HOME+_}" ] ; then
+        GRADLE_USER_HOME="$_OLD_VIRTUAL_GRADLE_USER_HOME"
+        export GRADLE_USER_HOME
+        unset _OLD_VIRTUAL_GRADLE_USER_HOME
+    elif ! [ -z "${_VIRTUAL_GRADLE_USER_HOME_UNSET+_}" ] ; then
+        unset GRADLE_USER_HOME
+    fi
+    unset _VIRTUAL_GRADLE_USER_HOME_UNSET
+
+    if ! [ -z "${_OLD_VIRTUAL_MAVEN_OPTS+_}" ] ; then
+        MAVEN_OPTS="$_OLD_VIRTUAL_MAVEN_OPTS"
+        export MAVEN_OPTS
+        unset _OLD_VIRTUAL_MAVEN_OPTS
+    elif ! [ -z "${_VIRTUAL_MAVEN_OPTS_UNSET+_}" ] ; then
+        unset MAVEN_OPTS
     fi
+    unset _VIRTUAL_MAVEN_OPTS_UNSET
 
     if ! [ -z "${_OLD_VIRTUAL_PS1+_}" ] ; then
         PS1="$_OLD_VIRTUAL_PS1"
@@ -44,7 +85,15 @@ deactivate () {
 
     unset VIRTUAL_ENV
     if [ ! "${1-}" = "nondestructive" ] ; then
-    # Self destruct!
+        # This should detect bash and zsh, which have a hash command that must
+        # be called to get it to forget past commands.  Without forgetting
+        # past commands the $PATH changes we made may not be respected,
+        # the activation does it once at the end
+        if [ -n "${BASH-}" ] || [ -n "${ZSH_VERSION-}" ] ; then
+            hash -r 2>/dev/null
+        fi
+
+        # Self destruct!
         unset -f deactivate
     fi
 }
@@ -52,49 +101,117 @@ deactivate () {
 # unset irrelevant variables
 deactivate nondestructive
 
-VIRTUAL_ENV="__VIRTUAL_ENV__"
+VIRTUAL_ENV=__VIRTUAL_ENV__
 export VIRTUAL_ENV
 
-# save PATH
+# save PATH, it's restored as it is by deactivate
 _OLD_VIRTUAL_PATH="$PATH"
-PATH="$VIRTUAL_ENV/bin:$PATH"
 
-# unset JAVA_HOME if set
+# save JAVA_HOME, JAVA_TAG and CLASSPATH, or mark them unset, so deactivate puts back what the user had,
+# not what an env activated before set
 if ! [ -z "${JAVA_HOME+_}" ] ; then
     _OLD_VIRTUAL_JAVA_HOME="$JAVA_HOME"
-    unset JAVA_HOME
+else
+    _VIRTUAL_JAVA_HOME_UNSET=1
 fi
-# set new JAVA_HOME
-JAVA_HOME="__JAVA_HOME__"
+JAVA_HOME=__JAVA_HOME__
 export JAVA_HOME
 
-# unset JAVA_TAG if set
 if ! [ -z "${JAVA_TAG+_}" ] ; then
     _OLD_VIRTUAL_JAVA_TAG="$JAVA_TAG"
-    unset JAVA_TAG
+else
+    _VIRTUAL_JAVA_TAG_UNSET=1
 fi
-# set new JAVA_TAG
-JAVA_TAG="__JAVA_TAG__"
+JAVA_TAG=__JAVA_TAG__
 export JAVA_TAG
 
 # inherit from old CLASSPATH
 if ! [ -z "${CLASSPATH+_}" ] ; then
     _OLD_VIRTUAL_CLASSPATH="$CLASSPATH"
 else
-    CLASSPATH="__CLASSPATH__"
+    _VIRTUAL_CLASSPATH_UNSET=1
+    CLASSPATH=__CLASSPATH__
 fi
 export CLASSPATH
 
-PATH="$JAVA_HOME/bin:$PATH"
-export PATH
+# JVM options of the env, such as the class data sharing archive, before the ones of the user
+_VIRTUAL_JAVA_TOOL_OPTIONS=__JAVA_TOOL_OPTIONS__
+if [ -n "$_VIRTUAL_JAVA_TOOL_OPTIONS" ] ; then
+    if ! [ -z "${JAVA_TOOL_OPTIONS+_}" ] ; then
+        _OLD_VIRTUAL_JAVA_TOOL_OPTIONS="$JAVA_TOOL_OPTIONS"
+        JAVA_TOOL_OPTIONS="$_VIRTUAL_JAVA_TOOL_OPTIONS $JAVA_TOOL_OPTIONS"
+    else
+        _VIRTUAL_JAVA_TOOL_OPTIONS_UNSET=1
+        JAVA_TOOL_OPTIONS="$_VIRTUAL_JAVA_TOOL_OPTIONS"
+    fi
+    export JAVA_TOOL_OPTIONS
+fi
+unset _VIRTUAL_JAVA_TOOL_OPTIONS
+
+# options of the java launcher of the env (JDK 9+), such as the tuning profile, before the ones of the user
+_VIRTUAL_JDK_JAVA_OPTIONS=__JDK_JAVA_OPTIONS__
+if [ -n "$_VIRTUAL_JDK_JAVA_OPTIONS" ] ; then
+    if ! [ -z "${JDK_JAVA_OPTIONS+_}" ] ; then
+        _OLD_VIRTUAL_JDK_JAVA_OPTIONS="$JDK_JAVA_OPTIONS"
+        JDK_JAVA_OPTIONS="$_VIRTUAL_JDK_JAVA_OPTIONS $JDK_JAVA_OPTIONS"
+    else
+        _VIRTUAL_JDK_JAVA_OPTIONS_UNSET=1
+        JDK_JAVA_OPTIONS="$_VIRTUAL_JDK_JAVA_OPTIONS"
+    fi
+    export JDK_JAVA_OPTIONS
+fi
+unset _VIRTUAL_JDK_JAVA_OPTIONS
 
-if [ -z "${VIRTUAL_ENV_DISABLE_PROMPT-}" ] ; then
-    _OLD_VIRTUAL_PS1="$PS1"
-    if [ "x" != x ] ; then
-        PS1="$PS1"
+# build caches of the env, Gradle user home and Maven local repository, not shared with the envs of other JDK
+_VIRTUAL_GRADLE_USER_HOME=__GRADLE_USER_HOME__
+if [ -n "$_VIRTUAL_GRADLE_USER_HOME" ] ; then
+    if ! [ -z "${GRADLE_USER_HOME+_}" ] ; then
+        _OLD_VIRTUAL_GRADLE_USER_HOME="$GRADLE_USER_HOME"
+    else
+        _VIRTUAL_GRADLE_USER_HOME_UNSET=1
+    fi
+    GRADLE_USER_HOME="$_VIRTUAL_GRADLE_USER_HOME"
+    export GRADLE_USER_HOME
+fi
+unset _VIRTUAL_GRADLE_USER_HOME
+
+_VIRTUAL_MAVEN_OPTS=__MAVEN_OPTS__
+if [ -n "$_VIRTUAL_MAVEN_OPTS" ] ; then
+    if ! [ -z "${MAVEN_OPTS+_}" ] ; then
+        _OLD_VIRTUAL_MAVEN_OPTS="$MAVEN_OPTS"
+        MAVEN_OPTS="$_VIRTUAL_MAVEN_OPTS $MAVEN_OPTS"
     else
-        PS1="(`basename \"$VIRTUAL_ENV\"`: $JAVA_TAG) $PS1"
+        _VIRTUAL_MAVEN_OPTS_UNSET=1
+        MAVEN_OPTS="$_VIRTUAL_MAVEN_OPTS"
     fi
+    export MAVEN_OPTS
+fi
+unset _VIRTUAL_MAVEN_OPTS
+
+# drop the bin directories of the env left in PATH, such as by a subshell of an activated shell,
+# so they aren't duplicated however many times the env is activated
+_VIRTUAL_PATH=":$PATH"
+case "$_VIRTUAL_PATH:" in
+    *":$JAVA_HOME/bin:"*|*":$VIRTUAL_ENV/bin:"*)
+        _VIRTUAL_PATH=
+        _VIRTUAL_PATH_REST="$PATH:"
+        while [ -n "$_VIRTUAL_PATH_REST" ] ; do
+            _VIRTUAL_PATH_ENTRY="${_VIRTUAL_PATH_REST%%:*}"
+            _VIRTUAL_PATH_REST="${_VIRTUAL_PATH_REST#*:}"
+            case "$_VIRTUAL_PATH_ENTRY" in
+                "$JAVA_HOME/bin"|"$VIRTUAL_ENV/bin") ;;
+                *) _VIRTUAL_PATH="$_VIRTUAL_PATH:$_VIRTUAL_PATH_ENTRY" ;;
+            esac
+        done
+        ;;
+esac
+PATH="$JAVA_HOME/bin:$VIRTUAL_ENV/bin$_VIRTUAL_PATH"
+export PATH
+unset _VIRTUAL_PATH _VIRTUAL_PATH_REST _VIRTUAL_PATH_ENTRY
+
+if [ -z "${VIRTUAL_ENV_DISABLE_PROMPT-}" ] ; then
+    _OLD_VIRTUAL_PS1="${PS1-}"
+    PS1="("__ENV_NAME__": $JAVA_TAG) ${PS1-}"
     export PS1
 fi
 
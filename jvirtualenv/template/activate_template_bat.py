@@ -1,8 +1,13 @@
-# -*- Coding:utf-8 -*-
+# -*- coding:utf-8 -*-
 
 template = """
 @echo off
-set "VIRTUAL_ENV="__VIRTUAL_ENV__""
+
+REM put back the variables saved by the env activated before, the same as the other shells do,
+REM so its options aren't put in front again and the saved values stay the ones of the user
+if defined _OLD_VIRTUAL_PATH if exist "%~dp0deactivate.bat" call "%~dp0deactivate.bat"
+
+set "VIRTUAL_ENV=__VIRTUAL_ENV__"
 
 if defined _OLD_VIRTUAL_PROMPT (
     set "PROMPT=%_OLD_VIRTUAL_PROMPT%"
@@ -12,7 +17,7 @@ if defined _OLD_VIRTUAL_PROMPT (
     )
     set "_OLD_VIRTUAL_PROMPT=%PROMPT%"
 )
-set "PROMPT=("__JAVA_TAG__") %PROMPT%"
+set "PROMPT=(__JAVA_TAG__) %PROMPT%"
 
 
 set "_OLD_VIRTUAL_JAVA_HOME=%JAVA_HOME%"
@@ -21,14 +26,64 @@ if defined JAVA_HOME (
 ) else (
     set "_OLD_VIRTUAL_JAVA_HOME="
 )
-set "JAVA_HOME="__JAVA_HOME__""
+set "JAVA_HOME=__JAVA_HOME__"
 
 if defined CLASSPATH (
     set "_OLD_VIRTUAL_CLASSPATH=%CLASSPATH%"
 ) else (
     set "_OLD_VIRTUAL_CLASSPATH="
 )
-set "CLASSPATH="__CLASSPATH__""
+set "CLASSPATH=__CLASSPATH__"
+
+REM JVM options of the env, such as the class data sharing archive, before the ones of the user
+set "_VIRTUAL_JAVA_TOOL_OPTIONS=__JAVA_TOOL_OPTIONS__"
+if not defined _VIRTUAL_JAVA_TOOL_OPTIONS goto ENDIFVOPTIONS
+    if defined JAVA_TOOL_OPTIONS (
+        set "_OLD_VIRTUAL_JAVA_TOOL_OPTIONS=%JAVA_TOOL_OPTIONS%"
+        set "JAVA_TOOL_OPTIONS=%_VIRTUAL_JAVA_TOOL_OPTIONS% %JAVA_TOOL_OPTIONS%"
+    ) else (
+        set "_VIRTUAL_JAVA_TOOL_OPTIONS_UNSET=1"
+        set "JAVA_TOOL_OPTIONS=%_VIRTUAL_JAVA_TOOL_OPTIONS%"
+    )
+:ENDIFVOPTIONS
+set "_VIRTUAL_JAVA_TOOL_OPTIONS="
+
+REM options of the java launcher of the env (JDK 9+), such as the tuning profile, before the ones of the user
+set "_VIRTUAL_JDK_JAVA_OPTIONS=__JDK_JAVA_OPTIONS__"
+if not defined _VIRTUAL_JDK_JAVA_OPTIONS goto ENDIFVLAUNCHEROPTIONS
+    if defined JDK_JAVA_OPTIONS (
+        set "_OLD_VIRTUAL_JDK_JAVA_OPTIONS=%JDK_JAVA_OPTIONS%"
+        set "JDK_JAVA_OPTIONS=%_VIRTUAL_JDK_JAVA_OPTIONS% %JDK_JAVA_OPTIONS%"
+    ) else (
+        set "_VIRTUAL_JDK_JAVA_OPTIONS_UNSET=1"
+        set "JDK_JAVA_OPTIONS=%_VIRTUAL_JDK_JAVA_OPTIONS%"
+    )
+:ENDIFVLAUNCHEROPTIONS
+set "_VIRTUAL_JDK_JAVA_OPTIONS="
+
+REM build caches of the env, Gradle user home and Maven local repository, not shared with the envs of other JDK
+set "_VIRTUAL_GRADLE_USER_HOME=__GRADLE_USER_HOME__"
+if not defined _VIRTUAL_GRADLE_USER_HOME goto ENDIFVGRADLEHOME
+    if defined GRADLE_USER_HOME (
+        set "_OLD_VIRTUAL_GRADLE_USER_HOME=%GRADLE_USER_HOME%"
+    ) else (
+        set "_VIRTUAL_GRADLE_USER_HOME_UNSET=1"
+    )
+    set "GRADLE_USER_HOME=%_VIRTUAL_GRADLE_USER_HOME%"
+:ENDIFVGRADLEHOME
+set "_VIRTUAL_GRADLE_USER_HOME="
+
+set "_VIRTUAL_MAVEN_OPTS=__MAVEN_OPTS__"
+if not defined _VIRTUAL_MAVEN_OPTS goto ENDIFVMAVENOPTS
+    if defined MAVEN_OPTS (
+        set "_OLD_VIRTUAL_MAVEN_OPTS=%MAVEN_OPTS%"
+        set "MAVEN_OPTS=%_VIRTUAL_MAVEN_OPTS% %MAVEN_OPTS%"
+    ) else (
+        set "_VIRTUAL_MAVEN_OPTS_UNSET=1"
+        set "MAVEN_OPTS=%_VIRTUAL_MAVEN_OPTS%"
+    )
+:ENDIFVMAVENOPTS
+set "_VIRTUAL_MAVEN_OPTS="
 
 REM if defined _OLD_VIRTUAL_PATH (
 if not defined _OLD_VIRTUAL_PATH goto ENDIFVPATH1
@@ -39,5 +94,7 @@ if defined _OLD_VIRTUAL_PATH goto ENDIFVPATH2
     set "_OLD_VIRTUAL_PATH=%PATH%"
 :ENDIFVPATH2
 
-set "PATH=%JAVA_HOME%\\bin;%PATH%"
+REM the JDK, then the env itself for its shims, the same order as the other shells,
+REM deactivate.bat puts back the whole saved PATH
+set "PATH=%JAVA_HOME%\\bin;%VIRTUAL_ENV%\\bin;%PATH%"
 """
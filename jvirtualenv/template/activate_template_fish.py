@@ -0,0 +1,164 @@
+# -*- coding:utf-8 -*-
+template = """
+# This file must be used with "source bin/activate.fish" *from fish*
+# you cannot run it directly
+
+function deactivate -d "Exit java virtual env and return to normal environment"
+    # reset old environment variables
+    if set -q _OLD_VIRTUAL_PATH
+        set -gx PATH $_OLD_VIRTUAL_PATH
+        set -e _OLD_VIRTUAL_PATH
+    end
+
+    if set -q _OLD_VIRTUAL_JAVA_HOME
+        set -gx JAVA_HOME $_OLD_VIRTUAL_JAVA_HOME
+        set -e _OLD_VIRTUAL_JAVA_HOME
+    else if set -q _VIRTUAL_JAVA_HOME_UNSET
+        set -e JAVA_HOME
+    end
+    set -e _VIRTUAL_JAVA_HOME_UNSET
+
+    if set -q _OLD_VIRTUAL_JAVA_TAG
+        set -gx JAVA_TAG $_OLD_VIRTUAL_JAVA_TAG
+        set -e _OLD_VIRTUAL_JAVA_TAG
+    else if set -q VIRTUAL_ENV
+        set -e JAVA_TAG
+    end
+
+    if set -q _VIRTUAL_CLASSPATH_UNSET
+        set -e CLASSPATH
+        set -e _VIRTUAL_CLASSPATH_UNSET
+    end
+
+    if set -q _OLD_VIRTUAL_JAVA_TOOL_OPTIONS
+        set -gx JAVA_TOOL_OPTIONS $_OLD_VIRTUAL_JAVA_TOOL_OPTIONS
+        set -e _OLD_VIRTUAL_JAVA_TOOL_OPTIONS
+    else if set -q _VIRTUAL_JAVA_TOOL_OPTIONS_UNSET
+        set -e JAVA_TOOL_OPTIONS
+    end
+    set -e _VIRTUAL_JAVA_TOOL_OPTIONS_UNSET
+
+    if set -q _OLD_VIRTUAL_JDK_JAVA_OPTIONS
+        set -gx JDK_JAVA_OPTIONS $_OLD_VIRTUAL_JDK_JAVA_OPTIONS
+        set -e _OLD_VIRTUAL_JDK_JAVA_OPTIONS
+    else if set -q _VIRTUAL_JDK_JAVA_OPTIONS_UNSET
+        set -e JDK_JAVA_OPTIONS
+    end
+    set -e _VIRTUAL_JDK_JAVA_OPTIONS_UNSET
+
+    if set -q _OLD_VIRTUAL_GRADLE_USER_HOME
+        set -gx GRADLE_USER_HOME $_OLD_VIRTUAL_GRADLE_USER_HOME
+        set -e _OLD_VIRTUAL_GRADLE_USER_HOME
+    else if set -q _VIRTUAL_GRADLE_USER_HOME_UNSET
+        set -e GRADLE_USER_HOME
+    end
+    set -e _VIRTUAL_GRADLE_USER_HOME_UNSET
+
+    if set -q _OLD_VIRTUAL_MAVEN_OPTS
+        set -gx MAVEN_OPTS $_OLD_VIRTUAL_MAVEN_OPTS
+        set -e _OLD_VIRTUAL_MAVEN_OPTS
+    else if set -q _VIRTUAL_MAVEN_OPTS_UNSET
+        set -e MAVEN_OPTS
+    end
+    set -e _VIRTUAL_MAVEN_OPTS_UNSET
+
+    if functions -q _old_fish_prompt
+        functions -e fish_prompt
+        functions -c _old_fish_prompt fish_prompt
+        functions -e _old_fish_prompt
+    end
+
+    set -e VIRTUAL_ENV
+    if test "$argv[1]" != "nondestructive"
+        # Self destruct!
+        functions -e deactivate
+    end
+end
+
+# unset irrelevant variables
+deactivate nondestructive
+
+set -gx VIRTUAL_ENV __VIRTUAL_ENV__
+
+# save PATH
+set -gx _OLD_VIRTUAL_PATH $PATH
+
+if set -q JAVA_HOME
+    set -gx _OLD_VIRTUAL_JAVA_HOME $JAVA_HOME
+else
+    set -g _VIRTUAL_JAVA_HOME_UNSET 1
+end
+set -gx JAVA_HOME __JAVA_HOME__
+
+if set -q JAVA_TAG
+    set -gx _OLD_VIRTUAL_JAVA_TAG $JAVA_TAG
+end
+set -gx JAVA_TAG __JAVA_TAG__
+
+# inherit from old CLASSPATH
+if not set -q CLASSPATH
+    set -gx CLASSPATH __CLASSPATH__
+    set -g _VIRTUAL_CLASSPATH_UNSET 1
+end
+
+# JVM options of the env, such as the class data sharing archive, before the ones of the user
+set -l virtual_java_tool_options __JAVA_TOOL_OPTIONS__
+if test -n "$virtual_java_tool_options"
+    if set -q JAVA_TOOL_OPTIONS
+        set -gx _OLD_VIRTUAL_JAVA_TOOL_OPTIONS $JAVA_TOOL_OPTIONS
+        set -gx JAVA_TOOL_OPTIONS "$virtual_java_tool_options $JAVA_TOOL_OPTIONS"
+    else
+        set -g _VIRTUAL_JAVA_TOOL_OPTIONS_UNSET 1
+        set -gx JAVA_TOOL_OPTIONS $virtual_java_tool_options
+    end
+end
+
+# options of the java launcher of the env (JDK 9+), such as the tuning profile, before the ones of the user
+set -l virtual_jdk_java_options __JDK_JAVA_OPTIONS__
+if test -n "$virtual_jdk_java_options"
+    if set -q JDK_JAVA_OPTIONS
+        set -gx _OLD_VIRTUAL_JDK_JAVA_OPTIONS $JDK_JAVA_OPTIONS
+        set -gx JDK_JAVA_OPTIONS "$virtual_jdk_java_options $JDK_JAVA_OPTIONS"
+    else
+        set -g _VIRTUAL_JDK_JAVA_OPTIONS_UNSET 1
+        set -gx JDK_JAVA_OPTIONS $virtual_jdk_java_options
+    end
+end
+
+# build caches of the env, Gradle user home and Maven local repository, not shared with the envs of other JDK
+set -l virtual_gradle_user_home __GRADLE_USER_HOME__
+if test -n "$virtual_gradle_user_home"
+    if set -q GRADLE_USER_HOME
+        set -gx _OLD_VIRTUAL_GRADLE_USER_HOME $GRADLE_USER_HOME
+    else
+        set -g _VIRTUAL_GRADLE_USER_HOME_UNSET 1
+    end
+    set -gx GRADLE_USER_HOME $virtual_gradle_user_home
+end
+
+set -l virtual_maven_opts __MAVEN_OPTS__
+if test -n "$virtual_maven_opts"
+    if set -q MAVEN_OPTS
+        set -gx _OLD_VIRTUAL_MAVEN_OPTS $MAVEN_OPTS
+        set -gx MAVEN_OPTS "$virtual_maven_opts $MAVEN_OPTS"
+    else
+        set -g _VIRTUAL_MAVEN_OPTS_UNSET 1
+        set -gx MAVEN_OPTS $virtual_maven_opts
+    end
+end
+
+# the JDK, and then the shims and scripts of the env, the same as the other shells
+set -gx PATH "$JAVA_HOME/bin" "$VIRTUAL_ENV/bin" $PATH
+
+if test -z "$VIRTUAL_ENV_DISABLE_PROMPT"
+    functions -c fish_prompt _old_fish_prompt
+
+    function fish_prompt
+        set -l old_status $status
+        printf "(%s: %s) " __ENV_NAME__ "$JAVA_TAG"
+        # restore the status of the last command for the old prompt
+        echo "exit $old_status" | source
+        _old_fish_prompt
+    end
+end
+"""
@@ -0,0 +1,148 @@
+# -*- coding:utf-8 -*-
+template = """
+# This file must be dot sourced with ". bin/activate.ps1" *from PowerShell* (pwsh on Linux too)
+# you cannot run it directly
+
+function global:deactivate ([switch]$NonDestructive) {
+    # reset old environment variables
+    if (Test-Path variable:_OLD_VIRTUAL_PATH) {
+        $env:PATH = $global:_OLD_VIRTUAL_PATH
+        Remove-Variable "_OLD_VIRTUAL_PATH" -Scope global
+    }
+
+    if (Test-Path variable:_OLD_VIRTUAL_JAVA_HOME) {
+        if ($null -eq $global:_OLD_VIRTUAL_JAVA_HOME) {
+            Remove-Item env:JAVA_HOME -ErrorAction SilentlyContinue
+        } else {
+            $env:JAVA_HOME = $global:_OLD_VIRTUAL_JAVA_HOME
+        }
+        Remove-Variable "_OLD_VIRTUAL_JAVA_HOME" -Scope global
+    }
+
+    if (Test-Path variable:_OLD_VIRTUAL_JAVA_TAG) {
+        if ($null -eq $global:_OLD_VIRTUAL_JAVA_TAG) {
+            Remove-Item env:JAVA_TAG -ErrorAction SilentlyContinue
+        } else {
+            $env:JAVA_TAG = $global:_OLD_VIRTUAL_JAVA_TAG
+        }
+        Remove-Variable "_OLD_VIRTUAL_JAVA_TAG" -Scope global
+    }
+
+    if (Test-Path variable:_VIRTUAL_CLASSPATH_UNSET) {
+        Remove-Item env:CLASSPATH -ErrorAction SilentlyContinue
+        Remove-Variable "_VIRTUAL_CLASSPATH_UNSET" -Scope global
+    }
+
+    if (Test-Path variable:_OLD_VIRTUAL_JAVA_TOOL_OPTIONS) {
+        if ($null -eq $global:_OLD_VIRTUAL_JAVA_TOOL_OPTIONS) {
+            Remove-Item env:JAVA_TOOL_OPTIONS -ErrorAction SilentlyContinue
+        } else {
+            $env:JAVA_TOOL_OPTIONS = $global:_OLD_VIRTUAL_JAVA_TOOL_OPTIONS
+        }
+        Remove-Variable "_OLD_VIRTUAL_JAVA_TOOL_OPTIONS" -Scope global
+    }
+
+    if (Test-Path variable:_OLD_VIRTUAL_JDK_JAVA_OPTIONS) {
+        if ($null -eq $global:_OLD_VIRTUAL_JDK_JAVA_OPTIONS) {
+            Remove-Item env:JDK_JAVA_OPTIONS -ErrorAction SilentlyContinue
+        } else {
+            $env:JDK_JAVA_OPTIONS = $global:_OLD_VIRTUAL_JDK_JAVA_OPTIONS
+        }
+        Remove-Variable "_OLD_VIRTUAL_JDK_JAVA_OPTIONS" -Scope global
+    }
+
+    if (Test-Path variable:_OLD_VIRTUAL_GRADLE_USER_HOME) {
+        if ($null -eq $global:_OLD_VIRTUAL_GRADLE_USER_HOME) {
+            Remove-Item env:GRADLE_USER_HOME -ErrorAction SilentlyContinue
+        } else {
+            $env:GRADLE_USER_HOME = $global:_OLD_VIRTUAL_GRADLE_USER_HOME
+        }
+        Remove-Variable "_OLD_VIRTUAL_GRADLE_USER_HOME" -Scope global
+    }
+
+    if (Test-Path variable:_OLD_VIRTUAL_MAVEN_OPTS) {
+        if ($null -eq $global:_OLD_VIRTUAL_MAVEN_OPTS) {
+            Remove-Item env:MAVEN_OPTS -ErrorAction SilentlyContinue
+        } else {
+            $env:MAVEN_OPTS = $global:_OLD_VIRTUAL_MAVEN_OPTS
+        }
+        Remove-Variable "_OLD_VIRTUAL_MAVEN_OPTS" -Scope global
+    }
+
+    if (Test-Path function:_old_virtual_prompt) {
+        $function:prompt = $function:_old_virtual_prompt
+        Remove-Item function:\\_old_virtual_prompt
+    }
+
+    Remove-Item env:VIRTUAL_ENV -ErrorAction SilentlyContinue
+
+    if (!$NonDestructive) {
+        # Self destruct!
+        Remove-Item function:deactivate
+    }
+}
+
+# unset irrelevant variables
+deactivate -NonDestructive
+
+$env:VIRTUAL_ENV = __VIRTUAL_ENV__
+
+# save PATH, JAVA_HOME and JAVA_TAG, $null means it wasn't set
+$global:_OLD_VIRTUAL_PATH = $env:PATH
+$global:_OLD_VIRTUAL_JAVA_HOME = $env:JAVA_HOME
+$global:_OLD_VIRTUAL_JAVA_TAG = $env:JAVA_TAG
+
+$env:JAVA_HOME = __JAVA_HOME__
+$env:JAVA_TAG = __JAVA_TAG__
+
+# inherit from old CLASSPATH
+if ($null -eq $env:CLASSPATH) {
+    $env:CLASSPATH = __CLASSPATH__
+    $global:_VIRTUAL_CLASSPATH_UNSET = $true
+}
+
+# JVM options of the env, such as the class data sharing archive, before the ones of the user
+$_virtual_java_tool_options = __JAVA_TOOL_OPTIONS__
+if ($_virtual_java_tool_options) {
+    $global:_OLD_VIRTUAL_JAVA_TOOL_OPTIONS = $env:JAVA_TOOL_OPTIONS
+    $env:JAVA_TOOL_OPTIONS = (@($_virtual_java_tool_options, $env:JAVA_TOOL_OPTIONS) | Where-Object { $_ }) -join " "
+}
+Remove-Variable "_virtual_java_tool_options"
+
+# options of the java launcher of the env (JDK 9+), such as the tuning profile, before the ones of the user
+$_virtual_jdk_java_options = __JDK_JAVA_OPTIONS__
+if ($_virtual_jdk_java_options) {
+    $global:_OLD_VIRTUAL_JDK_JAVA_OPTIONS = $env:JDK_JAVA_OPTIONS
+    $env:JDK_JAVA_OPTIONS = (@($_virtual_jdk_java_options, $env:JDK_JAVA_OPTIONS) | Where-Object { $_ }) -join " "
+}
+Remove-Variable "_virtual_jdk_java_options"
+
+# build caches of the env, Gradle user home and Maven local repository, not shared with the envs of other JDK
+$_virtual_gradle_user_home = __GRADLE_USER_HOME__
+if ($_virtual_gradle_user_home) {
+    $global:_OLD_VIRTUAL_GRADLE_USER_HOME = $env:GRADLE_USER_HOME
+    $env:GRADLE_USER_HOME = $_virtual_gradle_user_home
+}
+Remove-Variable "_virtual_gradle_user_home"
+
+$_virtual_maven_opts = __MAVEN_OPTS__
+if ($_virtual_maven_opts) {
+    $global:_OLD_VIRTUAL_MAVEN_OPTS = $env:MAVEN_OPTS
+    $env:MAVEN_OPTS = (@($_virtual_maven_opts, $env:MAVEN_OPTS) | Where-Object { $_ }) -join " "
+}
+Remove-Variable "_virtual_maven_opts"
+
+# the JDK, and then the shims and scripts of the env, the same as the other shells
+$env:PATH = (Join-Path $env:JAVA_HOME "bin") + [IO.Path]::PathSeparator + (Join-Path $env:VIRTUAL_ENV "bin") `
+    + [IO.Path]::PathSeparator + $env:PATH
+
+if (!$env:VIRTUAL_ENV_DISABLE_PROMPT) {
+    function global:_old_virtual_prompt { "" }
+    $function:_old_virtual_prompt = $function:prompt
+
+    function global:prompt {
+        Write-Host -NoNewline ("(" + __ENV_NAME__ + ": " + $env:JAVA_TAG + ") ")
+        _old_virtual_prompt
+    }
+}
+"""
@@ -1,4 +1,4 @@
-# -*- Coding:utf-8 -*-
+# -*- coding:utf-8 -*-
 
 template = """
 @echo off
@@ -23,6 +23,38 @@ if not defined _OLD_VIRTUAL_JAVA_HOME (
     set "JAVA_HOME=%_OLD_VIRTUAL_JAVA_HOME%"
 )
 
+if defined _OLD_VIRTUAL_JAVA_TOOL_OPTIONS (
+    set "JAVA_TOOL_OPTIONS=%_OLD_VIRTUAL_JAVA_TOOL_OPTIONS%"
+    set "_OLD_VIRTUAL_JAVA_TOOL_OPTIONS="
+) else if defined _VIRTUAL_JAVA_TOOL_OPTIONS_UNSET (
+    set "JAVA_TOOL_OPTIONS="
+)
+set "_VIRTUAL_JAVA_TOOL_OPTIONS_UNSET="
+
+if defined _OLD_VIRTUAL_JDK_JAVA_OPTIONS (
+    set "JDK_JAVA_OPTIONS=%_OLD_VIRTUAL_JDK_JAVA_OPTIONS%"
+    set "_OLD_VIRTUAL_JDK_JAVA_OPTIONS="
+) else if defined _VIRTUAL_JDK_JAVA_OPTIONS_UNSET (
+    set "JDK_JAVA_OPTIONS="
+)
+set "_VIRTUAL_JDK_JAVA_OPTIONS_UNSET="
+
+if defined _OLD_VIRTUAL_GRADLE_USER_HOME (
+    set "GRADLE_USER_HOME=%_OLD_VIRTUAL_GRADLE_USER_HOME%"
+    set "_OLD_VIRTUAL_GRADLE_USER_HOME="
+) else if defined _VIRTUAL_GRADLE_USER_HOME_UNSET (
+    set "GRADLE_USER_HOME="
+)
+set "_VIRTUAL_GRADLE_USER_HOME_UNSET="
+
+if defined _OLD_VIRTUAL_MAVEN_OPTS (
+    set "MAVEN_OPTS=%_OLD_VIRTUAL_MAVEN_OPTS%"
+    set "_OLD_VIRTUAL_MAVEN_OPTS="
+) else if defined _VIRTUAL_MAVEN_OPTS_UNSET (
+    set "MAVEN_OPTS="
+)
+set "_VIRTUAL_MAVEN_OPTS_UNSET="
+
 if not defined _OLD_VIRTUAL_PATH goto ENDIFVPATH
     set "PATH=%_OLD_VIRTUAL_PATH%"
     set _OLD_VIRTUAL_PATH=
@@ -0,0 +1,121 @@
+# -*- coding:utf-8 -*-
+"""Single pass template renderer with the quoting rules of each shell
+
+A placeholder is `__NAME__` (upper case), it's replaced by the value quoted as one word of the shell,
+so the template shouldn't quote it again.
+"""
+
+import os
+import re
+import importlib
+from functools import lru_cache
+from collections import OrderedDict
+
+
+PLACEHOLDER = re.compile(r'__([A-Z](?:[A-Z_]*[A-Z])?)__')
+
+
+def quote_posix(value):
+    """
+    >>> print(quote_posix('/opt/a "b" $c\\'d'))
+    '/opt/a "b" $c'"'"'d'
+    """
+    return "'" + value.replace("'", "'\"'\"'") + "'"
+
+
+def quote_fish(value):
+    """
+    >>> print(quote_fish("/opt/a $b\\\\'c"))
+    '/opt/a $b\\\\\\'c'
+    """
+    return "'" + value.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def quote_pwsh(value):
+    """
+    >>> print(quote_pwsh("/opt/a $b'c"))
+    '/opt/a $b''c'
+    """
+    return "'" + value.replace("'", "''") + "'"
+
+
+def quote_cmd(value):
+    """
+    The value is put inside `set "NAME=..."` by the template, only % should be escaped
+
+    >>> print(quote_cmd('C:\\\\100%\\\\jdk'))
+    C:\\100%%\\jdk
+    """
+    return value.replace('%', '%%')
+
+
+# name: (file name in bin, template module, quote)
+SHELLS = OrderedDict([
+    ('sh', ('activate', 'jvirtualenv.template.activate_template', quote_posix)),
+    ('fish', ('activate.fish', 'jvirtualenv.template.activate_template_fish', quote_fish)),
+    ('pwsh', ('activate.ps1', 'jvirtualenv.template.activate_template_ps1', quote_pwsh)),
+    ('cmd', ('activate.bat', 'jvirtualenv.template.activate_template_bat', quote_cmd)),
+])
+
+POSIX_SHELLS = ('sh', 'fish', 'pwsh')
+WINDOWS_SHELLS = ('cmd', 'pwsh')
+
+# launcher of an executable of the JDK: (template module, quote, suffix of the file name)
+SHIMS = {
+    'sh': ('jvirtualenv.template.shim_template', quote_posix, ''),
+    'cmd': ('jvirtualenv.template.shim_template_bat', quote_cmd, '.cmd'),
+}
+
+# the first line of a shim after the shebang, so it can be told from the other files of bin
+SHIM_MARKER = 'jvirtualenv shim'
+
+
+class Template(object):
+    """
+    >>> print(Template('export A=__A__ B=__B__ # __A__', quote_posix).render({'A': 'a b', 'B': '$b'}))
+    export A='a b' B='$b' # 'a b'
+    """
+
+    def __init__(self, source, quote):
+        self.quote = quote
+        self._pieces = PLACEHOLDER.split(source)  # literal, name, literal, name, ..., literal
+        self.names = frozenset(self._pieces[1::2])
+
+    def render(self, values):
+        """raise KeyError if a value of the placeholders is missing"""
+        quoted = {name: self.quote(values[name]) for name in self.names}
+        pieces = self._pieces[:]
+        pieces[1::2] = [quoted[name] for name in pieces[1::2]]
+
+        return ''.join(pieces)
+
+
+@lru_cache(maxsize=None)
+def _compile(module_name, quote):
+    return Template(importlib.import_module(module_name).template, quote)
+
+
+def get_template(shell):
+    """the compiled activate template of the shell, it's compiled only once"""
+    _, module_name, quote = SHELLS[shell]
+
+    return _compile(module_name, quote)
+
+
+def get_shim_template(kind):
+    """the compiled shim template, kind is `sh` or `cmd`"""
+    module_name, quote, _ = SHIMS[kind]
+
+    return _compile(module_name, quote)
+
+
+def shim_file_name(kind, executable_name):
+    """
+    >>> shim_file_name('cmd', 'javac.exe')
+    'javac.cmd'
+    """
+    return os.path.splitext(executable_name)[0] + SHIMS[kind][2] if SHIMS[kind][2] else executable_name
+
+
+def activate_file_name(shell):
+    return SHELLS[shell][0]
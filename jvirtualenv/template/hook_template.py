@@ -0,0 +1,155 @@
+# -*- coding:utf-8 -*-
+template = r"""
+# jvirtualenv directory hook for bash and zsh, add `eval "$(jvirtualenv hook)"` to ~/.bashrc or ~/.zshrc
+# It switches JAVA_HOME, JAVA_TAG and PATH to the JDK named by the nearest .java-version
+# of the current directory or its parents, with shell builtins only.
+
+_JVIRTUALENV_LOOKUP=__LOOKUP_PATH__
+_JVIRTUALENV_LOOKUP_ID=''
+_JVIRTUALENV_LAST_VERSION=''
+_JVIRTUALENV_HAS_CACHE=''
+if typeset -gA _JVIRTUALENV_DIR_CACHE 2>/dev/null ; then
+    _JVIRTUALENV_HAS_CACHE=1
+fi
+
+# load the lookup function again if it's regenerated, its first line is the id of the content
+_jvirtualenv_load () {
+    local id=''
+    if [ -r "$_JVIRTUALENV_LOOKUP" ] ; then
+        read -r id < "$_JVIRTUALENV_LOOKUP"
+    fi
+
+    if [ "$id" != "$_JVIRTUALENV_LOOKUP_ID" ] ; then
+        if [ -n "$id" ] ; then
+            . "$_JVIRTUALENV_LOOKUP"
+        else
+            _jvirtualenv_lookup () { REPLY=''; _JVIRTUALENV_TAG=''; return 1; }
+        fi
+        _JVIRTUALENV_LOOKUP_ID="$id"
+        _JVIRTUALENV_LAST_VERSION=''
+    fi
+}
+
+# set REPLY to the nearest .java-version, '' if there isn't
+# The cache of a directory is only the file found for it, the directories between them are tested again,
+# so a .java-version created or removed anywhere is seen on the next prompt, "not found" is never cached
+_jvirtualenv_version_file () {
+    local dir="$PWD"
+    local cached=''
+
+    if [ -n "$_JVIRTUALENV_HAS_CACHE" ] ; then
+        cached="${_JVIRTUALENV_DIR_CACHE[$PWD]-}"
+        if [ -n "$cached" ] && ! [ -f "$cached" ] ; then
+            cached=''
+        fi
+    fi
+
+    REPLY=''
+    while : ; do
+        if [ "$dir/.java-version" = "$cached" ] || [ -f "$dir/.java-version" ] ; then
+            REPLY="$dir/.java-version"
+            break
+        fi
+        [ -n "$dir" ] || break
+        dir="${dir%/*}"
+    done
+
+    if [ -n "$_JVIRTUALENV_HAS_CACHE" ] ; then
+        if [ -n "$REPLY" ] ; then
+            _JVIRTUALENV_DIR_CACHE[$PWD]="$REPLY"
+        else
+            unset "_JVIRTUALENV_DIR_CACHE[$PWD]"
+        fi
+    fi
+}
+
+_jvirtualenv_switch () {
+    # leave the JDK switched to before
+    if [ -n "${_JVIRTUALENV_AUTO_HOME-}" ] ; then
+        PATH=":$PATH:"
+        PATH="${PATH//":$_JVIRTUALENV_AUTO_HOME/bin:"/:}"
+        PATH="${PATH#:}"
+        PATH="${PATH%:}"
+
+        if [ -n "${_JVIRTUALENV_OLD_JAVA_HOME+_}" ] ; then
+            JAVA_HOME="$_JVIRTUALENV_OLD_JAVA_HOME"
+            export JAVA_HOME
+            unset _JVIRTUALENV_OLD_JAVA_HOME
+        else
+            unset JAVA_HOME
+        fi
+
+        if [ -n "${_JVIRTUALENV_OLD_JAVA_TAG+_}" ] ; then
+            JAVA_TAG="$_JVIRTUALENV_OLD_JAVA_TAG"
+            export JAVA_TAG
+            unset _JVIRTUALENV_OLD_JAVA_TAG
+        else
+            unset JAVA_TAG
+        fi
+
+        unset _JVIRTUALENV_AUTO_HOME
+    fi
+
+    if [ -n "$1" ] ; then
+        if [ -n "${JAVA_HOME+_}" ] ; then
+            _JVIRTUALENV_OLD_JAVA_HOME="$JAVA_HOME"
+        fi
+        if [ -n "${JAVA_TAG+_}" ] ; then
+            _JVIRTUALENV_OLD_JAVA_TAG="$JAVA_TAG"
+        fi
+
+        JAVA_HOME="$1"
+        export JAVA_HOME
+        JAVA_TAG="$2"
+        export JAVA_TAG
+        PATH="$JAVA_HOME/bin:$PATH"
+        _JVIRTUALENV_AUTO_HOME="$1"
+    fi
+    export PATH
+
+    hash -r 2>/dev/null
+}
+
+_jvirtualenv_hook () {
+    local last_status=$?
+    local version=''
+
+    # a java virtual env activated by `source bin/activate` wins
+    if [ -n "${VIRTUAL_ENV-}" ] && [ -n "${JAVA_TAG-}" ] && [ "${JAVA_HOME-}" != "${_JVIRTUALENV_AUTO_HOME-}" ] ; then
+        return $last_status
+    fi
+
+    _jvirtualenv_load
+    _jvirtualenv_version_file
+    if [ -n "$REPLY" ] ; then
+        read -r version < "$REPLY"
+        version="${version%$'\r'}"
+    fi
+
+    if [ "$version" = "$_JVIRTUALENV_LAST_VERSION" ] ; then
+        return $last_status
+    fi
+    _JVIRTUALENV_LAST_VERSION="$version"
+
+    if [ -z "$version" ] ; then
+        _jvirtualenv_switch '' ''
+    elif _jvirtualenv_lookup "$version" ; then
+        _jvirtualenv_switch "$REPLY" "$_JVIRTUALENV_TAG"
+    else
+        echo "jvirtualenv: no JDK matches $version of .java-version, try \`jvirtualenv reinit-tag\`" >&2
+        _jvirtualenv_switch '' ''
+    fi
+
+    return $last_status
+}
+
+if [ -n "${ZSH_VERSION-}" ] ; then
+    autoload -Uz add-zsh-hook
+    add-zsh-hook precmd _jvirtualenv_hook
+else
+    case ";${PROMPT_COMMAND-};" in
+        *";_jvirtualenv_hook;"*) ;;
+        *) PROMPT_COMMAND="_jvirtualenv_hook${PROMPT_COMMAND:+;$PROMPT_COMMAND}" ;;
+    esac
+fi
+"""
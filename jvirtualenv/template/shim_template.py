@@ -0,0 +1,17 @@
+# -*- coding:utf-8 -*-
+template = """#!/bin/sh
+# jvirtualenv shim, it's generated, don't edit it
+JAVA_HOME=__JAVA_HOME__
+export JAVA_HOME
+_JVIRTUALENV_OPTIONS=__JAVA_TOOL_OPTIONS__
+if [ -n "$_JVIRTUALENV_OPTIONS" ] ; then
+    JAVA_TOOL_OPTIONS="$_JVIRTUALENV_OPTIONS${JAVA_TOOL_OPTIONS:+ $JAVA_TOOL_OPTIONS}"
+    export JAVA_TOOL_OPTIONS
+fi
+_JVIRTUALENV_OPTIONS=__JDK_JAVA_OPTIONS__
+if [ -n "$_JVIRTUALENV_OPTIONS" ] ; then
+    JDK_JAVA_OPTIONS="$_JVIRTUALENV_OPTIONS${JDK_JAVA_OPTIONS:+ $JDK_JAVA_OPTIONS}"
+    export JDK_JAVA_OPTIONS
+fi
+exec __EXECUTABLE__ "$@"
+"""
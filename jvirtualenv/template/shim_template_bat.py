@@ -0,0 +1,24 @@
+# -*- coding:utf-8 -*-
+template = """@echo off
+rem jvirtualenv shim, it's generated, don't edit it
+setlocal
+set "JAVA_HOME=__JAVA_HOME__"
+set "_JVIRTUALENV_OPTIONS=__JAVA_TOOL_OPTIONS__"
+if defined _JVIRTUALENV_OPTIONS (
+    if defined JAVA_TOOL_OPTIONS (
+        set "JAVA_TOOL_OPTIONS=%_JVIRTUALENV_OPTIONS% %JAVA_TOOL_OPTIONS%"
+    ) else (
+        set "JAVA_TOOL_OPTIONS=%_JVIRTUALENV_OPTIONS%"
+    )
+)
+set "_JVIRTUALENV_OPTIONS=__JDK_JAVA_OPTIONS__"
+if defined _JVIRTUALENV_OPTIONS (
+    if defined JDK_JAVA_OPTIONS (
+        set "JDK_JAVA_OPTIONS=%_JVIRTUALENV_OPTIONS% %JDK_JAVA_OPTIONS%"
+    ) else (
+        set "JDK_JAVA_OPTIONS=%_JVIRTUALENV_OPTIONS%"
+    )
+)
+"__EXECUTABLE__" %*
+exit /b %ERRORLEVEL%
+"""
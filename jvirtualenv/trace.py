@@ -0,0 +1,96 @@
+# -*- coding:utf-8 -*-
+"""Timing spans of the phases, dumped as Chrome trace event json (chrome://tracing, Perfetto)
+
+Spans cost nothing until start() is called, which `--trace=<file>` of the CLI does.
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+
+
+_events = None
+_t0 = None
+
+
+def start():
+    global _events
+    global _t0
+
+    _events = []
+    _t0 = time.perf_counter()
+
+
+def enabled():
+    return _events is not None
+
+
+@contextmanager
+def span(name, cat='phase', **args):
+    """
+    Record the duration of the block, the yielded dict is the args of the event,
+    set args['status'] in it, it's 'error' if the block raises and 'ok' if it isn't set.
+    """
+    if _events is None:
+        yield args
+        return
+
+    start_time = time.perf_counter()
+    try:
+        yield args
+    except BaseException as ex:
+        args['status'] = 'error'
+        args['error'] = repr(ex)
+        raise
+    finally:
+        args.setdefault('status', 'ok')
+        _events.append(OrderedDict([
+            ('name', name),
+            ('cat', cat),
+            ('ph', 'X'),
+            ('ts', (start_time - _t0) * 1e6),
+            ('dur', (time.perf_counter() - start_time) * 1e6),
+            ('pid', os.getpid()),
+            ('tid', threading.get_ident()),
+            ('args', args),
+        ]))
+
+
+def dump(path):
+    import json
+
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': _events or [], 'displayTimeUnit': 'ms'}, f, indent=1)
+
+
+def summary(top=10):
+    """
+    :return: (phase rows, slowest rows)
+             phase row: (cat, name, count, total ms, max ms)
+             slowest row: (name, ms, status) of the `top` slowest spans which aren't phases
+    """
+    phases = OrderedDict()
+    others = []
+
+    for event in _events or []:
+        ms = event['dur'] / 1000
+        if event['cat'] == 'phase':
+            key = (event['cat'], event['name'])
+            count, total, longest = phases.get(key, (0, 0.0, 0.0))
+            phases[key] = (count + 1, total + ms, max(longest, ms))
+        else:
+            others.append((event['cat'], event['name'], ms, event['args'].get('status')))
+
+    phase_rows = [(cat, name, count, total, longest) for (cat, name), (count, total, longest) in phases.items()]
+
+    by_cat = OrderedDict()
+    for cat, name, ms, status in others:
+        count, total, longest = by_cat.get(cat, (0, 0.0, 0.0))
+        by_cat[cat] = (count + 1, total + ms, max(longest, ms))
+    phase_rows.extend((cat, '*', count, total, longest) for cat, (count, total, longest) in by_cat.items())
+
+    slowest = sorted(others, key=lambda row: row[2], reverse=True)[:top]
+
+    return phase_rows, [(name, ms, status) for _, name, ms, status in slowest]
@@ -0,0 +1,191 @@
+# -*- coding:utf-8 -*-
+"""JVM options of a java virtual env fitting the container it's created in
+
+The memory and CPU limits are read from cgroup v2 (`memory.max`, `cpu.max`) or v1
+(`memory.limit_in_bytes`, `cpu.cfs_quota_us`) of the current process. A JDK which can't see them
+(v1 before 8u191/10, v2 before 8u372/11.0.16/15) gets an explicit heap and processor count,
+the others get a heap percentage only. The GC comes from the profile:
+
+    throughput  ParallelGC, 75% of the memory for the heap
+    latency     G1 with a 50ms pause goal, generational ZGC on 64 bit JDK 21+, 70% heap
+    small       SerialGC and C1 only, 50% heap, for short-lived tools on tiny containers
+
+JDK 9+ get them in JDK_JAVA_OPTIONS, read by the `java` launcher only and after the options
+of the command line, JDK 8 in JAVA_TOOL_OPTIONS. The options exported by the user are put after them,
+so the user's own ones win.
+"""
+
+import os
+import math
+from collections import namedtuple
+
+
+PROFILES = ('throughput', 'latency', 'small')
+
+HEAP_PERCENT = {'throughput': 75, 'latency': 70, 'small': 50}
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# a v1 memory limit at least this large means no limit, it's PAGE_COUNTER_MAX rounded to the page size
+UNLIMITED_MEMORY = 1 << 60
+
+
+Limits = namedtuple('Limits', 'memory cpus cgroup')  # bytes, float, 1 or 2, each is None if unknown
+
+
+class UnknownProfileError(ValueError):
+    """The first arg of the exception should be the profile name"""
+    pass
+
+
+def _read(path):
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_paths(proc_cgroup):
+    """:return: {controller: path}, the path of cgroup v2 is under ''"""
+    paths = {}
+    for line in (_read(proc_cgroup) or '').splitlines():
+        fields = line.split(':', 2)
+        if len(fields) == 3:
+            for controller in fields[1].split(','):
+                paths[controller] = fields[2]
+
+    return paths
+
+
+def _up_to(base, path):
+    """the directory of path under base and all its parents up to base, the limit of any of them applies"""
+    directory = os.path.normpath(os.path.join(base, path.lstrip('/')))
+    dirs = []
+    while directory.startswith(base) and os.path.isdir(directory):
+        dirs.append(directory)
+        if directory == base:
+            break
+        directory = os.path.dirname(directory)
+
+    return dirs or [base]
+
+
+def _min(values):
+    values = [value for value in values if value is not None]
+    return min(values) if values else None
+
+
+def _v2_limits(root, path):
+    memory = []
+    cpus = []
+    for directory in _up_to(root, path):
+        value = _read(os.path.join(directory, 'memory.max'))
+        if value and value != 'max':
+            memory.append(int(value))
+
+        value = _read(os.path.join(directory, 'cpu.max'))
+        if value and not value.startswith('max'):
+            quota, period = value.split()[:2]
+            cpus.append(int(quota) / int(period))
+
+    return _min(memory), _min(cpus)
+
+
+def _v1_limits(root, paths):
+    memory = []
+    for directory in _up_to(os.path.join(root, 'memory'), paths.get('memory', '/')):
+        value = _read(os.path.join(directory, 'memory.limit_in_bytes'))
+        if value and int(value) < UNLIMITED_MEMORY:
+            memory.append(int(value))
+
+    cpus = []
+    for controller_dir in ('cpu,cpuacct', 'cpu'):
+        for directory in _up_to(os.path.join(root, controller_dir), paths.get('cpu', '/')):
+            quota = _read(os.path.join(directory, 'cpu.cfs_quota_us'))
+            period = _read(os.path.join(directory, 'cpu.cfs_period_us'))
+            if quota and period and int(quota) > 0:
+                cpus.append(int(quota) / int(period))
+        if cpus:
+            break
+
+    return _min(memory), _min(cpus)
+
+
+def read_limits(root=CGROUP_ROOT, proc_cgroup='/proc/self/cgroup'):
+    """:return: Limits, all None if there is no cgroup (not Linux)"""
+    paths = _cgroup_paths(proc_cgroup)
+
+    if os.path.exists(os.path.join(root, 'cgroup.controllers')):
+        cgroup = 2
+        memory, cpus = _v2_limits(root, paths.get('', '/'))
+    elif os.path.isdir(os.path.join(root, 'memory')):
+        cgroup = 1
+        memory, cpus = _v1_limits(root, paths)
+    else:
+        return Limits(None, None, None)
+
+    if hasattr(os, 'sched_getaffinity'):  # cpuset
+        cpus = _min([cpus, len(os.sched_getaffinity(0))])
+
+    return Limits(memory, cpus, cgroup)
+
+
+def sees_container(version, cgroup):
+    """the JDK reads the limits of the cgroup version by itself"""
+    feature, _, update, _ = version.numbers
+
+    if cgroup == 2:
+        return feature >= 15 or (feature == 11 and update >= 16) or (feature == 8 and update >= 372)
+
+    return feature >= 10 or (feature == 8 and update >= 191)
+
+
+def _has_container_flags(version):
+    """-XX:MaxRAMPercentage and -XX:ActiveProcessorCount"""
+    feature, _, update, _ = version.numbers
+    return feature >= 10 or (feature == 8 and update >= 191)
+
+
+def gc_options(version, bit, profile):
+    feature = version.numbers[0]
+
+    if profile == 'throughput':
+        return ['-XX:+UseParallelGC']
+    elif profile == 'small':
+        return ['-XX:+UseSerialGC', '-XX:TieredStopAtLevel=1']
+    elif feature >= 21 and str(bit) == '64':
+        return ['-XX:+UseZGC'] + (['-XX:+ZGenerational'] if feature < 23 else [])  # generational by default since 23
+    else:
+        return ['-XX:+UseG1GC', '-XX:MaxGCPauseMillis=50']
+
+
+def profile_options(version, bit, profile, limits):
+    """
+    :param version: JavaVersion
+    :return: (options of JAVA_TOOL_OPTIONS, options of JDK_JAVA_OPTIONS)
+    raise UnknownProfileError
+    """
+    if profile not in PROFILES:
+        raise UnknownProfileError(profile)
+
+    percent = HEAP_PERCENT[profile]
+    options = gc_options(version, bit, profile)
+    sees = limits.cgroup is not None and sees_container(version, limits.cgroup)
+
+    if limits.memory is not None and not sees:
+        options.append('-Xmx{0}m'.format(max(16, limits.memory * percent // 100 >> 20)))
+    elif _has_container_flags(version):
+        options.append('-XX:MaxRAMPercentage={0}.0'.format(percent))
+
+    if limits.cpus is not None and limits.cpus < (os.cpu_count() or 1):
+        cpus = max(1, math.ceil(limits.cpus))
+        if _has_container_flags(version):
+            options.append('-XX:ActiveProcessorCount={0}'.format(cpus))
+        elif not sees:
+            options.append('-XX:ParallelGCThreads={0}'.format(cpus))
+
+    if version.numbers[0] >= 9:
+        return [], options
+    else:
+        return options, []
@@ -0,0 +1,203 @@
+# -*- coding:utf-8 -*-
+"""Java version strings and `--java` constraints
+
+Both the legacy scheme (`1.8.0_144-b01`) and JEP 223 (`11.0.2+9`, `17-ea`, `21.0.1+12-LTS`) are parsed
+into feature, interim, update and patch numbers, 1.x is the feature x (`1.8.0_144` is 8.0.144).
+A version is ordered by one integer key, computed once when the JDK is probed and stored in the catalog:
+
+    feature(12 bits) interim(12) update(12) patch(10) | GA(1) build(16)
+
+so an early access build is older than the GA of the same numbers,
+and a constraint is a set of ranges of the key, such as `>=11,<17` or `17.0.*`.
+"""
+
+import re
+from collections import namedtuple
+
+
+NUMBER_BITS = (12, 12, 12, 10)
+BUILD_BITS = 16
+LOW_BITS = 1 + BUILD_BITS  # GA flag and build, below the numbers
+MAX_KEY = (1 << 63) - 1  # the largest integer of SQLite
+
+_VERSION = re.compile(r"""
+    (?P<numbers>\d+(?:\.\d+)*)
+    (?:_(?P<update>\d+))?           # legacy update, 1.8.0_144
+    (?:-(?P<pre>[a-zA-Z0-9]+))?     # 17-ea, or the build of legacy 1.8.0_144-b01
+    (?:\+(?P<build>\d+))?           # 11.0.2+9
+    (?:-(?P<opt>[-a-zA-Z0-9.]+))?   # 21.0.1+12-LTS, 1.8.0_202-ea-b03
+""", re.X)
+
+_CLAUSE = re.compile(r'^(?P<op>>=|<=|==|!=|>|<|=)?\s*(?P<version>\d+(?:\.\d+)*)(?P<wildcard>\.\*)?$')
+
+class InvalidConstraintError(ValueError):
+    """The first arg of the exception should be the constraint"""
+    pass
+
+
+class JavaVersion(namedtuple('JavaVersion', 'text numbers pre build legacy')):
+    """numbers are (feature, interim, update, patch), pre is None for a GA release"""
+
+    @property
+    def tag_fields(self):
+        """the three numbers of the tag, legacy versions keep the `1.` prefix, `1:8:0` for 1.8.0_144"""
+        if self.legacy:
+            return 1, self.numbers[0], self.numbers[1]
+
+        return self.numbers[:3]
+
+    @property
+    def key(self):
+        return (pack_numbers(self.numbers) << LOW_BITS) | ((self.pre is None) << BUILD_BITS) \
+            | min(self.build or 0, (1 << BUILD_BITS) - 1)
+
+    def __str__(self):
+        return self.text
+
+
+def _clamp(number, bits):
+    return min(number, (1 << bits) - 1)
+
+
+def pack_numbers(numbers):
+    packed = 0
+    for number, bits in zip(tuple(numbers) + (0, ) * (len(NUMBER_BITS) - len(numbers)), NUMBER_BITS):
+        packed = (packed << bits) | _clamp(number, bits)
+
+    return packed
+
+
+def _numbers_of(fields):
+    """
+    Normalize the dot separated numbers, 1.x to x
+
+    :return: (numbers, legacy)
+    """
+    if fields[0] == 1 and len(fields) > 1:
+        return fields[1:5], True
+
+    return fields[:4], False
+
+
+def parse_version(version_s):
+    """
+    raise ValueError if it doesn't start with a number
+
+    >>> parse_version('1.8.0_144-b01').numbers, parse_version('1.8.0_144-b01').tag_fields
+    ((8, 0, 144, 0), (1, 8, 0))
+    >>> parse_version('11.0.2+9').build
+    9
+    >>> parse_version('17-ea').key < parse_version('17').key < parse_version('17.0.1').key
+    True
+    >>> parse_version('11.0.10').key > parse_version('11.0.9+11').key
+    True
+    """
+    version_s = str(version_s).strip()
+    match = _VERSION.match(version_s)
+    if not match:
+        raise ValueError('unknown java version {0!r}'.format(version_s))
+
+    numbers, legacy = _numbers_of([int(number) for number in match.group('numbers').split('.')])
+    if legacy and match.group('update'):
+        numbers = numbers[:2] + [int(match.group('update'))]
+    numbers = tuple(numbers + [0] * (len(NUMBER_BITS) - len(numbers)))
+
+    pre = match.group('pre')
+    build = match.group('build')
+    if legacy and pre and re.match(r'b\d+$', pre):  # 1.8.0_144-b01, it isn't a pre-release
+        pre, build = None, pre[1:]
+    elif pre and pre.upper() == 'LTS':  # 17.0.9-LTS from some vendors
+        pre = None
+    if build is None and (legacy_build := re.search(r'\bb(\d+)\b', match.group('opt') or '')):
+        build = legacy_build.group(1)
+
+    return JavaVersion(version_s, numbers, pre, int(build) if build is not None else None, legacy)
+
+
+def version_key(version_info):
+    """the precomputed key of the catalog entry, computed from its version if it's an old entry without it"""
+    key = version_info.get('version_key')
+    if key is None:
+        try:
+            key = parse_version(version_info.get('version')).key
+        except ValueError:
+            key = 0
+
+    return key
+
+
+def is_constraint(query):
+    """
+    >>> is_constraint('>=11,<17'), is_constraint('17.0.*'), is_constraint('17')
+    (True, True, False)
+    """
+    return any(op in query for op in ('<', '>', '=', '!', '*', ','))
+
+
+def _clause_range(clause):
+    """:return: (low key, high key, included), the key matches if (low <= key < high) == included"""
+    match = _CLAUSE.match(clause.strip())
+    if not match:
+        raise InvalidConstraintError(clause)
+
+    op = match.group('op') or ''
+    numbers, _ = _numbers_of([int(number) for number in match.group('version').split('.')])
+    numbers = numbers[:len(NUMBER_BITS)]
+
+    if match.group('wildcard') or not op:  # prefix, `17.0.*` or `17.0`
+        if op not in ('', '=', '==', '!='):
+            raise InvalidConstraintError(clause)
+        prefix = list(numbers)
+        low = pack_numbers(prefix)
+        prefix[-1] += 1
+        high = pack_numbers(prefix)
+        return low << LOW_BITS, high << LOW_BITS, op != '!='
+
+    packed = pack_numbers(numbers)
+    low, high, included = {
+        '>=': (packed, None, True),
+        '>': (packed + 1, None, True),
+        '<': (0, packed, True),
+        '<=': (0, packed + 1, True),
+        '==': (packed, packed + 1, True),
+        '=': (packed, packed + 1, True),
+        '!=': (packed, packed + 1, False),
+    }[op]
+
+    return low << LOW_BITS, MAX_KEY if high is None else high << LOW_BITS, included
+
+
+def parse_constraint(query):
+    """
+    Comma separated clauses which all must match, each one is `<op><version>` (op is >=, <=, >, <, == or !=)
+    or a prefix such as `17`, `17.0.*` and `!=17.0.*`
+
+    :return: list of (low key, high key, included)
+    raise InvalidConstraintError
+
+    >>> constraint = parse_constraint('>=11,<17')
+    >>> [matches_constraint(constraint, parse_version(v).key) for v in ('1.8.0_144', '11.0.2+9', '16.0.2', '17-ea')]
+    [False, True, True, False]
+    >>> [matches_constraint(parse_constraint('17.0.*'), parse_version(v).key) for v in ('17.0.9', '17.1.0')]
+    [True, False]
+    """
+    clauses = [clause for clause in query.split(',') if clause.strip()]
+    if not clauses:
+        raise InvalidConstraintError(query)
+
+    return [_clause_range(clause) for clause in clauses]
+
+
+def matches_constraint(constraint, key):
+    return all((low <= key < high) == included for low, high, included in constraint)
+
+
+def constraint_sql(constraint, column='version_key'):
+    """:return: (where clause, params)"""
+    clauses = []
+    params = []
+    for low, high, included in constraint:
+        clauses.append(('{0} >= ? AND {0} < ?' if included else 'NOT ({0} >= ? AND {0} < ?)').format(column))
+        params.extend([low, high])
+
+    return ' AND '.join(clauses), params
@@ -0,0 +1,167 @@
+# -*- coding:utf-8 -*-
+"""Watch directories with Linux inotify, or mtime polling where inotify isn't available
+
+An event is a (directory, name) pair, name is '' if the directory itself changed
+or the watcher can't tell which entry changed (polling).
+OVERFLOW means events were lost and everything should be checked again.
+"""
+
+import os
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+
+
+OVERFLOW = (None, None)
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+EVENT_HEADER = struct.Struct('iIII')
+
+# the files of a watched directory whose change is reported by polling
+POLLED_FILES = ('java', 'java.exe', 'release')
+
+
+class InotifyWatcher(object):
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+
+        self._wd_dirs = {}
+        self._dir_wds = {}
+
+    def watch(self, dirs):
+        """watch exactly the dirs from now on"""
+        dirs = set(dirs)
+
+        for dir_path in set(self._dir_wds) - dirs:
+            self._libc.inotify_rm_watch(self._fd, self._dir_wds.pop(dir_path))
+
+        for dir_path in dirs - set(self._dir_wds):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir_path), WATCH_MASK)
+            if wd >= 0:  # it's gone or not a directory
+                self._dir_wds[dir_path] = wd
+                self._wd_dirs[wd] = dir_path
+
+    def read(self, timeout=None):
+        """:return: events, empty if nothing happens in timeout seconds"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+
+        data = os.read(self._fd, 64 * 1024)
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + name_len].rstrip(b'\x00'))
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                events.append(OVERFLOW)
+            elif mask & IN_IGNORED:
+                dir_path = self._wd_dirs.pop(wd, None)
+                if self._dir_wds.get(dir_path) == wd:
+                    del self._dir_wds[dir_path]
+            elif wd in self._wd_dirs:
+                events.append((self._wd_dirs[wd], name))
+
+        return events
+
+    def close(self):
+        os.close(self._fd)
+
+
+def _poll_signature(dir_path):
+    signature = []
+    for path in [dir_path] + [os.path.join(dir_path, name) for name in POLLED_FILES]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            signature.append(None)
+        else:
+            signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+
+    return signature
+
+
+class PollingWatcher(object):
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self._signatures = {}
+
+    def watch(self, dirs):
+        self._signatures = {dir_path: self._signatures.get(dir_path) or _poll_signature(dir_path)
+                            for dir_path in dirs}
+
+    def read(self, timeout=None):
+        time.sleep(self.interval if timeout is None else min(self.interval, timeout))
+
+        events = []
+        for dir_path, signature in self._signatures.items():
+            new_signature = _poll_signature(dir_path)
+            if new_signature != signature:
+                self._signatures[dir_path] = new_signature
+                events.append((dir_path, ''))
+
+        return events
+
+    def close(self):
+        pass
+
+
+def open_watcher(interval=5.0):
+    """InotifyWatcher if the platform supports it, otherwise PollingWatcher"""
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError, TypeError):  # no libc or no inotify_init1 in it
+        return PollingWatcher(interval)
+
+
+def watch(get_dirs, on_change, debounce=2.0, interval=5.0):
+    """
+    Call on_change(events) once a burst of events is quiet for debounce seconds,
+    events is None if some were lost. The watched dirs are got from get_dirs() again after it.
+    It never returns, stop it with KeyboardInterrupt.
+    """
+    watcher = open_watcher(interval)
+    pending = set()
+    deadline = None
+
+    try:
+        watcher.watch(get_dirs())
+
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if pending else None
+            events = watcher.read(timeout)
+
+            if events:
+                pending.update(events)
+                deadline = time.monotonic() + debounce
+            elif pending and time.monotonic() >= deadline:
+                on_change(None if OVERFLOW in pending else sorted(pending))
+                pending.clear()
+                watcher.watch(get_dirs())
+    finally:
+        watcher.close()